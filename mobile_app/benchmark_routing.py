@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки локальной маршрутизации (RoutingEngine)
+"""
+import sys
+import os
+import random
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.graph_builder import DEMO_NODES_CSV, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.routing_engine import RoutingEngine
+from services.sparsify import sparsify_graph
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def _random_queries(engine: RoutingEngine, count: int, seed: int = 1):
+    """Случайные пары (старт, цель) среди узлов графа"""
+    rng = random.Random(seed)
+    node_ids = engine.graph.node_ids
+    return [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(count)]
+
+
+def _reachable_pairs(engine: RoutingEngine):
+    """Все достижимые пары узлов (для небольших графов)"""
+    return [
+        (start_id, end_id)
+        for start_id in engine.graph.node_ids
+        for end_id in engine.graph.node_ids
+        if start_id != end_id and engine.find_path(start_id, end_id) is not None
+    ]
+
+
+def compare_methods(engine: RoutingEngine, queries, methods=('dijkstra', 'astar')) -> dict:
+    """
+    Сравнить методы поиска по числу раскрытых узлов и времени
+
+    Returns:
+        {метод: (раскрыто узлов, секунд)}
+    """
+    results = {}
+    for method in methods:
+        settled = 0
+        started = time.perf_counter()
+        for start_id, end_id in queries:
+            engine.find_path(start_id, end_id, method=method)
+            settled += engine.last_stats.settled
+        results[method] = (settled, time.perf_counter() - started)
+    return results
+
+
+def _print_comparison(title: str, results: dict):
+    """Вывести таблицу сравнения"""
+    print(f"\n📊 {title}")
+    baseline = results.get('dijkstra', (0, 0))[0] or 1
+    for method, (settled, seconds) in results.items():
+        print(f"  {method:>10}: {settled:>9} узлов ({settled / baseline:.0%}), {seconds * 1000:.1f} мс")
+
+
+def bench_astar():
+    """A* против Dijkstra на демо-данных и синтетических зданиях"""
+    engine = RoutingEngine.from_nodes(DEMO_NODES_CSV)
+    _print_comparison(f"DEMO_NODES_CSV ({engine.graph.node_count} узлов)",
+                      compare_methods(engine, _reachable_pairs(engine)))
+
+    for floors, side in [(3, 20), (5, 40), (5, 80)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        _print_comparison(f"Синтетическое здание {floors}x{side}x{side} ({engine.graph.node_count} узлов)",
+                          compare_methods(engine, _random_queries(engine, 50)))
+
+
+def bench_bidirectional():
+    """Двунаправленный поиск на длинных маршрутах между крыльями и этажами"""
+    methods = ('dijkstra', 'astar', 'bidirectional', 'bidirectional_astar')
+    for floors, side in [(5, 40), (5, 80)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        node_ids = engine.graph.node_ids
+        # От угла первого этажа к противоположному краю последнего
+        queries = [(node_ids[i], node_ids[-1 - i]) for i in range(0, side * side, side * side // 20)]
+        _print_comparison(f"Длинные маршруты {floors}x{side}x{side} ({engine.graph.node_count} узлов)",
+                          compare_methods(engine, queries, methods))
+        _print_comparison(f"Случайные маршруты {floors}x{side}x{side}",
+                          compare_methods(engine, _random_queries(engine, 50), methods))
+
+
+def bench_hierarchical():
+    """Иерархия этаж/портал на многоэтажных зданиях"""
+    methods = ('dijkstra', 'astar', 'hierarchical')
+    for floors, side in [(4, 20), (10, 20)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        engine.floor_hierarchy()  # Предрасчёт не входит в замер
+        _print_comparison(f"Этажи/порталы {floors}x{side}x{side} ({engine.graph.node_count} узлов)",
+                          compare_methods(engine, _random_queries(engine, 50), methods))
+
+
+def bench_contraction_hierarchy():
+    """Contraction Hierarchies: предобработка и запросы"""
+    methods = ('dijkstra', 'astar', 'ch')
+    for floors, side in [(3, 20), (5, 40)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        started = time.perf_counter()
+        hierarchy = engine.attach_contraction_hierarchy()
+        elapsed = time.perf_counter() - started
+        print(f"\n⏱️  CH {floors}x{side}x{side}: предобработка {elapsed:.1f} с, "
+              f"{hierarchy.shortcut_count} ярлыков")
+        queries = _random_queries(engine, 100)
+        _print_comparison(f"CH {floors}x{side}x{side} ({engine.graph.node_count} узлов, 100 запросов)",
+                          compare_methods(engine, queries, methods))
+
+
+def _walled_nodes(floors: int, side: int):
+    """Здание со стеной посередине каждого этажа (проход только по краям)"""
+    wall_col = side // 2
+    return [
+        node for node in make_grid_building_nodes(floors, side, side)
+        if not (int(node['Id']) % side == wall_col and 0 < int(node['Id']) // side % side < side - 1)
+    ]
+
+
+def bench_alt():
+    """ALT (ориентиры) против A* по прямой, в том числе при обходах"""
+    methods = ('dijkstra', 'astar', 'alt')
+    engine = RoutingEngine.from_nodes(DEMO_NODES_CSV)
+    engine.landmark_table()  # Предрасчёт не входит в замер
+    _print_comparison(f"ALT DEMO_NODES_CSV ({engine.graph.node_count} узлов)",
+                      compare_methods(engine, _reachable_pairs(engine), methods))
+
+    for title, nodes in [("Решётка 3x40x40", make_grid_building_nodes(3, 40, 40)),
+                         ("Стена 3x40x40", _walled_nodes(3, 40))]:
+        engine = RoutingEngine.from_nodes(nodes)
+        engine.landmark_table()
+        _print_comparison(f"ALT {title} ({engine.graph.node_count} узлов)",
+                          compare_methods(engine, _random_queries(engine, 100), methods))
+
+
+def bench_oracle():
+    """Таблица всех пар: сборка и запросы"""
+    methods = ('dijkstra', 'alt', 'oracle')
+    for floors, side in [(3, 20)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        started = time.perf_counter()
+        engine.attach_distance_oracle()
+        print(f"\n⏱️  Таблица всех пар {floors}x{side}x{side}: сборка {time.perf_counter() - started:.1f} с")
+        _print_comparison(f"Таблица всех пар ({engine.graph.node_count} узлов, 200 запросов)",
+                          compare_methods(engine, _random_queries(engine, 200), methods))
+
+
+def bench_alternatives():
+    """Альтернативные маршруты (k=3) против трёх независимых поисков"""
+    for title, nodes in [("Решётка 3x40x40", make_grid_building_nodes(3, 40, 40)),
+                         ("Стена 3x40x40", _walled_nodes(3, 40))]:
+        engine = RoutingEngine.from_nodes(nodes)
+        queries = [pair for pair in _random_queries(engine, 30) if pair[0] != pair[1]]
+        baseline = 0
+        for start_id, end_id in queries:
+            engine.find_path(start_id, end_id)
+            baseline += 3 * engine.last_stats.settled
+        settled = 0
+        started = time.perf_counter()
+        for start_id, end_id in queries:
+            engine.find_alternatives(start_id, end_id, k=3)
+            settled += engine.last_stats.settled
+        elapsed = time.perf_counter() - started
+        print(f"\n📊 Альтернативы k=3 {title} ({len(queries)} запросов)")
+        print(f"  3 x dijkstra: {baseline:>9} узлов")
+        print(f"         yen: {settled:>9} узлов ({settled / (baseline or 1):.0%}), {elapsed * 1000:.1f} мс")
+
+
+def bench_tour():
+    """Маршрут обхода 50 точек: матрица поисками и таблицей всех пар"""
+    engine = RoutingEngine.from_nodes(make_grid_building_nodes(3, 40, 40))
+    stops = random.Random(2).sample(engine.graph.node_ids, 51)
+    started = time.perf_counter()
+    _, distance, _ = engine.find_tour(stops[0], stops[1:])
+    print(f"\n⏱️  Обход 50 точек 3x40x40: {(time.perf_counter() - started) * 1000:.0f} мс, "
+          f"{engine.last_stats.settled} узлов, длина {distance:.0f}")
+
+    engine = RoutingEngine.from_nodes(make_grid_building_nodes(3, 20, 20))
+    engine.attach_distance_oracle()
+    stops = random.Random(2).sample(engine.graph.node_ids, 51)
+    started = time.perf_counter()
+    engine.find_tour(stops[0], stops[1:])
+    print(f"⏱️  Обход 50 точек 3x20x20 (таблица всех пар): {(time.perf_counter() - started) * 1000:.0f} мс")
+
+
+def bench_dynamic_route():
+    """Починка маршрута (LPA*) при закрытиях на пути против поиска с нуля"""
+    engine = RoutingEngine.from_nodes(make_grid_building_nodes(3, 40, 40))
+    graph = engine.graph
+    start_id, end_id = graph.node_ids[1], graph.node_ids[-2]
+    route = engine.dynamic_route(start_id, end_id)
+    closed = []
+    repaired = full = 0
+    for _ in range(10):
+        path, _ = route.path()
+        closed.append(graph.to_id(path[len(path) // 2]))  # Закрываем середину текущего пути
+        closures = engine.closure_overlay(closed_nodes=closed)
+        route.update(closures)
+        repaired += route.last_expanded
+        engine.find_path(start_id, end_id, closures, method='astar')
+        full += engine.last_stats.settled
+    print(f"\n📊 Починка маршрута 3x40x40 (10 закрытий на пути)")
+    print(f"  astar с нуля: {full:>9} узлов")
+    print(f"          lpa: {repaired:>9} узлов ({repaired / (full or 1):.0%})")
+
+
+def bench_pareto():
+    """Многокритериальный поиск (расстояние, этажи, лестницы) против одного Dijkstra"""
+    for floors, side in [(3, 20), (5, 40)]:
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors, side, side))
+        queries = [pair for pair in _random_queries(engine, 30) if pair[0] != pair[1]]
+        baseline = compare_methods(engine, queries)['dijkstra']
+        settled = routes = 0
+        started = time.perf_counter()
+        for start_id, end_id in queries:
+            routes += len(engine.find_pareto_routes(start_id, end_id))
+            settled += engine.last_stats.settled
+        elapsed = time.perf_counter() - started
+        print(f"\n📊 Парето {floors}x{side}x{side} ({len(queries)} запросов, {routes / len(queries):.1f} маршрута на запрос)")
+        print(f"    dijkstra: {baseline[0]:>9} узлов, {baseline[1] * 1000:.1f} мс")
+        print(f"      pareto: {settled:>9} меток, {elapsed * 1000:.1f} мс")
+
+
+def _lattice_graph(side: int, seed: int = 1) -> CompiledGraph:
+    """Решётка side x side со случайными целыми весами 50-150 (без GraphBuilder)"""
+    rng = random.Random(seed)
+    sources, targets, weights = [], [], []
+    for row in range(side):
+        for col in range(side):
+            index = row * side + col
+            for neighbor in (index + 1 if col + 1 < side else None, index + side if row + 1 < side else None):
+                if neighbor is None:
+                    continue
+                weight = float(rng.randint(50, 150))
+                sources += [index, neighbor]
+                targets += [neighbor, index]
+                weights += [weight, weight]
+    return CompiledGraph.from_arrays([str(i) for i in range(side * side)], sources, targets, weights)
+
+
+def bench_bucket_queue():
+    """Dijkstra: бинарная куча против корзин Dial на решётках 10k-1M узлов"""
+    for side in (100, 316, 1000):
+        graph = _lattice_graph(side)
+        engine = RoutingEngine(graph)
+        rng = random.Random(side)
+        queries = [('0', graph.node_ids[-1])] + [tuple(rng.sample(graph.node_ids, 2)) for _ in range(4)]
+        engine.find_path(*queries[1])  # Прогрев
+        results = {}
+        for queue in ('binary', 'buckets'):
+            graph.use_priority_queue(queue)
+            started = time.perf_counter()
+            distances = [engine.find_path(start_id, end_id)[1] for start_id, end_id in queries]
+            results[queue] = (time.perf_counter() - started, distances)
+        binary, buckets = results['binary'], results['buckets']
+        assert binary[1] == buckets[1]  # Целые веса - ответы совпадают
+        print(f"\n📊 Очередь Dijkstra, решётка {graph.node_count} узлов ({len(queries)} запросов)")
+        print(f"    binary: {binary[0] * 1000:.0f} мс")
+        print(f"   buckets: {buckets[0] * 1000:.0f} мс (x{binary[0] / (buckets[0] or 1e-9):.2f})")
+
+
+def bench_sparsify():
+    """Прореживание рёбер: сокращение графа и ускорение поиска"""
+    for title, nodes in [("DEMO_NODES_CSV", DEMO_NODES_CSV),
+                         ("Плотная решётка 3x20x20 (шаг 30)", make_grid_building_nodes(3, 20, 20, spacing=30))]:
+        graph = CompiledGraph.from_nodes(nodes)
+        engine = RoutingEngine(graph)
+        queries = _reachable_pairs(engine) if graph.node_count < 200 else _random_queries(engine, 200)
+        print(f"\n📊 Прореживание {title} ({graph.node_count} узлов, {len(queries)} запросов)")
+        compare_methods(engine, queries[:20])  # Прогрев
+        baseline = compare_methods(engine, queries)['dijkstra']
+        print(f"  исходный граф: {graph.edge_count:>6} рёбер, "
+              f"{baseline[0]:>8} узлов, {baseline[1] * 1000:.1f} мс")
+        for epsilon in (0.0, 0.05, 0.2):
+            started = time.perf_counter()
+            sparse, report = sparsify_graph(graph, epsilon)
+            build = time.perf_counter() - started
+            settled, seconds = compare_methods(RoutingEngine(sparse), queries)['dijkstra']
+            print(f"  epsilon={epsilon:<4}: {report.edges_after:>6} рёбер (-{report.reduction:.0%}), "
+                  f"{settled:>8} узлов, {seconds * 1000:.1f} мс "
+                  f"(x{baseline[1] / (seconds or 1e-9):.2f}), сборка {build * 1000:.0f} мс")
+
+
+def main():
+    """Запустить все бенчмарки"""
+    bench_astar()
+    bench_bidirectional()
+    bench_hierarchical()
+    bench_contraction_hierarchy()
+    bench_alt()
+    bench_oracle()
+    bench_alternatives()
+    bench_tour()
+    bench_dynamic_route()
+    bench_sparsify()
+    bench_pareto()
+    bench_bucket_queue()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,8 +11,9 @@ from screens.map_screen import MapScreen
 from screens.qr_scanner_screen import QRScannerScreen
 from screens.admin_screen import AdminScreen
 from screens.history_screen import HistoryScreen
-from services.api_client import init_api_client
-from services.cache_service import init_cache_service
+from services.api_client import init_api_client, get_api_client
+from services.cache_service import init_cache_service, get_cache_service
+from services.graph_cache import init_graph_cache
 from services.auth_service import AuthenticationService
 from services.qr_service import QRCodeService
 from services.route_closure_service import RouteClosureService
@@ -43,6 +44,8 @@ class CampusCompassApp(App):
 
         init_api_client(base_url=api_url)
         init_cache_service(cache_dir=cache_dir)
+        # Скомпилированные графы зданий сохраняются в тот же кэш
+        init_graph_cache(cache_service=get_cache_service())
 
         # Инициализируем сервисы аутентификации и QR кодов
         auth_service = AuthenticationService(
@@ -71,6 +74,8 @@ class CampusCompassApp(App):
         home_screen = HomeScreen(name='home')
         map_screen = MapScreen(name='map')
         map_screen.closure_service = closure_service  # Устанавливаем сервис закрытий
+        closure_service.add_listener(map_screen.on_closures_changed)  # Перестроение маршрута
+        get_api_client().closure_service = closure_service  # Для локальных маршрутов клиента
         qr_scanner_screen = QRScannerScreen(qr_service=qr_service, name='qr_scanner')
         admin_screen = AdminScreen(auth_service=auth_service, qr_service=qr_service, 
                                    closure_service=closure_service, name='admin')
@@ -154,7 +154,8 @@ class AdminScreen(Screen):
             closure_type = ClosureType(type_spinner.text)
 
             if from_id and to_id:
-                closure_service = RouteClosureService()
+                # Общий сервис приложения: экран карты узнает о закрытии
+                closure_service = self.closure_service or RouteClosureService()
                 closure_service.close_route(
                     from_id=from_id,
                     to_id=to_id,
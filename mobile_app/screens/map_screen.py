@@ -18,6 +18,9 @@ from services.api_client import get_api_client, Building, Node, Route
 from services.cache_service import get_cache_service
 from services.route_closure_service import RouteClosureService
 from services.graph_builder import GraphBuilder
+from services.graph_cache import get_graph_cache
+from services.routing_engine import WALKING_SPEED
+from services.routing_profiles import DEFAULT_PROFILE, AVOID_STAIRS, ELEVATOR_ONLY
 import logging
 import threading
 
@@ -27,16 +30,39 @@ logger = logging.getLogger(__name__)
 class MapScreen(Screen):
     """Экран карты с навигацией"""
 
+    # Подписи профилей маршрутизации в интерфейсе
+    PROFILE_LABELS = {
+        'Обычный': DEFAULT_PROFILE,
+        'Без лестниц': AVOID_STAIRS,
+        'Только лифт': ELEVATOR_ONLY,
+    }
+    ALTERNATIVE_ROUTES = 2  # Сколько альтернатив показывать вместе с основным маршрутом
+    ISOCHRONE_MINUTES = 5  # Бюджет времени для подсветки достижимой области
+    DEFAULT_START_TYPES = ('Staircase', 'Elevator')  # Старт по QR без выбранной точки
+    # Строить таблицу всех пар при загрузке здания (один Dijkstra на узел,
+    # секунды на тысячах узлов); без флага подключаются только готовые файлы
+    BUILD_DISTANCE_ORACLE = False
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.building: Building = None
         self.api_client = get_api_client()
         self.cache_service = get_cache_service()
+        # Графы зданий собираются один раз на версию набора узлов
+        self.graph_cache = get_graph_cache()
         self.current_route: Route = None
         self.start_node: Node = None
         self.end_node: Node = None
         # Сервис закрытых маршрутов будет установлен позже
         self.closure_service = None
+        # Состояние поиска текущего маршрута для починки при смене закрытий:
+        # (версия маршрута, DynamicRoute); версия растёт с каждым новым
+        # маршрутом пользователя, починки выполняются по одной
+        self._dynamic_route = None
+        self._route_version = 0
+        self._repair_lock = threading.Lock()
+        # Профиль маршрутизации (доступность), общий для API и локального поиска
+        self.routing_profile = DEFAULT_PROFILE
 
         # Основной лейаут
         main_layout = BoxLayout(orientation='vertical', padding=dp(5), spacing=dp(5))
@@ -51,10 +77,17 @@ class MapScreen(Screen):
         self.floor_spinner = Spinner(
             text='1',
             values=('1', '2', '3', '4', '5'),
-            size_hint_x=0.7
+            size_hint_x=0.3
         )
         self.floor_spinner.bind(text=self.on_floor_changed)
         floor_layout.add_widget(self.floor_spinner)
+        self.profile_spinner = Spinner(
+            text='Обычный',
+            values=tuple(self.PROFILE_LABELS),
+            size_hint_x=0.4
+        )
+        self.profile_spinner.bind(text=self.on_profile_changed)
+        floor_layout.add_widget(self.profile_spinner)
         top_panel.add_widget(floor_layout)
 
         # Строка поиска
@@ -96,7 +129,7 @@ class MapScreen(Screen):
         self.route_panel.add_widget(self.route_info_label)
 
         # Кнопки внизу
-        button_layout = GridLayout(cols=5, size_hint_y=0.5, spacing=dp(5))
+        button_layout = GridLayout(cols=9, size_hint_y=0.5, spacing=dp(5))
 
         reset_btn = Button(text='Сброс')
         reset_btn.bind(on_press=self.on_reset_view)
@@ -110,6 +143,22 @@ class MapScreen(Screen):
         zoom_out_btn.bind(on_press=self.on_zoom_out)
         button_layout.add_widget(zoom_out_btn)
 
+        elevator_btn = Button(text='Лифт')
+        elevator_btn.bind(on_press=lambda instance: self.route_to_nearest('Elevator'))
+        button_layout.add_widget(elevator_btn)
+
+        reachable_btn = Button(text=f'{self.ISOCHRONE_MINUTES} мин')
+        reachable_btn.bind(on_press=lambda instance: self.toggle_reachable(self.ISOCHRONE_MINUTES))
+        button_layout.add_widget(reachable_btn)
+
+        alternatives_btn = Button(text='Варианты')
+        alternatives_btn.bind(on_press=lambda instance: self.toggle_alternatives())
+        button_layout.add_widget(alternatives_btn)
+
+        fewest_stairs_btn = Button(text='Меньше лестниц')
+        fewest_stairs_btn.bind(on_press=lambda instance: self.show_fewest_stairs_route())
+        button_layout.add_widget(fewest_stairs_btn)
+
         cancel_btn = Button(text='Отмена')
         cancel_btn.bind(on_press=self.on_cancel_selection)
         button_layout.add_widget(cancel_btn)
@@ -128,6 +177,7 @@ class MapScreen(Screen):
         self.start_node = None
         self.end_node = None
         self.current_route = None
+        self._reset_dynamic_route()
         
         # Установить callback для выбора узлов на карте
         self.map_widget.on_node_selected_callback = self.on_map_node_selected
@@ -151,6 +201,13 @@ class MapScreen(Screen):
         try:
             logger.info(f"Loading building data: {self.building.id}")
             # Данные уже есть в building объекте
+            # Таблица расстояний всех пар: отображается из кэша, если уже
+            # сохранена, маршруты берут её через 'auto'
+            try:
+                self.graph_cache.attach_distance_oracle(self.building.id, self._get_nodes_dicts(),
+                                                        build=self.BUILD_DISTANCE_ORACLE)
+            except Exception as e:
+                logger.warning(f"Distance oracle unavailable: {e}")
             # Обновляем UI в главном потоке через Clock
             Clock.schedule_once(lambda dt: self._update_map_display(), 0)
         except Exception as e:
@@ -171,29 +228,13 @@ class MapScreen(Screen):
             if not self.building.nodes:
                 return
                 
-            from services.graph_builder import GraphBuilder
-            
-            # Конвертируем Node объекты в словари для GraphBuilder
-            nodes_dicts = [
-                {
-                    'Id': node.id,
-                    'Name': node.name,
-                    'X': node.x,
-                    'Y': node.y,
-                    'Floor': node.floor,
-                    'Type': node.node_type
-                }
-                for node in self.building.nodes
-            ]
-            
-            # Строим edges
-            builder = GraphBuilder()
-            edges = builder.build_edges_from_nodes(nodes_dicts)
+            # Граф здания берём из кэша (строится один раз на версию здания)
+            graph = self.graph_cache.get_graph(self.building.id, self._get_nodes_dicts())
             
             # Фильтруем edges по текущему этажу
             floor_edges = []
             node_ids = {n.id for n in floor_nodes}
-            for edge in edges:
+            for edge in graph.iter_edges():
                 if edge.from_id in node_ids and edge.to_id in node_ids:
                     floor_edges.append((edge.from_id, edge.to_id))
             
@@ -205,10 +246,30 @@ class MapScreen(Screen):
                 closed_nodes = self.closure_service.get_closed_nodes()
                 self.map_widget.set_closed_routes(closed_edges, closed_nodes)
 
+    def _get_nodes_dicts(self) -> list:
+        """Конвертировать Node объекты здания в словари для GraphBuilder"""
+        return [
+            {
+                'Id': str(node.id),  # Убеждаемся что ID строка
+                'Name': node.name,
+                'X': node.x,
+                'Y': node.y,
+                'Floor': node.floor,
+                'Type': node.node_type
+            }
+            for node in self.building.nodes
+        ]
+
     def on_floor_changed(self, spinner, text):
         """Обработка изменения этажа"""
         self._update_map_display()
 
+    def on_profile_changed(self, spinner, text):
+        """Обработка смены профиля маршрутизации (пересчёт маршрута)"""
+        self.routing_profile = self.PROFILE_LABELS.get(text, DEFAULT_PROFILE)
+        if self.start_node and self.end_node:
+            self._calculate_route()
+
     def on_search(self, instance):
         """Поиск помещения"""
         query = self.search_input.text.strip()
@@ -314,7 +375,7 @@ class MapScreen(Screen):
             # Ищем узел по ID
             end_node = None
             for node in self.building.nodes:
-                if node.node_id == node_id:
+                if str(node.id) == str(node_id):
                     end_node = node
                     break
             
@@ -332,9 +393,9 @@ class MapScreen(Screen):
                 if self.start_node:
                     self._calculate_route()
                 else:
-                    # Выбираем стартовую точку автоматически (первый узел)
-                    if self.building.nodes:
-                        self.start_node = self.building.nodes[0]
+                    # Стартовая точка - ближайшая к цели лестница или лифт
+                    self.start_node = self._pick_default_start(end_node)
+                    if self.start_node:
                         self.map_widget.set_start_node(self.start_node)
                         self.route_info_label.text = f'Старт: {self.start_node.name}\nЦель: {node_name}'
                         self._calculate_route()
@@ -374,10 +435,14 @@ class MapScreen(Screen):
             route = self.api_client.get_route(
                 self.building.id,
                 self.start_node.id,
-                self.end_node.id
+                self.end_node.id,
+                avoid_stairs=self.routing_profile != DEFAULT_PROFILE
             )
             self.current_route = route
             self.map_widget.set_route(route)
+            self.map_widget.set_alternative_routes([])
+            # Состояние LPA* строится при первой смене закрытий (см. _repair_route)
+            self._reset_dynamic_route()
 
             # Обновляем информацию о маршруте
             info_text = (
@@ -400,76 +465,376 @@ class MapScreen(Screen):
                 Clock.schedule_once(lambda dt: self._show_error_popup("Ошибка: нет данных о здании"), 0)
                 return
             
-            # Конвертируем Node объекты в словари для графа
-            nodes_dicts = []
-            nodes_map = {}
-            for node in self.building.nodes:
-                node_dict = {
-                    'Id': str(node.id),  # Убеждаемся что ID строка
-                    'Name': node.name,
-                    'Floor': node.floor,
-                    'Type': node.node_type,  # Исправлено: node_type вместо type
-                    'X': node.x,
-                    'Y': node.y
-                }
-                nodes_dicts.append(node_dict)
-                nodes_map[str(node.id)] = node
-            
-            # Строим граф
-            edges = GraphBuilder.build_edges_from_nodes(nodes_dicts)
-            
-            # Находим кратчайший путь
-            # Создаём словарь с ID в виде строк для совместимости
-            nodes_dict_for_search = {str(nd['Id']): nd for nd in nodes_dicts}
-            
-            path_result = GraphBuilder.find_shortest_path(
+            nodes_map = {str(node.id): node for node in self.building.nodes}
+
+            # Движок берём из кэша графов здания
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+
+            # Закрытые маршруты накладываются маской, граф не перестраивается
+            closures = self._get_closure_overlay(engine)
+
+            # Находим кратчайший путь (при переборе целей от одного старта
+            # ответ берётся из дерева кратчайших путей)
+            path_result = engine.find_path(
                 str(self.start_node.id),
                 str(self.end_node.id),
-                edges,
-                nodes_dict_for_search
+                closures,
+                method='auto',
+                reuse_tree=True,
+                profile=self.routing_profile
             )
             
             if path_result:
                 path_ids, distance = path_result
                 
                 # Создаём объект Route с локально найденным маршрутом
-                route_nodes = []
-                for node_id in path_ids:
-                    for node in self.building.nodes:
-                        if str(node.id) == node_id:
-                            route_nodes.append(node)
-                            break
-                
-                # Создаём простой Route объект
-                route = Route(
-                    path=route_nodes,
-                    distance=distance,
-                    estimated_time=distance / 1.4,  # ~1.4 м/мин пешком
-                    floor_changes=0
-                )
+                route = self._make_route(nodes_map, path_ids, distance)
                 
                 # Выполняем UI операции в главном потоке
                 def update_route():
                     self.current_route = route
+                    self._reset_dynamic_route()
                     self.map_widget.set_route(route)
+                    # Альтернативы и вариант "меньше лестниц" ищутся по кнопкам
+                    self.map_widget.set_alternative_routes([])
                     
                     # Обновляем информацию о маршруте
                     info_text = (
                         f'Маршрут (локальный): {self.start_node.name} → {self.end_node.name}\n'
                         f'Расстояние: {distance:.0f}м | '
-                        f'Время: {distance/1.4:.0f}мин'
+                        f'Время: {distance / WALKING_SPEED:.0f}мин'
                     )
                     self.route_info_label.text = info_text
-                    logger.info(f"Local pathfinding successful: {len(route_nodes)} nodes")
+                    logger.info(f"Local pathfinding successful: {len(route.path)} nodes")
                 
                 Clock.schedule_once(lambda dt: update_route(), 0)
             else:
-                Clock.schedule_once(lambda dt: self._show_error_popup("Маршрут не найден (нет пути между точками)"), 0)
+                message = "Маршрут не найден (нет пути между точками)"
+                if engine.last_stats.reason:
+                    # Отказ без поиска: точки в несвязанных частях графа
+                    logger.info(f"Route rejected: {engine.last_stats.reason}")
+                    message = "Маршрут не найден: точки в несвязанных частях здания"
+                    if 'closures' in engine.last_stats.reason:
+                        message += " (из-за закрытых участков)"
+                Clock.schedule_once(lambda dt: self._show_error_popup(message), 0)
                 
         except Exception as e:
             logger.error(f"Local pathfinding failed: {e}")
             self._show_error_popup(f"Ошибка построения маршрута: {str(e)}")
 
+    def _reset_dynamic_route(self):
+        """Новый маршрут пользователя: прошлые починки и состояние LPA* устарели"""
+        self._route_version += 1
+        self._dynamic_route = None
+
+    def on_closures_changed(self):
+        """Закрытия изменились (RouteClosureService): починить активный маршрут"""
+        if not self.building or not self.current_route:
+            return
+        thread = threading.Thread(target=self._repair_route)
+        thread.daemon = True
+        thread.start()
+
+    def _repair_route(self):
+        """
+        Перестроить маршрут под новые закрытия
+
+        Состояние поиска (см. DynamicRoute) строится лениво, при первой
+        смене закрытий для текущего маршрута: большинству маршрутов оно не
+        нужно, а полный поиск LPA* дороже основного. Дальше маршрут
+        чинится инкрементально. Починки идут по одной (общие куча и g/rhs),
+        результат отбрасывается, если пользователь успел выбрать новый
+        маршрут.
+        """
+        with self._repair_lock:
+            version = self._route_version
+            try:
+                engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+                closures = self._get_closure_overlay(engine)
+                if self._dynamic_route is not None and self._dynamic_route[0] == version:
+                    dynamic_route = self._dynamic_route[1]
+                    result = dynamic_route.update(closures)
+                else:
+                    dynamic_route = engine.dynamic_route(
+                        str(self.start_node.id),
+                        str(self.end_node.id),
+                        closures,
+                        profile=self.routing_profile
+                    )
+                    if dynamic_route is None:
+                        return
+                    self._dynamic_route = (version, dynamic_route)
+                    result = dynamic_route.path()
+            except Exception as e:
+                logger.error(f"Route repair failed: {e}")
+                return
+        if self._route_version != version:
+            logger.info("Route changed during repair, repaired route dropped")
+            return
+
+        closed_edges = self.closure_service.get_closed_edges()
+        closed_nodes = self.closure_service.get_closed_nodes()
+        logger.info(f"Reroute touched {dynamic_route.last_expanded} nodes, "
+                    f"full search touched {dynamic_route.initial_expanded}")
+        if result is None:
+            def show_blocked():
+                if self._route_version != version:
+                    return  # Маршрут сменился, пока шла починка
+                self.map_widget.set_closed_routes(closed_edges, closed_nodes)
+                self._show_error_popup("Маршрут перекрыт: обхода нет")
+            Clock.schedule_once(lambda dt: show_blocked(), 0)
+            return
+
+        path, distance = result
+        graph = dynamic_route.graph
+        nodes_map = {str(node.id): node for node in self.building.nodes}
+        route = self._make_route(nodes_map, [graph.to_id(index) for index in path], distance)
+
+        def update_route():
+            if self._route_version != version:
+                return  # Маршрут сменился, пока шла починка
+            self.current_route = route
+            self.map_widget.set_closed_routes(closed_edges, closed_nodes)
+            self.map_widget.set_alternative_routes([])
+            self.map_widget.set_route(route)
+            self.route_info_label.text = (
+                f'Маршрут перестроен: {self.start_node.name} → {self.end_node.name}\n'
+                f'Расстояние: {distance:.0f}м | '
+                f'Время: {distance / WALKING_SPEED:.0f}мин'
+            )
+        Clock.schedule_once(lambda dt: update_route(), 0)
+
+    def toggle_alternatives(self):
+        """
+        Показать альтернативы текущему маршруту
+
+        Поиск k кратчайших путей заметно дороже основного маршрута,
+        поэтому выполняется только по запросу. Повторное нажатие убирает
+        альтернативы.
+        """
+        if self.map_widget.alternative_routes:
+            self.map_widget.set_alternative_routes([])
+            return
+        if not self.building or not self.current_route:
+            self._show_info_popup("Сначала постройте маршрут")
+            return
+
+        route = self.current_route
+
+        def fetch_alternatives():
+            alternatives = self._find_alternative_routes(route)
+
+            def show_alternatives():
+                if self.current_route is not route:
+                    return  # Маршрут сменился, пока шёл поиск
+                if not alternatives:
+                    self._show_info_popup("Других маршрутов нет")
+                self.map_widget.set_alternative_routes(alternatives)
+            Clock.schedule_once(lambda dt: show_alternatives(), 0)
+
+        thread = threading.Thread(target=fetch_alternatives)
+        thread.daemon = True
+        thread.start()
+
+    def show_fewest_stairs_route(self):
+        """
+        Показать рядом с текущим маршрутом вариант с наименьшим числом лестниц
+
+        Многокритериальный поиск дороже основного маршрута, поэтому
+        выполняется только по запросу.
+        """
+        if not self.building or not self.current_route:
+            self._show_info_popup("Сначала постройте маршрут")
+            return
+
+        route = self.current_route
+
+        def fetch_fewest_stairs():
+            fewest_stairs = self._find_fewest_stairs_route()
+
+            def show_route():
+                if self.current_route is not route:
+                    return  # Маршрут сменился, пока шёл поиск
+                if fewest_stairs is None:
+                    self._show_info_popup("Маршрут уже проходит по наименьшему числу лестниц")
+                    return
+                self.map_widget.set_alternative_routes([fewest_stairs])
+                if 'Меньше лестниц' not in self.route_info_label.text:
+                    self.route_info_label.text += f' | Меньше лестниц: {fewest_stairs.distance:.0f}м'
+            Clock.schedule_once(lambda dt: show_route(), 0)
+
+        thread = threading.Thread(target=fetch_fewest_stairs)
+        thread.daemon = True
+        thread.start()
+
+    def _find_alternative_routes(self, route: Route) -> list:
+        """
+        Альтернативы основному маршруту по локальному графу
+
+        Ищутся k кратчайших путей без циклов (алгоритм Йена) с текущими
+        закрытиями и профилем; путь, совпадающий с основным, пропускается.
+        """
+        try:
+            nodes_map = {str(node.id): node for node in self.building.nodes}
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+            paths = engine.find_alternatives(
+                str(self.start_node.id),
+                str(self.end_node.id),
+                k=self.ALTERNATIVE_ROUTES + 1,
+                closures=self._get_closure_overlay(engine),
+                profile=self.routing_profile
+            )
+        except Exception as e:
+            logger.warning(f"Failed to find alternative routes: {e}")
+            return []
+
+        main_path = [str(node.id) for node in route.path]
+        alternatives = []
+        for path_ids, distance in paths:
+            if path_ids == main_path:
+                continue
+            alternatives.append(self._make_route(nodes_map, path_ids, distance))
+        return alternatives[:self.ALTERNATIVE_ROUTES]
+
+    def _find_fewest_stairs_route(self):
+        """
+        Маршрут с наименьшим числом лестниц рядом с кратчайшим
+
+        Берётся из одного многокритериального поиска (см.
+        RoutingEngine.find_pareto_routes). None, если кратчайший маршрут
+        и так проходит по наименьшему числу лестниц.
+        """
+        try:
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+            routes = engine.find_pareto_routes(
+                str(self.start_node.id),
+                str(self.end_node.id),
+                closures=self._get_closure_overlay(engine),
+                profile=self.routing_profile
+            )
+        except Exception as e:
+            logger.warning(f"Failed to find fewest-stairs route: {e}")
+            return None
+
+        if not routes:
+            return None
+        fewest = min(routes, key=lambda option: (option.stairs, option.floor_changes, option.distance))
+        if fewest.stairs >= routes[0].stairs:
+            return None
+        nodes_map = {str(node.id): node for node in self.building.nodes}
+        return self._make_route(nodes_map, fewest.path, fewest.distance)
+
+    @staticmethod
+    def _make_route(nodes_map: dict, path_ids: list, distance: float) -> Route:
+        """Route из пути по локальному графу (со сменами этажей)"""
+        path_nodes = [nodes_map[node_id] for node_id in path_ids]
+        return Route(
+            path=path_nodes,
+            distance=distance,
+            estimated_time=distance / WALKING_SPEED,
+            floor_changes=sum(1 for a, b in zip(path_nodes, path_nodes[1:]) if a.floor != b.floor)
+        )
+
+    def _get_closure_overlay(self, engine):
+        """Маска текущих закрытий для движка здания (None - сервиса нет)"""
+        if not self.closure_service:
+            return None
+        return engine.closure_overlay(
+            self.closure_service.get_closed_edges(),
+            self.closure_service.get_closed_nodes()
+        )
+
+    def _pick_default_start(self, end_node: Node):
+        """
+        Выбрать стартовую точку, если пользователь её не задал
+
+        Берётся ближайший к цели узел типа Staircase или Elevator (точка
+        прибытия на этаж), кроме самой цели. Если таких нет - первый
+        другой узел здания.
+        """
+        nodes_map = {str(node.id): node for node in self.building.nodes}
+        try:
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+            closures = self._get_closure_overlay(engine)
+            found = [
+                result for result in (
+                    engine.nearest_of_type(str(end_node.id), node_type, closures, exclude_start=True)
+                    for node_type in self.DEFAULT_START_TYPES
+                ) if result
+            ]
+            if found:
+                return nodes_map[min(found, key=lambda result: result[1])[0][-1]]
+        except Exception as e:
+            logger.warning(f"Failed to pick default start: {e}")
+        return next((node for node in self.building.nodes if node.id != end_node.id), None)
+
+    def route_to_nearest(self, node_type: str):
+        """
+        Построить маршрут от стартовой точки до ближайшего узла типа
+
+        Args:
+            node_type: Тип узла ('Elevator', 'Staircase', ...)
+        """
+        if not self.building or not self.building.nodes:
+            return
+        if not self.start_node:
+            self._show_info_popup("Сначала выберите стартовую точку")
+            return
+
+        try:
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+            result = engine.nearest_of_type(str(self.start_node.id), node_type,
+                                            self._get_closure_overlay(engine))
+        except Exception as e:
+            logger.error(f"Nearest {node_type} search failed: {e}")
+            self._show_error_popup(f"Ошибка поиска: {str(e)}")
+            return
+
+        if not result:
+            self._show_info_popup("Поблизости нет доступных объектов этого типа")
+            return
+
+        nodes_map = {str(node.id): node for node in self.building.nodes}
+        self.end_node = nodes_map[result[0][-1]]
+        self.map_widget.set_end_node(self.end_node)
+        self._calculate_route()
+
+    def toggle_reachable(self, minutes: float):
+        """
+        Подсветить узлы, достижимые от стартовой точки за minutes минут
+
+        Повторное нажатие убирает подсветку.
+
+        Args:
+            minutes: Бюджет времени в минутах
+        """
+        if self.map_widget.reachable_nodes:
+            self.map_widget.set_reachable_nodes({}, 0)
+            return
+        if not self.building or not self.building.nodes:
+            return
+        if not self.start_node:
+            self._show_info_popup("Сначала выберите стартовую точку")
+            return
+
+        try:
+            engine = self.graph_cache.get_engine(self.building.id, self._get_nodes_dicts())
+            reachable = engine.reachable_within(
+                str(self.start_node.id),
+                max_minutes=minutes,
+                closures=self._get_closure_overlay(engine),
+                profile=self.routing_profile
+            )
+        except Exception as e:
+            logger.error(f"Reachability search failed: {e}")
+            self._show_error_popup(f"Ошибка поиска: {str(e)}")
+            return
+
+        self.map_widget.set_reachable_nodes(reachable, minutes)
+        self.route_info_label.text = (
+            f'За {minutes:.0f} мин от {self.start_node.name} доступно: {len(reachable)} точек'
+        )
+
     def on_reset_view(self, instance):
         """Сброс панорамы и масштаба"""
         self.map_widget.reset_view()
@@ -491,6 +856,7 @@ class MapScreen(Screen):
         self.start_node = None
         self.end_node = None
         self.current_route = None
+        self._reset_dynamic_route()
         self.map_widget.clear_selection()
         self.route_info_label.text = 'Нажмите на две точки для построения маршрута'
 
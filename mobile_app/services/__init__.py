@@ -7,6 +7,19 @@ from .auth_service import AuthenticationService, UserProfile, UserRole, UserPerm
 from .qr_service import QRCodeService, QRCodeMapping
 from .route_closure_service import RouteClosureService, RouteClosure, ClosureType
 from .graph_builder import GraphBuilder, GraphEdge
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+from .floor_hierarchy import FloorHierarchy
+from .contraction_hierarchy import ContractionHierarchy
+from .landmarks import LandmarkTable
+from .distance_oracle import DistanceOracle
+from .k_shortest import KShortestPaths
+from .components import ComponentIndex
+from .pareto_routes import ParetoRoute, ParetoSearch
+from .closure_timeline import ClosureTimeline
+from .sparsify import sparsify_graph, SparsifyReport
+from .routing_engine import RoutingEngine
+from .graph_cache import GraphCache, get_graph_cache, init_graph_cache
 
 __all__ = [
     'APIClient',
@@ -26,4 +39,21 @@ __all__ = [
     'ClosureType',
     'GraphBuilder',
     'GraphEdge',
+    'CompiledGraph',
+    'ClosureOverlay',
+    'FloorHierarchy',
+    'ContractionHierarchy',
+    'LandmarkTable',
+    'DistanceOracle',
+    'KShortestPaths',
+    'ComponentIndex',
+    'ParetoRoute',
+    'ParetoSearch',
+    'ClosureTimeline',
+    'sparsify_graph',
+    'SparsifyReport',
+    'RoutingEngine',
+    'GraphCache',
+    'get_graph_cache',
+    'init_graph_cache',
 ]
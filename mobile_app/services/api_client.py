@@ -61,6 +61,10 @@ class APIClient:
         """
         self.base_url = base_url
         self.timeout = timeout
+        # Сервис закрытий для локального построения маршрутов (опционально)
+        self.closure_service = None
+        # Последние загруженные здания (для локального fallback)
+        self._buildings: Dict[str, Building] = {}
         self.session = requests.Session()
         self.session.headers.update({
             "Content-Type": "application/json",
@@ -155,7 +159,7 @@ class APIClient:
         building_id: str,
         start_node_id: str,
         end_node_ids: List[str]
-    ) -> List[Route]:
+    ) -> List[Optional[Route]]:
         """
         Получить маршруты до нескольких целей
 
@@ -165,7 +169,8 @@ class APIClient:
             end_node_ids: Список ID целевых узлов
 
         Returns:
-            Список маршрутов
+            Список маршрутов в порядке end_node_ids (при локальном
+            построении None на месте недостижимой цели)
         """
         endpoint = f"{self.base_url}/navigation/routes/calculate-multiple"
         payload = {
@@ -204,8 +209,141 @@ class APIClient:
 
             return routes
         except Exception as e:
-            logger.error(f"Failed to get multiple routes: {e}")
-            raise
+            logger.warning(f"Failed to get multiple routes from API: {e}")
+            logger.info("Falling back to local one-to-many pathfinding...")
+            routes = self._calculate_multiple_routes_locally(building_id, start_node_id, end_node_ids)
+            if routes is None:
+                logger.error(f"Failed to get multiple routes: {e}")
+                raise
+            return routes
+
+    def _calculate_multiple_routes_locally(
+        self,
+        building_id: str,
+        start_node_id: str,
+        end_node_ids: List[str]
+    ) -> Optional[List[Optional[Route]]]:
+        """
+        Построить маршруты до нескольких целей по локальному графу (fallback)
+
+        Выполняется один поиск от старта (см. RoutingEngine.find_paths).
+        Список выровнен с end_node_ids, как ответ сервера: на месте
+        недостижимой цели - None.
+
+        Returns:
+            Список маршрутов или None, если данных о здании нет
+        """
+        context = self._get_local_engine(building_id)
+        if context is None:
+            return None
+        nodes_map, engine, closures = context
+
+        results = engine.find_paths(str(start_node_id), [str(end_id) for end_id in end_node_ids], closures)
+        routes = []
+        for end_id in end_node_ids:
+            result = results.get(str(end_id))
+            if result is None:
+                logger.warning(f"No local route from {start_node_id} to {end_id}")
+                routes.append(None)
+                continue
+            path_ids, distance = result
+            routes.append(self._make_local_route(nodes_map, path_ids, distance))
+        return routes
+
+    def get_tour(
+        self,
+        building_id: str,
+        start_node_id: str,
+        stop_node_ids: List[str],
+        return_to_start: bool = False
+    ) -> Optional[Route]:
+        """
+        Построить маршрут обхода нескольких точек (обход помещений)
+
+        Порядок обхода подбирается по локальному графу здания (см.
+        RoutingEngine.find_tour), точки, до которых нет пути, пропускаются.
+
+        Args:
+            building_id: ID здания
+            start_node_id: ID стартового узла
+            stop_node_ids: ID точек обхода
+            return_to_start: Вернуться в старт в конце
+
+        Returns:
+            Один склеенный маршрут или None, если обход построить нельзя
+        """
+        context = self._get_local_engine(building_id)
+        if context is None:
+            return None
+        nodes_map, engine, closures = context
+
+        result = engine.find_tour(str(start_node_id), [str(stop_id) for stop_id in stop_node_ids],
+                                  closures, return_to_start=return_to_start)
+        if result is None:
+            logger.warning(f"No local tour from {start_node_id} in building {building_id}")
+            return None
+        path_ids, distance, order = result
+        logger.info(f"Tour through {len(order)} stops: {distance:.0f}")
+        return self._make_local_route(nodes_map, path_ids, distance)
+
+    def _get_local_engine(self, building_id: str):
+        """
+        Локальный движок маршрутизации здания
+
+        Returns:
+            Кортеж ({ID: Node}, RoutingEngine, маска закрытий или None)
+            или None, если данных о здании нет
+        """
+        from .graph_cache import get_graph_cache
+
+        building = self._get_local_building(building_id)
+        if building is None or not building.nodes:
+            return None
+
+        nodes_map = {str(node.id): node for node in building.nodes}
+        nodes_dicts = [
+            {
+                'Id': str(node.id),
+                'Name': node.name,
+                'X': node.x,
+                'Y': node.y,
+                'Floor': node.floor,
+                'Type': node.node_type
+            }
+            for node in building.nodes
+        ]
+        engine = get_graph_cache().get_engine(building.id, nodes_dicts)
+
+        closures = None
+        if self.closure_service:
+            closures = engine.closure_overlay(
+                self.closure_service.get_closed_edges(),
+                self.closure_service.get_closed_nodes()
+            )
+        return nodes_map, engine, closures
+
+    @staticmethod
+    def _make_local_route(nodes_map: dict, path_ids: List[str], distance: float) -> Route:
+        """Route из пути по локальному графу"""
+        from .routing_engine import WALKING_SPEED
+
+        path_nodes = [nodes_map[node_id] for node_id in path_ids]
+        return Route(
+            path=path_nodes,
+            distance=distance,
+            estimated_time=distance / WALKING_SPEED,
+            floor_changes=sum(1 for a, b in zip(path_nodes, path_nodes[1:]) if a.floor != b.floor)
+        )
+
+    def _get_local_building(self, building_id: str) -> Optional[Building]:
+        """Здание из последних загруженных или из демо-данных"""
+        building = self._buildings.get(building_id)
+        if building is not None:
+            return building
+        for building in self._get_demo_buildings():
+            if building.id == building_id:
+                return building
+        return None
 
     # ============== BUILDING ENDPOINTS ==============
 
@@ -243,6 +381,8 @@ class APIClient:
                     floors=building_data["floors"]
                 ))
 
+            for building in buildings:
+                self._buildings[building.id] = building
             return buildings
         except Exception as e:
             logger.error(f"Failed to get buildings: {e}")
@@ -316,13 +456,15 @@ class APIClient:
                 for node in data.get("nodes", [])
             ]
 
-            return Building(
+            building = Building(
                 id=data["id"],
                 name=data["name"],
                 address=data["address"],
                 nodes=nodes,
                 floors=data["floors"]
             )
+            self._buildings[building.id] = building
+            return building
         except Exception as e:
             logger.error(f"Failed to get building {building_id}: {e}")
             raise
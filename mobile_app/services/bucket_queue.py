@@ -0,0 +1,114 @@
+"""
+Dijkstra на очереди-корзинах (Dial) по целочисленным весам
+"""
+from array import array
+from typing import List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+UNREACHABLE = -1  # Целочисленный вес недоступного ребра
+
+
+def quantize_weights(weights: array, scale: float) -> array:
+    """
+    Перевести веса в целые: round(w * scale), inf - UNREACHABLE
+
+    Args:
+        weights: Веса рёбер
+        scale: Единиц целого веса на единицу расстояния
+
+    Returns:
+        Массив целых весов той же длины
+    """
+    return array('q', [UNREACHABLE if weight == INF else int(round(weight * scale)) for weight in weights])
+
+
+def dial_search(graph: CompiledGraph, start: int, end: int, weights: array, integer_weights: array,
+                closures: Optional[ClosureOverlay] = None
+                ) -> Tuple[Optional[Tuple[List[int], float]], int, int]:
+    """
+    Кратчайший путь с очередью Dial (кольцо корзин по целому расстоянию)
+
+    Ключи целые и не убывают, поэтому очередь - кольцо из C + 1 списков
+    (C - наибольший целый вес): добавление и извлечение - операции над
+    списком без сравнений, а курсор проходит каждое расстояние один раз.
+    Путь оптимален для округлённых весов; расстояние считается по
+    исходным весам, поэтому отличается от точного не больше, чем на
+    0.5 / scale на ребро пути.
+
+    Args:
+        graph: Скомпилированный граф
+        start: Индекс стартового узла
+        end: Индекс цели
+        weights: Исходные веса (для расстояния найденного пути)
+        integer_weights: Целые веса (см. quantize_weights)
+        closures: Маска закрытий
+
+    Returns:
+        Кортеж (результат (путь, расстояние) или None, извлечено узлов,
+        добавлено записей)
+    """
+    offsets, targets = graph.offsets, graph.targets
+    edge_mask = closures.edge_mask if closures is not None else None
+    node_mask = closures.node_mask if closures is not None else None
+    ring = max(integer_weights, default=0) + 1
+    buckets: List[List[int]] = [[] for _ in range(ring)]
+
+    node_count = graph.node_count
+    distances = array('q', [-1]) * node_count
+    previous = array('i', [-1]) * node_count
+    previous_edge = array('q', [-1]) * node_count
+    settled = bytearray(node_count)
+    distances[start] = 0
+    buckets[0].append(start)
+    pending = pushed = 1
+    settled_count = 0
+    cursor = 0
+    found = False
+    while pending:
+        bucket = buckets[cursor % ring]
+        while not bucket:
+            cursor += 1
+            bucket = buckets[cursor % ring]
+        current = bucket.pop()
+        pending -= 1
+        if settled[current] or distances[current] != cursor:
+            continue  # Устаревшая запись
+        settled[current] = 1
+        settled_count += 1
+        if current == end:
+            found = True
+            break
+        for position in range(offsets[current], offsets[current + 1]):
+            weight = integer_weights[position]
+            if weight == UNREACHABLE:
+                continue  # Ребро недоступно в профиле
+            neighbor = targets[position]
+            if settled[neighbor]:
+                continue
+            if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                continue  # Закрытое ребро или узел
+            new_distance = cursor + weight
+            old_distance = distances[neighbor]
+            if old_distance == -1 or new_distance < old_distance:
+                distances[neighbor] = new_distance
+                previous[neighbor] = current
+                previous_edge[neighbor] = position
+                buckets[new_distance % ring].append(neighbor)
+                pending += 1
+                pushed += 1
+
+    if not found:
+        return None, settled_count, pushed
+    path = [end]
+    distance = 0.0
+    while path[-1] != start:
+        distance += weights[previous_edge[path[-1]]]
+        path.append(previous[path[-1]])
+    path.reverse()
+    return (path, distance), settled_count, pushed
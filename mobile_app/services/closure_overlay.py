@@ -0,0 +1,77 @@
+"""
+Маска закрытий поверх скомпилированного графа
+"""
+from typing import Iterable, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+
+class ClosureOverlay:
+    """
+    Закрытые рёбра и узлы в виде масок по индексам CompiledGraph
+
+    Граф не перестраивается: поиск пропускает рёбра с edge_mask[i] = 1
+    и узлы с node_mask[i] = 1. Закрытие ребра действует в обе стороны,
+    как и на карте.
+    """
+
+    def __init__(self, graph: CompiledGraph,
+                 closed_edges: Iterable[Tuple[str, str]] = (),
+                 closed_nodes: Iterable[str] = ()):
+        """
+        Инициализация маски
+
+        Args:
+            graph: Скомпилированный граф
+            closed_edges: Закрытые рёбра (from_id, to_id)
+            closed_nodes: ID закрытых узлов
+        """
+        self.closed_edges = frozenset((str(a), str(b)) for a, b in closed_edges)
+        self.closed_nodes = frozenset(str(node_id) for node_id in closed_nodes)
+        self.edge_mask = bytearray(graph.edge_count)
+        self.node_mask = bytearray(graph.node_count)
+
+        for from_id, to_id in self.closed_edges:
+            for source, target in ((from_id, to_id), (to_id, from_id)):
+                source_index = graph.to_index(source)
+                target_index = graph.to_index(target)
+                if source_index is None or target_index is None:
+                    continue
+                for position in range(graph.offsets[source_index], graph.offsets[source_index + 1]):
+                    if graph.targets[position] == target_index:
+                        self.edge_mask[position] = 1
+
+        for node_id in self.closed_nodes:
+            index = graph.to_index(node_id)
+            if index is not None:
+                self.node_mask[index] = 1
+
+    @property
+    def key(self) -> Tuple[frozenset, frozenset]:
+        """Версия набора закрытий (для кэшей результатов поиска)"""
+        return self.closed_edges, self.closed_nodes
+
+    def is_empty(self) -> bool:
+        """Нет ни одного закрытия"""
+        return not self.closed_edges and not self.closed_nodes
+
+    def is_node_closed(self, index: int) -> bool:
+        """Проверить закрыт ли узел по индексу"""
+        return bool(self.node_mask[index])
+
+    @classmethod
+    def from_service(cls, graph: CompiledGraph, closure_service) -> 'ClosureOverlay':
+        """
+        Построить маску по активным закрытиям RouteClosureService
+
+        Args:
+            graph: Скомпилированный граф
+            closure_service: Сервис закрытых маршрутов
+
+        Returns:
+            ClosureOverlay
+        """
+        return cls(graph, closure_service.get_closed_edges(), closure_service.get_closed_nodes())
@@ -0,0 +1,311 @@
+"""
+Расписание закрытий по времени и поиск маршрута с учётом момента прохода
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+Window = Tuple[float, float]  # [начало, конец) в секундах (timestamp), конец inf - бессрочно
+
+
+class ClosureTimeline:
+    """
+    Интервалы закрытия рёбер и узлов по индексам CompiledGraph
+
+    Закрытие действует с created_at до scheduled_until (без срока -
+    бессрочно); открытые вручную (active = False) не учитываются.
+    Интервалы одного ребра или узла объединяются и сортируются, поэтому
+    проверка момента - двоичный поиск. Закрытие ребра действует в обе
+    стороны, как и в ClosureOverlay.
+    """
+
+    def __init__(self, graph: CompiledGraph, closures: Iterable):
+        """
+        Построить расписание
+
+        Args:
+            graph: Скомпилированный граф
+            closures: Закрытия (RouteClosure), в том числе будущие и истёкшие
+        """
+        self.graph = graph
+        edge_windows: Dict[int, List[Window]] = {}
+        node_windows: Dict[int, List[Window]] = {}
+        edges: Dict[Tuple[str, str], List[Window]] = {}
+        nodes: Dict[str, List[Window]] = {}
+        for closure in closures:
+            if not closure.active:
+                continue
+            window = (closure.created_at.timestamp(),
+                      closure.scheduled_until.timestamp() if closure.scheduled_until else INF)
+            if closure.to_id is None:
+                nodes.setdefault(str(closure.from_id), []).append(window)
+            else:
+                edges.setdefault((str(closure.from_id), str(closure.to_id)), []).append(window)
+
+        for (from_id, to_id), windows in edges.items():
+            for source_id, target_id in ((from_id, to_id), (to_id, from_id)):
+                source, target = graph.to_index(source_id), graph.to_index(target_id)
+                if source is None or target is None:
+                    continue
+                for position in range(graph.offsets[source], graph.offsets[source + 1]):
+                    if graph.targets[position] == target:
+                        edge_windows.setdefault(position, []).extend(windows)
+        for node_id, windows in nodes.items():
+            index = graph.to_index(node_id)
+            if index is not None:
+                node_windows.setdefault(index, []).extend(windows)
+
+        self._edge_id_windows = {edge: _merge(windows) for edge, windows in edges.items()}
+        self._node_id_windows = {node_id: _merge(windows) for node_id, windows in nodes.items()}
+        self.edge_windows = {position: _merge(windows) for position, windows in edge_windows.items()}
+        self.node_windows = {index: _merge(windows) for index, windows in node_windows.items()}
+        self.change_times = sorted({
+            moment
+            for windows in (*self.edge_windows.values(), *self.node_windows.values())
+            for window in windows for moment in window if moment != INF
+        })
+        self.last_settled = 0
+        self.last_pushed = 0
+        logger.info(f"Closure timeline: {len(self.edge_windows)} edges, {len(self.node_windows)} nodes, "
+                    f"{len(self.change_times)} change points")
+
+    @classmethod
+    def from_service(cls, graph: CompiledGraph, closure_service) -> 'ClosureTimeline':
+        """Расписание по всем закрытиям RouteClosureService"""
+        return cls(graph, closure_service.closures.values())
+
+    def is_node_closed(self, index: int, moment: float) -> bool:
+        """Закрыт ли узел в момент moment (timestamp)"""
+        return _window_end(self.node_windows.get(index), moment) is not None
+
+    def next_open(self, position: int, target: int, moment: float) -> float:
+        """
+        Первый момент не раньше moment, когда ребро и его конец открыты
+
+        Returns:
+            Момент (timestamp) или inf, если ребро больше не откроется
+        """
+        edge = self.edge_windows.get(position)
+        node = self.node_windows.get(target)
+        while True:
+            end = _window_end(edge, moment)
+            if end is None:
+                end = _window_end(node, moment)
+            if end is None:
+                return moment
+            if end == INF:
+                return INF
+            moment = end
+
+    def overlay_at(self, moment: datetime) -> ClosureOverlay:
+        """Снимок закрытий в момент moment (для обычного поиска)"""
+        timestamp = moment.timestamp()
+        return ClosureOverlay(
+            self.graph,
+            [edge for edge, windows in self._edge_id_windows.items()
+             if _window_end(windows, timestamp) is not None],
+            [node_id for node_id, windows in self._node_id_windows.items()
+             if _window_end(windows, timestamp) is not None]
+        )
+
+    def search(self, start: int, end: int, departure: float, weights: array,
+               seconds_per_unit: float, max_wait: float = INF) -> Optional[Tuple[List[int], float, float]]:
+        """
+        Маршрут с самым ранним прибытием при выходе в момент departure
+
+        Dijkstra по времени прибытия: ребро проверяется в момент, когда
+        пешеход до него дойдёт. Если ребро или следующий узел закрыты,
+        можно подождать их открытия. Время прохода ребра не зависит от
+        момента, поэтому без ограничения ожидания раньше прийти в узел
+        никогда не хуже (FIFO), и достаточно одного времени на узел.
+
+        С ограничением max_wait FIFO не выполняется: из раннего прибытия
+        ожидание может не уложиться в предел, а из позднего - уложиться.
+        Тогда поиск ведёт множества достижимых моментов прибытия (см.
+        _search_bounded_wait) и тоже точен.
+
+        Args:
+            start: Индекс стартового узла
+            end: Индекс цели
+            departure: Момент выхода (timestamp)
+            weights: Веса рёбер (профиль)
+            seconds_per_unit: Секунд на единицу расстояния
+            max_wait: Максимальное ожидание на одном узле, секунд
+
+        Returns:
+            Кортеж (путь как список индексов, расстояние, момент прибытия)
+            или None, если дойти нельзя
+        """
+        graph = self.graph
+        offsets, targets = graph.offsets, graph.targets
+        self.last_settled = self.last_pushed = 0
+        if self.is_node_closed(start, departure):
+            return None
+        if max_wait != INF:
+            return self._search_bounded_wait(start, end, departure, weights, seconds_per_unit, max_wait)
+
+        arrival = array('d', [INF] * graph.node_count)
+        distances = array('d', [INF] * graph.node_count)
+        previous = array('i', [-1] * graph.node_count)
+        arrival[start] = departure
+        distances[start] = 0.0
+        heap = [(departure, start)]
+        self.last_pushed = 1
+        while heap:
+            moment, current = heapq.heappop(heap)
+            if moment > arrival[current]:
+                continue  # Устаревшая запись
+            self.last_settled += 1
+            if current == end:
+                break
+            for position in range(offsets[current], offsets[current + 1]):
+                weight = weights[position]
+                if weight == INF:
+                    continue  # Ребро недоступно в профиле
+                neighbor = targets[position]
+                leave = self.next_open(position, neighbor, moment)
+                if leave - moment > max_wait:
+                    continue  # Закрыто дольше допустимого ожидания
+                new_arrival = leave + weight * seconds_per_unit
+                if new_arrival < arrival[neighbor]:
+                    arrival[neighbor] = new_arrival
+                    distances[neighbor] = distances[current] + weight
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_arrival, neighbor))
+                    self.last_pushed += 1
+
+        if arrival[end] == INF:
+            return None
+        path = [end]
+        while path[-1] != start:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path, distances[end], arrival[end]
+
+    def _search_bounded_wait(self, start: int, end: int, departure: float, weights: array,
+                             seconds_per_unit: float, max_wait: float) -> Optional[Tuple[List[int], float, float]]:
+        """
+        Поиск с ограничением ожидания по интервалам моментов прибытия
+
+        Метка - интервал [lo, hi] моментов, в которые можно оказаться в
+        узле. Из неё выйти можно в любой момент [lo, hi + max_wait], когда
+        ребро и его конец открыты, поэтому по ребру получаются интервалы
+        прибытия у соседа; уже известная часть вычитается. Метки
+        извлекаются по lo, первая метка цели даёт самое раннее прибытие.
+        После последней смены закрытий граф не меняется, и раньше прийти
+        не хуже, поэтому интервал, дошедший до этого момента, продлевается
+        до бесконечности - так поиск конечен.
+        """
+        graph = self.graph
+        offsets, targets = graph.offsets, graph.targets
+        horizon = self.change_times[-1] if self.change_times else -INF
+        reached: Dict[int, List[Window]] = {}
+        # Метки: (lo, hi, узел, родительская метка, расстояние)
+        labels: List[Tuple[float, float, int, int, float]] = []
+
+        def add(lo: float, hi: float, node: int, parent: int, distance: float):
+            if hi >= horizon:
+                hi = INF
+            for piece in _subtract(reached.get(node, []), lo, hi):
+                reached[node] = _merge(reached.get(node, []) + [piece])
+                labels.append((piece[0], piece[1], node, parent, distance))
+                heapq.heappush(heap, (piece[0], len(labels) - 1))
+                self.last_pushed += 1
+
+        heap: List[Tuple[float, int]] = []
+        add(departure, departure, start, -1, 0.0)
+        found = -1
+        while heap:
+            _, label = heapq.heappop(heap)
+            lo, hi, current, _, distance = labels[label]
+            self.last_settled += 1
+            if current == end:
+                found = label
+                break
+            latest = hi + max_wait
+            for position in range(offsets[current], offsets[current + 1]):
+                weight = weights[position]
+                if weight == INF:
+                    continue  # Ребро недоступно в профиле
+                neighbor = targets[position]
+                travel = weight * seconds_per_unit
+                for leave_lo, leave_hi in self._open_windows(position, neighbor, lo, latest):
+                    add(leave_lo + travel, leave_hi + travel, neighbor, label, distance + weight)
+
+        if found == -1:
+            return None
+        arrival, _, _, _, distance = labels[found]
+        path = []
+        while found != -1:
+            path.append(labels[found][2])
+            found = labels[found][3]
+        path.reverse()
+        return path, distance, arrival
+
+    def _open_windows(self, position: int, target: int, begin: float, end: float) -> List[Window]:
+        """Интервалы внутри [begin, end], когда ребро и его конец открыты"""
+        pieces = []
+        moment = begin
+        for window_begin, window_end in _merge(self.edge_windows.get(position, []) +
+                                               self.node_windows.get(target, [])):
+            if window_end <= moment:
+                continue  # Закрытие [начало, конец) уже кончилось
+            if window_begin > end:
+                break
+            if moment < window_begin:
+                # Последний момент до начала закрытия
+                pieces.append((moment, math.nextafter(window_begin, -INF)))
+            moment = max(moment, window_end)
+            if moment > end:
+                return pieces
+        pieces.append((moment, end))
+        return pieces
+
+
+def _subtract(windows: List[Window], begin: float, end: float) -> List[Window]:
+    """Части [begin, end], не покрытые отсортированными непересекающимися интервалами"""
+    pieces = []
+    for window_begin, window_end in windows:
+        if window_end < begin:
+            continue
+        if window_begin > end:
+            break
+        if begin < window_begin:
+            pieces.append((begin, window_begin))
+        if window_end >= end:
+            return pieces
+        begin = max(begin, window_end)
+    pieces.append((begin, end))
+    return pieces
+
+
+def _merge(windows: List[Window]) -> List[Window]:
+    """Объединить пересекающиеся интервалы и отсортировать по началу"""
+    merged: List[Window] = []
+    for begin, end in sorted(windows):
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def _window_end(windows: Optional[List[Window]], moment: float) -> Optional[float]:
+    """Конец интервала, содержащего moment (None - в этот момент открыто)"""
+    if not windows:
+        return None
+    slot = bisect_right(windows, (moment, INF)) - 1
+    if slot >= 0 and windows[slot][0] <= moment < windows[slot][1]:
+        return windows[slot][1]
+    return None
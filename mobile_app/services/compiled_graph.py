@@ -0,0 +1,424 @@
+"""
+Компактное представление графа (CSR) с целочисленными индексами узлов
+"""
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from .graph_builder import GraphBuilder, GraphEdge
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен на устройстве
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledGraph:
+    """
+    Граф в формате CSR (compressed sparse row)
+
+    Узлы пронумерованы плотными индексами 0..N-1. Рёбра узла i лежат
+    в targets/weights на позициях offsets[i]..offsets[i+1]-1, позиция
+    ребра в этих буферах является его индексом.
+    """
+
+    PRIORITY_QUEUES = ('binary', 'buckets')  # Очередь Dijkstra: бинарная куча или корзины Dial
+    WEIGHT_SCALE = 1.0  # Целых единиц веса на единицу расстояния для очереди 'buckets'
+
+    def __init__(self, node_ids: List[str], offsets: array, targets: array, weights: array):
+        """
+        Инициализация графа из готовых буферов
+
+        Args:
+            node_ids: Строковые ID узлов по индексу
+            offsets: Смещения рёбер узлов (длина N+1)
+            targets: Индексы концов рёбер
+            weights: Веса рёбер
+        """
+        self.node_ids = node_ids
+        self.index_of: Dict[str, int] = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        # Координаты и этажи узлов (заполняются при сборке из узлов)
+        self.xs: Optional[array] = None
+        self.ys: Optional[array] = None
+        self.floors: Optional[array] = None
+        self.node_types: Optional[List[str]] = None  # Room, Corridor, Staircase, Elevator, ...
+        self.stair_nodes: Optional[bytearray] = None  # 1 - лестница (см. GraphBuilder.is_stair_node)
+        # Таблицы ориентиров ALT (LandmarkTable), хранятся вместе с графом
+        self.landmarks = None
+        self._profile_weights: Dict[str, array] = {}
+        # Очередь приоритетов Dijkstra (см. use_priority_queue)
+        self.priority_queue = 'binary'
+        self.weight_scale = self.WEIGHT_SCALE
+        self._integer_weights: Dict[str, array] = {}
+        self._components = None  # ComponentIndex без закрытий
+        self._reverse: Optional[Tuple[array, array, array]] = None
+
+    @classmethod
+    def from_edges(cls, edges: List[GraphEdge],
+                   node_ids: Optional[Iterable[str]] = None) -> 'CompiledGraph':
+        """
+        Скомпилировать граф из списка рёбер
+
+        Args:
+            edges: Список рёбер графа
+            node_ids: ID узлов графа (по умолчанию - все концы рёбер)
+
+        Returns:
+            CompiledGraph
+        """
+        if node_ids is None:
+            ids = []
+            for edge in edges:
+                ids.append(edge.from_id)
+                ids.append(edge.to_id)
+        else:
+            ids = [str(node_id) for node_id in node_ids]
+        # Порядок узлов - порядок первого появления
+        ordered_ids = list(dict.fromkeys(ids))
+        index_of = {node_id: i for i, node_id in enumerate(ordered_ids)}
+
+        sources = []
+        targets = []
+        weights = []
+        for edge in edges:
+            source = index_of.get(edge.from_id)
+            target = index_of.get(edge.to_id)
+            if source is None or target is None:
+                continue
+            sources.append(source)
+            targets.append(target)
+            weights.append(edge.weight)
+
+        return cls.from_arrays(ordered_ids, sources, targets, weights)
+
+    @classmethod
+    def from_arrays(cls, node_ids: List[str], sources: Iterable[int],
+                    targets: Iterable[int], weights: Iterable[float]) -> 'CompiledGraph':
+        """
+        Скомпилировать граф из параллельных массивов рёбер (индексы узлов)
+
+        Args:
+            node_ids: Строковые ID узлов по индексу
+            sources: Индексы начал рёбер
+            targets: Индексы концов рёбер
+            weights: Веса рёбер
+
+        Returns:
+            CompiledGraph
+        """
+        node_count = len(node_ids)
+        if np is not None and isinstance(sources, np.ndarray):
+            return cls._from_numpy_arrays(node_ids, sources, targets, weights)
+
+        sources = list(sources)
+        targets = list(targets)
+        weights = list(weights)
+
+        # Подсчёт степеней и префиксные суммы
+        offsets = array('q', [0] * (node_count + 1))
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        # Раскладка рёбер по строкам
+        cursor = array('q', offsets[:node_count])
+        csr_targets = array('i', [0] * len(sources))
+        csr_weights = array('d', [0.0] * len(sources))
+        for source, target, weight in zip(sources, targets, weights):
+            position = cursor[source]
+            csr_targets[position] = target
+            csr_weights[position] = weight
+            cursor[source] += 1
+
+        logger.info(f"Compiled graph: {node_count} nodes, {len(sources)} edges")
+        return cls(list(node_ids), offsets, csr_targets, csr_weights)
+
+    @classmethod
+    def _from_numpy_arrays(cls, node_ids: List[str], sources: 'np.ndarray',
+                           targets: 'np.ndarray', weights: 'np.ndarray') -> 'CompiledGraph':
+        """Компиляция из массивов NumPy без поэлементного цикла"""
+        node_count = len(node_ids)
+        ordering = np.argsort(sources, kind='stable')
+        degrees = np.bincount(sources, minlength=node_count)
+
+        offsets = array('q')
+        offsets.frombytes(np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64).tobytes())
+        csr_targets = array('i')
+        csr_targets.frombytes(np.asarray(targets)[ordering].astype(np.int32).tobytes())
+        csr_weights = array('d')
+        csr_weights.frombytes(np.asarray(weights)[ordering].astype(np.float64).tobytes())
+
+        logger.info(f"Compiled graph: {node_count} nodes, {len(sources)} edges")
+        return cls(list(node_ids), offsets, csr_targets, csr_weights)
+
+    @classmethod
+    def from_nodes(cls, nodes: List[dict], vectorized: bool = False,
+                   sparsify_epsilon: Optional[float] = None,
+                   priority_queue: str = 'binary') -> 'CompiledGraph':
+        """
+        Построить и скомпилировать граф из списка узлов
+
+        Args:
+            nodes: Список узлов с координатами
+            vectorized: Строить рёбра массивами NumPy (для больших импортов)
+            sparsify_epsilon: Удалить рёбра, которые не короче обходов с
+                таким допуском (см. sparsify_graph); None - не прореживать
+            priority_queue: Очередь Dijkstra (см. use_priority_queue)
+
+        Returns:
+            CompiledGraph
+        """
+        if vectorized:
+            graph = cls.from_arrays(*GraphBuilder.build_edge_arrays(nodes))
+        else:
+            edges = GraphBuilder.build_edges_from_nodes(nodes)
+            graph = cls.from_edges(edges, [str(node['Id']) for node in nodes])
+        graph.attach_nodes(nodes)
+        if sparsify_epsilon is not None:
+            from .sparsify import sparsify_graph
+            graph, _ = sparsify_graph(graph, sparsify_epsilon)
+        graph.use_priority_queue(priority_queue)
+        return graph
+
+    def attach_nodes(self, nodes: List[dict]):
+        """
+        Сохранить координаты, этажи и типы узлов (нужны для эвристик A*
+        и поиска ближайших объектов)
+
+        Args:
+            nodes: Список узлов с координатами
+        """
+        xs = array('d', [0.0] * self.node_count)
+        ys = array('d', [0.0] * self.node_count)
+        floors = array('i', [1] * self.node_count)
+        node_types = [''] * self.node_count
+        stair_nodes = bytearray(self.node_count)
+        seen = bytearray(self.node_count)
+        for node in nodes:
+            index = self.index_of.get(str(node['Id']))
+            if index is None or seen[index]:
+                continue
+            seen[index] = 1
+            xs[index] = node['X']
+            ys[index] = node['Y']
+            floors[index] = int(node.get('Floor', 1))
+            node_types[index] = node.get('Type', '')
+            stair_nodes[index] = GraphBuilder.is_stair_node(node)
+        self.xs = xs
+        self.ys = ys
+        self.floors = floors
+        self.node_types = node_types
+        self.stair_nodes = stair_nodes
+
+    @property
+    def has_coordinates(self) -> bool:
+        """Известны ли координаты узлов"""
+        return self.xs is not None
+
+    @property
+    def node_count(self) -> int:
+        """Количество узлов"""
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        """Количество направленных рёбер"""
+        return len(self.targets)
+
+    def has_node(self, node_id: str) -> bool:
+        """Проверить есть ли узел в графе"""
+        return node_id in self.index_of
+
+    def to_index(self, node_id: str) -> Optional[int]:
+        """Получить индекс узла по ID"""
+        return self.index_of.get(node_id)
+
+    def to_id(self, index: int) -> str:
+        """Получить ID узла по индексу"""
+        return self.node_ids[index]
+
+    def neighbors(self, index: int) -> Iterator[Tuple[int, float]]:
+        """Соседи узла в виде (индекс, вес)"""
+        for position in range(self.offsets[index], self.offsets[index + 1]):
+            yield self.targets[position], self.weights[position]
+
+    def profile_weights(self, profile: str = 'default') -> array:
+        """
+        Веса рёбер для профиля маршрутизации (см. routing_profiles)
+
+        Массив строится один раз на профиль, топология CSR общая.
+        """
+        if profile == 'default':
+            return self.weights
+        weights = self._profile_weights.get(profile)
+        if weights is None:
+            from .routing_profiles import build_profile_weights
+            weights = build_profile_weights(self, profile)
+            self._profile_weights[profile] = weights
+        return weights
+
+    def use_priority_queue(self, priority_queue: str, weight_scale: Optional[float] = None):
+        """
+        Выбрать очередь приоритетов для Dijkstra
+
+        'buckets' - корзины Dial по весам, округлённым до 1 / weight_scale
+        (см. bucket_queue): без сравнений в куче, расстояние найденного
+        пути отличается от точного не больше чем на 0.5 / weight_scale на
+        ребро. Целые веса считаются сразу для весов по умолчанию.
+
+        Args:
+            priority_queue: 'binary' или 'buckets'
+            weight_scale: Целых единиц на единицу расстояния
+        """
+        if priority_queue not in self.PRIORITY_QUEUES:
+            raise ValueError(f"Unknown priority queue: {priority_queue}")
+        scale = weight_scale or self.WEIGHT_SCALE
+        if scale != self.weight_scale:
+            self._integer_weights.clear()
+        self.priority_queue = priority_queue
+        self.weight_scale = scale
+        if priority_queue == 'buckets':
+            self.integer_weights()
+
+    def integer_weights(self, profile: str = 'default') -> array:
+        """Веса профиля, округлённые до целых (строятся один раз на профиль)"""
+        weights = self._integer_weights.get(profile)
+        if weights is None:
+            from .bucket_queue import quantize_weights
+            weights = quantize_weights(self.profile_weights(profile), self.weight_scale)
+            self._integer_weights[profile] = weights
+        return weights
+
+    def component_index(self):
+        """
+        Компоненты связности без закрытий (см. ComponentIndex)
+
+        Строятся один раз на граф.
+        """
+        if self._components is None:
+            from .components import ComponentIndex
+            self._components = ComponentIndex.build(self)
+        return self._components
+
+    def reverse_csr(self) -> Tuple[array, array, array]:
+        """
+        Обратный CSR (входящие рёбра), строится один раз
+
+        Returns:
+            Кортеж (offsets, sources, positions): входящие рёбра узла i лежат
+            на позициях offsets[i]..offsets[i+1]-1, positions - индекс того же
+            ребра в прямых буферах (для веса и маски закрытий)
+        """
+        if self._reverse is not None:
+            return self._reverse
+
+        node_count = self.node_count
+        offsets = array('q', [0] * (node_count + 1))
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        cursor = array('q', offsets[:node_count])
+        sources = array('i', [0] * self.edge_count)
+        positions = array('q', [0] * self.edge_count)
+        for source in range(node_count):
+            for position in range(self.offsets[source], self.offsets[source + 1]):
+                target = self.targets[position]
+                slot = cursor[target]
+                sources[slot] = source
+                positions[slot] = position
+                cursor[target] += 1
+
+        self._reverse = (offsets, sources, positions)
+        return self._reverse
+
+    def edge_index(self, from_id: str, to_id: str) -> Optional[int]:
+        """
+        Найти индекс ребра по ID концов
+
+        Returns:
+            Позицию ребра в CSR-буферах или None
+        """
+        source = self.index_of.get(from_id)
+        target = self.index_of.get(to_id)
+        if source is None or target is None:
+            return None
+        for position in range(self.offsets[source], self.offsets[source + 1]):
+            if self.targets[position] == target:
+                return position
+        return None
+
+    def iter_edges(self) -> Iterator[GraphEdge]:
+        """Перебрать рёбра в виде GraphEdge (для совместимости)"""
+        for source in range(self.node_count):
+            from_id = self.node_ids[source]
+            for position in range(self.offsets[source], self.offsets[source + 1]):
+                yield GraphEdge(
+                    from_id=from_id,
+                    to_id=self.node_ids[self.targets[position]],
+                    weight=self.weights[position]
+                )
+
+    def to_dict(self) -> dict:
+        """Сериализовать граф (для CacheService)"""
+        data = {
+            'node_ids': list(self.node_ids),
+            'offsets': self.offsets.tolist(),
+            'targets': self.targets.tolist(),
+            'weights': self.weights.tolist(),
+        }
+        if self.has_coordinates:
+            data['xs'] = self.xs.tolist()
+            data['ys'] = self.ys.tolist()
+            data['floors'] = self.floors.tolist()
+        if self.node_types is not None:
+            data['types'] = list(self.node_types)
+        if self.stair_nodes is not None:
+            data['stairs'] = list(self.stair_nodes)
+        if self.landmarks is not None:
+            data['landmarks'] = self.landmarks.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompiledGraph':
+        """Восстановить граф из словаря"""
+        graph = cls(
+            list(data['node_ids']),
+            array('q', data['offsets']),
+            array('i', data['targets']),
+            array('d', data['weights']),
+        )
+        if 'xs' in data:
+            graph.xs = array('d', data['xs'])
+            graph.ys = array('d', data['ys'])
+            graph.floors = array('i', data['floors'])
+        if 'types' in data:
+            graph.node_types = list(data['types'])
+        if 'stairs' in data:
+            graph.stair_nodes = bytearray(data['stairs'])
+        if 'landmarks' in data:
+            from .landmarks import LandmarkTable
+            graph.landmarks = LandmarkTable.from_dict(data['landmarks'])
+        return graph
+
+    def to_numpy(self) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Получить буферы как массивы NumPy (без копирования)
+
+        Returns:
+            Кортеж (offsets, targets, weights)
+        """
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return (
+            np.frombuffer(self.offsets, dtype=np.int64),
+            np.frombuffer(self.targets, dtype=np.int32),
+            np.frombuffer(self.weights, dtype=np.float64),
+        )
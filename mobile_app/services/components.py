@@ -0,0 +1,106 @@
+"""
+Компоненты связности графа (мгновенный отказ для невозможных маршрутов)
+"""
+from array import array
+from typing import List, Optional
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+
+class ComponentIndex:
+    """
+    Метки компонент связности по индексам узлов
+
+    Строится системой непересекающихся множеств (union-find) по открытым
+    рёбрам без учёта направления. Разные метки - пути точно нет; для
+    ориентированных графов одинаковая метка путь не гарантирует.
+    Закрытые узлы получают метку -1.
+    """
+
+    def __init__(self, labels: array, sizes: List[int]):
+        """
+        Инициализация из готовых меток
+
+        Args:
+            labels: Метка компоненты для каждого узла (-1 - узел закрыт)
+            sizes: Размер каждой компоненты
+        """
+        self.labels = labels
+        self.sizes = sizes
+
+    @property
+    def count(self) -> int:
+        """Количество компонент"""
+        return len(self.sizes)
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, closures: Optional[ClosureOverlay] = None,
+              weights: Optional[array] = None) -> 'ComponentIndex':
+        """
+        Разметить компоненты графа с учётом закрытий
+
+        Args:
+            graph: Скомпилированный граф
+            closures: Маска закрытий (опционально)
+            weights: Веса профиля; рёбра с бесконечным весом не связывают
+
+        Returns:
+            ComponentIndex
+        """
+        node_count = graph.node_count
+        offsets, targets = graph.offsets, graph.targets
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        parent = list(range(node_count))
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]  # Сжатие пути делением пополам
+                node = parent[node]
+            return node
+
+        for source in range(node_count):
+            if node_mask is not None and node_mask[source]:
+                continue
+            for position in range(offsets[source], offsets[source + 1]):
+                target = targets[position]
+                if edge_mask is not None and (edge_mask[position] or node_mask[target]):
+                    continue  # Закрытое ребро или узел
+                if weights is not None and weights[position] == INF:
+                    continue  # Ребро недоступно в профиле
+                root_a, root_b = find(source), find(target)
+                if root_a != root_b:
+                    parent[root_a] = root_b
+
+        labels = array('i', [-1] * node_count)
+        label_of_root = {}
+        sizes: List[int] = []
+        for node in range(node_count):
+            if node_mask is not None and node_mask[node]:
+                continue
+            root = find(node)
+            label = label_of_root.get(root)
+            if label is None:
+                label = label_of_root[root] = len(sizes)
+                sizes.append(0)
+            labels[node] = label
+            sizes[label] += 1
+
+        logger.info(f"Components: {len(sizes)} for {node_count} nodes")
+        return cls(labels, sizes)
+
+    def connected(self, a: int, b: int) -> bool:
+        """Узлы в одной компоненте (и оба открыты)"""
+        label = self.labels[a]
+        return label != -1 and label == self.labels[b]
+
+    def component_size(self, index: int) -> int:
+        """Размер компоненты узла (0 - узел закрыт)"""
+        label = self.labels[index]
+        return self.sizes[label] if label != -1 else 0
@@ -0,0 +1,328 @@
+"""
+Contraction Hierarchies (CH) для быстрых запросов на больших графах
+"""
+import heapq
+from array import array
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+
+class ContractionHierarchy:
+    """
+    Предобработанный граф: ранги узлов и рёбра вверх по иерархии
+
+    Узлы стягиваются по очереди (порядок - разность рёбер с ленивым
+    пересчётом), при стягивании v добавляются ярлыки u->w через v, если
+    нет свидетельского пути не длиннее. Запрос - двунаправленный Dijkstra,
+    где оба фронта идут только к узлам с большим рангом.
+
+    Хранение в CSR: up_* - рёбра u->w с rank[w] > rank[u] (прямой фронт),
+    down_* - рёбра w->u с rank[w] > rank[u], записанные у u (обратный
+    фронт). middle - узел, через который проходит ярлык, или -1.
+    """
+
+    WITNESS_SETTLE_LIMIT = 60  # Сколько узлов раскрывать в свидетельском поиске
+
+    def __init__(self, node_ids: List[str], rank: array,
+                 up: Tuple[array, array, array, array],
+                 down: Tuple[array, array, array, array]):
+        """
+        Инициализация из готовых буферов
+
+        Args:
+            node_ids: Строковые ID узлов по индексу (как в CompiledGraph)
+            rank: Ранг (порядок стягивания) каждого узла
+            up: (offsets, targets, weights, middle) рёбер вверх
+            down: (offsets, sources, weights, middle) рёбер вниз
+        """
+        self.node_ids = node_ids
+        self.rank = rank
+        self.up_offsets, self.up_targets, self.up_weights, self.up_middle = up
+        self.down_offsets, self.down_sources, self.down_weights, self.down_middle = down
+        self.last_settled = 0
+        self._middle_of: Optional[Dict[Tuple[int, int], int]] = None
+
+    @property
+    def shortcut_count(self) -> int:
+        """Количество добавленных ярлыков"""
+        return sum(1 for m in self.up_middle if m != -1) + sum(1 for m in self.down_middle if m != -1)
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, witness_settle_limit: Optional[int] = None) -> 'ContractionHierarchy':
+        """
+        Предобработать граф
+
+        Args:
+            graph: Скомпилированный граф
+            witness_settle_limit: Ограничение свидетельского поиска
+
+        Returns:
+            ContractionHierarchy
+        """
+        limit = witness_settle_limit or cls.WITNESS_SETTLE_LIMIT
+        node_count = graph.node_count
+
+        # Динамические списки смежности: сосед -> (вес, middle)
+        outgoing: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(node_count)]
+        incoming: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(node_count)]
+        for source in range(node_count):
+            for position in range(graph.offsets[source], graph.offsets[source + 1]):
+                target = graph.targets[position]
+                weight = graph.weights[position]
+                if target == source:
+                    continue
+                if weight < outgoing[source].get(target, (float('inf'), -1))[0]:
+                    outgoing[source][target] = (weight, -1)
+                    incoming[target][source] = (weight, -1)
+
+        # Все рёбра, когда-либо существовавшие между нестянутыми узлами
+        all_edges: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        for source in range(node_count):
+            for target, value in outgoing[source].items():
+                all_edges[(source, target)] = value
+
+        contracted = bytearray(node_count)
+        deleted_neighbors = [0] * node_count
+
+        def witness_distances(source: int, skip: int, max_distance: float,
+                              targets: set) -> Dict[int, float]:
+            """Ограниченный Dijkstra от source без узла skip"""
+            distances = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            remaining = set(targets)
+            while heap and settled < limit and remaining:
+                distance, current = heapq.heappop(heap)
+                if distance > distances.get(current, float('inf')):
+                    continue
+                if distance > max_distance:
+                    break
+                settled += 1
+                remaining.discard(current)
+                for neighbor, (weight, _) in outgoing[current].items():
+                    if neighbor == skip or contracted[neighbor]:
+                        continue
+                    new_distance = distance + weight
+                    if new_distance < distances.get(neighbor, float('inf')):
+                        distances[neighbor] = new_distance
+                        heapq.heappush(heap, (new_distance, neighbor))
+            return distances
+
+        def shortcuts_for(node: int) -> List[Tuple[int, int, float]]:
+            """Ярлыки, необходимые при стягивании node"""
+            shortcuts = []
+            out_items = [(w, value[0]) for w, value in outgoing[node].items() if not contracted[w]]
+            if not out_items:
+                return shortcuts
+            for source, (in_weight, _) in incoming[node].items():
+                if contracted[source]:
+                    continue
+                candidates = {w: in_weight + out_weight for w, out_weight in out_items if w != source}
+                if not candidates:
+                    continue
+                witnesses = witness_distances(source, node, max(candidates.values()), set(candidates))
+                for target, via in candidates.items():
+                    if witnesses.get(target, float('inf')) > via:
+                        shortcuts.append((source, target, via))
+            return shortcuts
+
+        def priority(node: int) -> int:
+            """Разность рёбер + число уже стянутых соседей"""
+            degree = sum(1 for n in incoming[node] if not contracted[n]) + \
+                sum(1 for n in outgoing[node] if not contracted[n])
+            return len(shortcuts_for(node)) - degree + deleted_neighbors[node]
+
+        heap = [(priority(node), node) for node in range(node_count)]
+        heapq.heapify(heap)
+        rank = array('i', [0] * node_count)
+        order = 0
+        while heap:
+            _, node = heapq.heappop(heap)
+            if contracted[node]:
+                continue
+            # Ленивое обновление: пересчитать и вернуть, если уже не минимум
+            current = priority(node)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, node))
+                continue
+
+            for source, target, weight in shortcuts_for(node):
+                if weight < outgoing[source].get(target, (float('inf'), -1))[0]:
+                    outgoing[source][target] = (weight, node)
+                    incoming[target][source] = (weight, node)
+                    all_edges[(source, target)] = (weight, node)
+
+            contracted[node] = 1
+            rank[node] = order
+            order += 1
+            for neighbor in set(outgoing[node]) | set(incoming[node]):
+                if not contracted[neighbor]:
+                    deleted_neighbors[neighbor] += 1
+
+        hierarchy = cls(list(graph.node_ids), rank, *cls._split_edges(node_count, rank, all_edges))
+        logger.info(f"Contraction hierarchy: {node_count} nodes, {hierarchy.shortcut_count} shortcuts")
+        return hierarchy
+
+    @staticmethod
+    def _split_edges(node_count: int, rank: array,
+                     all_edges: Dict[Tuple[int, int], Tuple[float, int]]):
+        """Разложить рёбра на CSR вверх и вниз по рангу"""
+        up_lists: List[List[Tuple[int, float, int]]] = [[] for _ in range(node_count)]
+        down_lists: List[List[Tuple[int, float, int]]] = [[] for _ in range(node_count)]
+        for (source, target), (weight, middle) in all_edges.items():
+            if rank[target] > rank[source]:
+                up_lists[source].append((target, weight, middle))
+            else:
+                down_lists[target].append((source, weight, middle))
+
+        def to_csr(lists):
+            offsets = array('q', [0])
+            neighbors = array('i')
+            weights = array('d')
+            middles = array('i')
+            for items in lists:
+                for neighbor, weight, middle in items:
+                    neighbors.append(neighbor)
+                    weights.append(weight)
+                    middles.append(middle)
+                offsets.append(len(neighbors))
+            return offsets, neighbors, weights, middles
+
+        return to_csr(up_lists), to_csr(down_lists)
+
+    def query(self, start: int, end: int) -> Optional[Tuple[List[int], float]]:
+        """
+        Найти кратчайший путь (двунаправленный поиск вверх по иерархии)
+
+        Args:
+            start: Индекс стартового узла
+            end: Индекс конечного узла
+
+        Returns:
+            Кортеж (путь как список индексов, расстояние) или None
+        """
+        if start == end:
+            return [start], 0.0
+
+        forward = {start: 0.0}
+        backward = {end: 0.0}
+        forward_parent = {start: -1}
+        backward_parent = {end: -1}
+        forward_heap = [(0.0, start)]
+        backward_heap = [(0.0, end)]
+        best = float('inf')
+        meeting = -1
+        settled = 0
+
+        # Для каждого фронта: рёбра вверх для релаксации и рёбра, входящие
+        # сверху, для stall-on-demand (узел не раскрывается, если до него
+        # уже есть более короткий путь через узел с большим рангом)
+        sides = (
+            (forward_heap, forward, forward_parent, backward,
+             self.up_offsets, self.up_targets, self.up_weights,
+             self.down_offsets, self.down_sources, self.down_weights),
+            (backward_heap, backward, backward_parent, forward,
+             self.down_offsets, self.down_sources, self.down_weights,
+             self.up_offsets, self.up_targets, self.up_weights),
+        )
+        while forward_heap or backward_heap:
+            for (heap, distances, parents, other, offsets, neighbors, weights,
+                 stall_offsets, stall_neighbors, stall_weights) in sides:
+                if not heap:
+                    continue
+                distance, current = heapq.heappop(heap)
+                if distance > distances[current]:
+                    continue  # Устаревшая запись
+                if distance >= best:
+                    heap.clear()  # Этот фронт уже не улучшит ответ
+                    continue
+                settled += 1
+                if current in other and distance + other[current] < best:
+                    best = distance + other[current]
+                    meeting = current
+
+                stalled = False
+                for slot in range(stall_offsets[current], stall_offsets[current + 1]):
+                    higher = stall_neighbors[slot]
+                    if higher in distances and distances[higher] + stall_weights[slot] < distance:
+                        stalled = True
+                        break
+                if stalled:
+                    continue
+
+                for slot in range(offsets[current], offsets[current + 1]):
+                    neighbor = neighbors[slot]
+                    new_distance = distance + weights[slot]
+                    if new_distance < distances.get(neighbor, float('inf')):
+                        distances[neighbor] = new_distance
+                        parents[neighbor] = current
+                        heapq.heappush(heap, (new_distance, neighbor))
+
+        self.last_settled = settled
+        if meeting == -1:
+            return None
+
+        # Путь в иерархии (с ярлыками) и его распаковка
+        packed = []
+        node = meeting
+        while node != -1:
+            packed.append(node)
+            node = forward_parent[node]
+        packed.reverse()
+        node = backward_parent[meeting]
+        while node != -1:
+            packed.append(node)
+            node = backward_parent[node]
+
+        path = [packed[0]]
+        for source, target in zip(packed, packed[1:]):
+            path.extend(self._unpack(source, target)[1:])
+        return path, best
+
+    def _unpack(self, source: int, target: int) -> List[int]:
+        """Распаковать ярлык source->target в исходные рёбра"""
+        if self._middle_of is None:
+            middle_of = {}
+            for node in range(len(self.node_ids)):
+                for slot in range(self.up_offsets[node], self.up_offsets[node + 1]):
+                    middle_of[(node, self.up_targets[slot])] = self.up_middle[slot]
+                for slot in range(self.down_offsets[node], self.down_offsets[node + 1]):
+                    middle_of[(self.down_sources[slot], node)] = self.down_middle[slot]
+            self._middle_of = middle_of
+
+        path = [source]
+        stack = [(source, target)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle_of.get((a, b), -1)
+            if middle == -1:
+                path.append(b)
+            else:
+                # Сначала a->middle, затем middle->b
+                stack.append((middle, b))
+                stack.append((a, middle))
+        return path
+
+    def to_dict(self) -> dict:
+        """Сериализовать иерархию (для загрузки на устройства)"""
+        return {
+            'node_ids': list(self.node_ids),
+            'rank': self.rank.tolist(),
+            'up': [self.up_offsets.tolist(), self.up_targets.tolist(),
+                   self.up_weights.tolist(), self.up_middle.tolist()],
+            'down': [self.down_offsets.tolist(), self.down_sources.tolist(),
+                     self.down_weights.tolist(), self.down_middle.tolist()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ContractionHierarchy':
+        """Восстановить иерархию из словаря"""
+        def csr(parts):
+            offsets, neighbors, weights, middles = parts
+            return array('q', offsets), array('i', neighbors), array('d', weights), array('i', middles)
+
+        return cls(list(data['node_ids']), array('i', data['rank']), csr(data['up']), csr(data['down']))
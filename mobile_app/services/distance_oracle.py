@@ -0,0 +1,192 @@
+"""
+Таблица расстояний между всеми парами узлов (для небольших зданий)
+"""
+import heapq
+import json
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+
+def _rows_from_sources(graph: CompiledGraph, sources: Sequence[int]) -> List[Tuple[int, array, array]]:
+    """
+    Полный Dijkstra от каждого источника
+
+    Returns:
+        [(источник, расстояния float32, первый шаг int32)]
+    """
+    node_count = graph.node_count
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    rows = []
+    for source in sources:
+        distances = [INF] * node_count
+        first_hop = array('i', [-1] * node_count)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distance > distances[current]:
+                continue  # Устаревшая запись
+            hop = first_hop[current]
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                new_distance = distance + weights[position]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    first_hop[neighbor] = neighbor if current == source else hop
+                    heapq.heappush(heap, (new_distance, neighbor))
+        rows.append((source, array('f', distances), first_hop))
+    return rows
+
+
+class DistanceOracle:
+    """
+    Матрицы расстояний (float32) и следующего шага (int32) N x N
+
+    distance(s, t) - O(1), путь - O(длины пути) по следующим шагам.
+    Матрицы хранятся в файлах и отображаются в память (mmap), поэтому
+    загрузка не читает их целиком. Расстояния в float32 округлены
+    (~7 значащих цифр), для маршрутов этого достаточно. Закрытий таблица
+    не учитывает.
+    """
+
+    MAX_NODES = 5000  # Больше - матрицы слишком велики (N^2 * 8 байт)
+
+    def __init__(self, node_ids: List[str], distances: Sequence[float], next_hop: Sequence[int]):
+        """
+        Инициализация из готовых матриц (построчно, длина N*N)
+
+        Args:
+            node_ids: Строковые ID узлов по индексу (как в CompiledGraph)
+            distances: Расстояния, distances[s*N + t]
+            next_hop: Следующий узел на пути s -> t (-1 - нет пути или s == t)
+        """
+        self.node_ids = node_ids
+        self.index_of = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.distances = distances
+        self.next_hop = next_hop
+        self._mmaps: List[mmap.mmap] = []
+
+    @property
+    def node_count(self) -> int:
+        """Количество узлов"""
+        return len(self.node_ids)
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, workers: int = 1) -> 'DistanceOracle':
+        """
+        Посчитать матрицы повторными Dijkstra от каждого узла
+
+        Args:
+            graph: Скомпилированный граф
+            workers: Число процессов (источники делятся на части)
+
+        Returns:
+            DistanceOracle
+        """
+        node_count = graph.node_count
+        if node_count > cls.MAX_NODES:
+            raise ValueError(f"Graph is too large for the distance oracle: {node_count} nodes")
+
+        distances = array('f', bytes(4 * node_count * node_count))
+        next_hop = array('i', bytes(4 * node_count * node_count))
+        sources = list(range(node_count))
+        if workers > 1 and node_count > 1:
+            chunk = (node_count + workers - 1) // workers
+            chunks = [sources[i:i + chunk] for i in range(0, node_count, chunk)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(_rows_from_sources, [graph] * len(chunks), chunks)
+                row_groups = list(results)
+        else:
+            row_groups = [_rows_from_sources(graph, sources)]
+
+        for rows in row_groups:
+            for source, row_distances, row_hops in rows:
+                start = source * node_count
+                distances[start:start + node_count] = row_distances
+                next_hop[start:start + node_count] = row_hops
+
+        logger.info(f"Distance oracle: {node_count} nodes, {node_count * node_count * 8} bytes")
+        return cls(list(graph.node_ids), distances, next_hop)
+
+    def distance(self, from_id: str, to_id: str) -> Optional[float]:
+        """Расстояние между узлами (None - нет пути или узла)"""
+        source = self.index_of.get(from_id)
+        target = self.index_of.get(to_id)
+        if source is None or target is None:
+            return None
+        distance = self.distances[source * self.node_count + target]
+        return None if distance == INF else distance
+
+    def find_path(self, source: int, target: int) -> Optional[Tuple[List[int], float]]:
+        """
+        Путь по индексам узлов
+
+        Returns:
+            Кортеж (путь как список индексов, расстояние) или None
+        """
+        node_count = self.node_count
+        distance = self.distances[source * node_count + target]
+        if distance == INF:
+            return None
+        path = [source]
+        node = source
+        while node != target:
+            node = self.next_hop[node * node_count + target]
+            path.append(node)
+        return path, distance
+
+    def save(self, path_prefix: str):
+        """
+        Сохранить матрицы в файлы {prefix}.json, {prefix}.dist, {prefix}.next
+
+        Args:
+            path_prefix: Путь к файлам без расширения
+        """
+        for suffix, values in (('dist', self.distances), ('next', self.next_hop)):
+            with open(f"{path_prefix}.{suffix}", 'wb') as f:
+                f.write(memoryview(values).cast('B'))
+        # Заголовок пишется последним: без него неполные матрицы не загрузятся
+        with open(f"{path_prefix}.json", 'w', encoding='utf-8') as f:
+            json.dump({'node_ids': self.node_ids}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path_prefix: str) -> Optional['DistanceOracle']:
+        """
+        Отобразить сохранённые матрицы в память
+
+        Args:
+            path_prefix: Путь к файлам без расширения
+
+        Returns:
+            DistanceOracle или None, если файлов нет или они повреждены
+        """
+        try:
+            with open(f"{path_prefix}.json", 'r', encoding='utf-8') as f:
+                node_ids = json.load(f)['node_ids']
+            size = len(node_ids) * len(node_ids) * 4
+            views = []
+            mmaps = []
+            for suffix, typecode in (('dist', 'f'), ('next', 'i')):
+                with open(f"{path_prefix}.{suffix}", 'rb') as f:
+                    if os.fstat(f.fileno()).st_size != size:
+                        raise ValueError(f"Unexpected size of {path_prefix}.{suffix}")
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+                mmaps.append(mapped)
+                views.append(memoryview(mapped).cast(typecode) if mapped is not None else array(typecode))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load distance oracle {path_prefix}: {e}")
+            return None
+
+        oracle = cls(node_ids, views[0], views[1])
+        oracle._mmaps = [mapped for mapped in mmaps if mapped is not None]
+        return oracle
@@ -0,0 +1,209 @@
+"""
+Маршрут с инкрементальным пересчётом при смене закрытий (LPA*)
+"""
+import heapq
+from collections import deque
+from array import array
+from typing import Callable, List, Optional, Set, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+
+class DynamicRoute:
+    """
+    Кратчайший путь start -> end, который чинится при смене закрытий
+
+    Lifelong Planning A*: для каждого узла хранятся g (расстояние по
+    прошлому поиску) и rhs (оценка по предшественникам). При изменении
+    закрытий пересчитываются rhs только у концов изменённых рёбер, и поиск
+    раскрывает лишь узлы, чьё расстояние действительно поменялось. Закрытие
+    обрабатывается как ребро с бесконечным весом.
+    """
+
+    def __init__(self, graph: CompiledGraph, start: int, end: int,
+                 closures: Optional[ClosureOverlay] = None,
+                 weights: Optional[array] = None,
+                 heuristic: Optional[Callable[[int], float]] = None):
+        """
+        Построить начальный путь
+
+        Args:
+            graph: Скомпилированный граф
+            start: Индекс стартового узла
+            end: Индекс цели
+            closures: Маска закрытий
+            weights: Веса рёбер (по умолчанию graph.weights)
+            heuristic: Согласованная эвристика до end (по умолчанию 0)
+        """
+        self.graph = graph
+        self.start = start
+        self.end = end
+        self.weights = weights if weights is not None else graph.weights
+        self.heuristic = heuristic or (lambda index: 0.0)
+        self._reverse = graph.reverse_csr()
+        self._set_closures(closures)
+
+        self.g = array('d', [INF] * graph.node_count)
+        self.rhs = array('d', [INF] * graph.node_count)
+        self.rhs[start] = 0.0
+        self._queued = {}  # Узел -> ключ его актуальной записи в куче
+        self._heap: List[Tuple[float, float, int]] = []
+        self.last_expanded = 0  # Узлов раскрыто последним поиском или починкой
+        self.last_updated = 0  # Пересчётов rhs последним поиском или починкой
+        self._push(start)
+        self._compute()
+        self.initial_expanded = self.last_expanded
+
+    def _set_closures(self, closures: Optional[ClosureOverlay]):
+        """Запомнить маски и набор закрытий"""
+        self.edge_mask = closures.edge_mask if closures is not None else None
+        self.node_mask = closures.node_mask if closures is not None else None
+        if closures is None:
+            self.closed_edges, self.closed_nodes = frozenset(), frozenset()
+        else:
+            self.closed_edges, self.closed_nodes = closures.key
+
+    def _key(self, index: int) -> Tuple[float, float]:
+        """Ключ LPA*: (min(g, rhs) + h, min(g, rhs))"""
+        best = min(self.g[index], self.rhs[index])
+        return best + self.heuristic(index), best
+
+    def _push(self, index: int):
+        """Добавить узел в кучу с актуальным ключом"""
+        key = self._key(index)
+        self._queued[index] = key
+        heapq.heappush(self._heap, (key[0], key[1], index))
+
+    def _top_key(self) -> Tuple[float, float]:
+        """Минимальный ключ кучи (устаревшие записи выбрасываются)"""
+        heap = self._heap
+        while heap and self._queued.get(heap[0][2]) != (heap[0][0], heap[0][1]):
+            heapq.heappop(heap)
+        return (heap[0][0], heap[0][1]) if heap else (INF, INF)
+
+    def _closed(self, position: int, source: int, target: int) -> bool:
+        """Ребро закрыто само или через один из концов"""
+        return self.edge_mask is not None and (
+            self.edge_mask[position] or self.node_mask[source] or self.node_mask[target])
+
+    def _update_vertex(self, index: int):
+        """Пересчитать rhs узла по предшественникам и поправить кучу"""
+        self.last_updated += 1
+        if index != self.start:
+            reverse_offsets, reverse_sources, reverse_positions = self._reverse
+            best = INF
+            for slot in range(reverse_offsets[index], reverse_offsets[index + 1]):
+                position = reverse_positions[slot]
+                source = reverse_sources[slot]
+                if self._closed(position, source, index):
+                    continue
+                candidate = self.g[source] + self.weights[position]
+                if candidate < best:
+                    best = candidate
+            self.rhs[index] = best
+        self._queued.pop(index, None)
+        if self.g[index] != self.rhs[index]:
+            self._push(index)
+
+    def _update_successors(self, index: int):
+        """Пересчитать rhs всех последователей узла"""
+        offsets, targets = self.graph.offsets, self.graph.targets
+        for position in range(offsets[index], offsets[index + 1]):
+            self._update_vertex(targets[position])
+
+    def _compute(self):
+        """Основной цикл LPA*: раскрывать, пока цель не согласована"""
+        end = self.end
+        while self._top_key() < self._key(end) or self.rhs[end] != self.g[end]:
+            _, _, index = heapq.heappop(self._heap)
+            del self._queued[index]
+            self.last_expanded += 1
+            if self.g[index] > self.rhs[index]:
+                self.g[index] = self.rhs[index]  # Узел стал ближе
+            else:
+                self.g[index] = INF  # Узел стал дальше - пересчитать заново
+                self._update_vertex(index)
+            self._update_successors(index)
+
+    def update(self, closures: Optional[ClosureOverlay]) -> Optional[Tuple[List[int], float]]:
+        """
+        Починить путь после смены закрытий
+
+        Пересчитываются концы рёбер, чьё состояние изменилось (для узла -
+        сам узел и его последователи). Число раскрытых узлов - в
+        last_expanded (сравнить с initial_expanded полного поиска).
+
+        Args:
+            closures: Новая маска закрытий (None - закрытий нет)
+
+        Returns:
+            Новый путь (индексы, расстояние) или None, если пути больше нет
+        """
+        old_edges, old_nodes = self.closed_edges, self.closed_nodes
+        self._set_closures(closures)
+        self.last_expanded = self.last_updated = 0
+
+        graph = self.graph
+        changed: Set[int] = set()
+        for from_id, to_id in old_edges ^ self.closed_edges:
+            a, b = graph.to_index(from_id), graph.to_index(to_id)
+            if a is not None and b is not None:
+                changed.update((a, b))  # Закрытие ребра действует в обе стороны
+        for node_id in old_nodes ^ self.closed_nodes:
+            index = graph.to_index(node_id)
+            if index is not None:
+                changed.add(index)
+                changed.update(graph.targets[position]
+                               for position in range(graph.offsets[index], graph.offsets[index + 1]))
+        if not changed:
+            return self.path()
+
+        for index in changed:
+            self._update_vertex(index)
+        self._compute()
+        logger.info(f"Route repaired: {self.last_expanded} nodes expanded "
+                    f"({self.initial_expanded} in the initial search)")
+        return self.path()
+
+    def path(self) -> Optional[Tuple[List[int], float]]:
+        """
+        Текущий кратчайший путь по значениям g
+
+        Путь восстанавливается обходом в ширину от цели по плотным
+        входящим рёбрам (g[source] + w == g[node]), каждый узел - не больше
+        одного раза: жадный выбор предшественника на рёбрах нулевого веса
+        (узлы с одинаковыми координатами) мог зациклиться.
+
+        Returns:
+            Кортеж (путь как список индексов, расстояние) или None
+        """
+        start, end = self.start, self.end
+        distance = self.g[end]
+        if distance == INF or (self.node_mask is not None and self.node_mask[start]):
+            return None
+        reverse_offsets, reverse_sources, reverse_positions = self._reverse
+        following = {end: -1}  # Узел -> следующий узел пути к цели
+        frontier = deque([end])
+        while frontier and start not in following:
+            node = frontier.popleft()
+            for slot in range(reverse_offsets[node], reverse_offsets[node + 1]):
+                position = reverse_positions[slot]
+                source = reverse_sources[slot]
+                if source in following or self._closed(position, source, node):
+                    continue
+                if self.g[source] + self.weights[position] <= self.g[node]:
+                    following[source] = node
+                    frontier.append(source)
+        if start not in following:
+            logger.warning(f"Route path from {start} to {end} could not be traced")
+            return None
+        path = [start]
+        while path[-1] != end:
+            path.append(following[path[-1]])
+        return path, distance
@@ -0,0 +1,224 @@
+"""
+Двухуровневый граф маршрутизации: этажи и порталы (лестницы/лифты)
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+
+class FloorHierarchy:
+    """
+    Иерархия этаж/портал поверх CompiledGraph
+
+    Порталы - концы межэтажных рёбер. Для каждого этажа заранее посчитаны
+    кратчайшие расстояния между его порталами (внутри этажа), из них и
+    межэтажных рёбер собран оверлейный граф. Межэтажный запрос трогает
+    только этаж старта, оверлей и этаж цели.
+    """
+
+    def __init__(self, graph: CompiledGraph, closures: Optional[ClosureOverlay] = None):
+        """
+        Построить иерархию
+
+        Args:
+            graph: Скомпилированный граф с этажами узлов
+            closures: Маска закрытий, учитываемая при предрасчёте
+        """
+        if graph.floors is None:
+            raise ValueError("Floor hierarchy requires node floors in the compiled graph")
+        self.graph = graph
+        self.closures = closures
+        self.last_settled = 0
+
+        floors = graph.floors
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+
+        # Межэтажные рёбра и порталы
+        self.portals: Dict[int, List[int]] = {}
+        # Оверлей: портал -> [(портал, вес, позиция ребра или -1 для пути по этажу)]
+        self.overlay: Dict[int, List[Tuple[int, float, int]]] = {}
+        for source in range(graph.node_count):
+            for position in range(graph.offsets[source], graph.offsets[source + 1]):
+                target = graph.targets[position]
+                if floors[source] == floors[target]:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[source] or node_mask[target]):
+                    continue
+                for portal in (source, target):
+                    if portal not in self.overlay:
+                        self.overlay[portal] = []
+                        self.portals.setdefault(floors[portal], []).append(portal)
+                self.overlay[source].append((target, graph.weights[position], position))
+
+        # Пути между порталами внутри этажа (деревья предшественников)
+        self._portal_trees: Dict[int, Dict[int, int]] = {}
+        for floor, floor_portals in self.portals.items():
+            portal_set = set(floor_portals)
+            for portal in floor_portals:
+                distances, parents = self._floor_dijkstra(portal, floor)
+                self._portal_trees[portal] = parents
+                for other in portal_set:
+                    if other != portal and other in distances:
+                        self.overlay[portal].append((other, distances[other], -1))
+
+        overlay_edges = sum(len(edges) for edges in self.overlay.values())
+        logger.info(f"Floor hierarchy: {len(self.overlay)} portals, {overlay_edges} overlay edges")
+
+    def find_path(self, start: int, end: int) -> Optional[Tuple[List[int], float]]:
+        """
+        Найти кратчайший путь по индексам узлов
+
+        Args:
+            start: Индекс стартового узла
+            end: Индекс конечного узла
+
+        Returns:
+            Кортеж (путь как список индексов, расстояние) или None
+        """
+        floors = self.graph.floors
+        start_floor, end_floor = floors[start], floors[end]
+        self.last_settled = 0
+
+        # Этаж старта: расстояния до порталов (и до цели на том же этаже)
+        start_targets = set(self.portals.get(start_floor, []))
+        if end_floor == start_floor:
+            start_targets.add(end)
+        forward_distances, forward_parents = self._floor_dijkstra(
+            start, start_floor, stop_at=start_targets
+        )
+        # Этаж цели: расстояния от порталов до цели (обратный поиск)
+        backward_distances, backward_children = self._floor_dijkstra(
+            end, end_floor, reverse=True, stop_at=set(self.portals.get(end_floor, []))
+        )
+
+        best = forward_distances.get(end, float('inf'))
+        best_portal = -1
+
+        # Оверлей: многоисточниковый Dijkstra от порталов этажа старта
+        distances: Dict[int, float] = {}
+        previous: Dict[int, Tuple[int, int]] = {}
+        heap = []
+        for portal in self.portals.get(start_floor, []):
+            if portal in forward_distances:
+                distances[portal] = forward_distances[portal]
+                previous[portal] = (-1, -1)
+                heap.append((forward_distances[portal], portal))
+        heapq.heapify(heap)
+        settled = set()
+
+        while heap:
+            distance, portal = heapq.heappop(heap)
+            if portal in settled:
+                continue
+            if distance >= best:
+                break
+            settled.add(portal)
+            self.last_settled += 1
+
+            if portal in backward_distances:
+                total = distance + backward_distances[portal]
+                if total < best:
+                    best = total
+                    best_portal = portal
+
+            for neighbor, weight, position in self.overlay[portal]:
+                new_distance = distance + weight
+                if new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = (portal, position)
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        if best == float('inf'):
+            return None
+        if best_portal == -1:
+            return self._unwind(forward_parents, end), best
+
+        # Сборка пути: этаж старта + оверлей + этаж цели
+        overlay_path = [best_portal]
+        while previous[overlay_path[-1]][0] != -1:
+            overlay_path.append(previous[overlay_path[-1]][0])
+        overlay_path.reverse()
+
+        path = self._unwind(forward_parents, overlay_path[0])
+        for portal, next_portal in zip(overlay_path, overlay_path[1:]):
+            _, position = previous[next_portal]
+            if position == -1:
+                segment = self._unwind(self._portal_trees[portal], next_portal)
+                path.extend(segment[1:])
+            else:
+                path.append(next_portal)
+        node = backward_children[best_portal]
+        while node != -1:
+            path.append(node)
+            node = backward_children[node]
+        return path, best
+
+    def _floor_dijkstra(self, source: int, floor: int, reverse: bool = False,
+                        stop_at: Optional[set] = None) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Dijkstra в пределах одного этажа
+
+        Args:
+            source: Индекс начального узла
+            floor: Этаж поиска
+            reverse: Искать по входящим рёбрам (расстояния до source)
+            stop_at: Остановиться, когда все эти узлы окончательно найдены
+
+        Returns:
+            (расстояния, родители); для reverse=True родитель - следующий
+            узел на пути к source
+        """
+        graph = self.graph
+        floors = graph.floors
+        if reverse:
+            offsets, neighbors, positions = graph.reverse_csr()
+        else:
+            offsets, neighbors, positions = graph.offsets, graph.targets, None
+        weights = graph.weights
+        edge_mask = self.closures.edge_mask if self.closures is not None else None
+        node_mask = self.closures.node_mask if self.closures is not None else None
+
+        distances = {source: 0.0}
+        parents = {source: -1}
+        settled = set()
+        remaining = set(stop_at) - {source} if stop_at is not None else None
+        heap = [(0.0, source)]
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if current in settled:
+                continue
+            settled.add(current)
+            self.last_settled += 1
+            if remaining is not None:
+                remaining.discard(current)
+                if not remaining:
+                    break
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[slot]
+                position = positions[slot] if positions is not None else slot
+                if floors[neighbor] != floor or neighbor in settled:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue
+                new_distance = distance + weights[position]
+                if new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    parents[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+        return distances, parents
+
+    @staticmethod
+    def _unwind(parents: Dict[int, int], node: int) -> List[int]:
+        """Путь от корня дерева до node"""
+        path = []
+        while node != -1:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path
@@ -2,10 +2,15 @@
 Построитель графа из данных узлов
 """
 import math
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Set, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен на устройстве
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +27,8 @@ class GraphBuilder:
 
     DISTANCE_THRESHOLD = 150  # Максимальное расстояние для автосвязи
     FLOOR_CHANGE_PENALTY = 2.0  # Штраф за смену этажа
+    VECTOR_BLOCK_SIZE = 1 << 20  # Максимум элементов в блоке расстояний (NumPy)
+    VECTOR_ROW_STEP = 256  # Строк в блоке: меньше блок - уже полоса по X
 
     @staticmethod
     def calculate_distance(x1: float, y1: float, x2: float, y2: float) -> float:
@@ -29,12 +36,15 @@ class GraphBuilder:
         return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
     @staticmethod
-    def build_edges_from_nodes(nodes: List[dict]) -> List[GraphEdge]:
+    def build_edges_from_nodes(nodes: List[dict], neighbor_search: str = 'grid') -> List[GraphEdge]:
         """
         Построить рёбра на основе близости узлов
         
         Args:
             nodes: Список узлов с координатами
+            neighbor_search: Поиск соседей на этаже - 'grid' (пространственная
+                сетка), 'numpy' (векторизованные блоки расстояний) или
+                'pairwise' (полный перебор пар)
             
         Returns:
             Список рёбер графа
@@ -52,106 +62,328 @@ class GraphBuilder:
 
         # Создавать рёбра в пределах этажа (по близости)
         for floor, floor_nodes in nodes_by_floor.items():
-            for i, node1 in enumerate(floor_nodes):
-                for node2 in floor_nodes[i + 1:]:
-                    distance = GraphBuilder.calculate_distance(
-                        node1['X'], node1['Y'],
-                        node2['X'], node2['Y']
-                    )
-
-                    # Если узлы близко друг к другу, создать ребро
-                    if distance <= GraphBuilder.DISTANCE_THRESHOLD:
-                        edge_key = tuple(sorted([
-                            str(node1['Id']),
-                            str(node2['Id'])
-                        ]))
-
-                        if edge_key not in edges_set:
-                            edges_set.add(edge_key)
-                            # Двусторонняя связь
-                            edges.append(GraphEdge(
-                                from_id=str(node1['Id']),
-                                to_id=str(node2['Id']),
-                                weight=distance
-                            ))
-                            edges.append(GraphEdge(
-                                from_id=str(node2['Id']),
-                                to_id=str(node1['Id']),
-                                weight=distance
-                            ))
+            if neighbor_search == 'grid':
+                pairs = GraphBuilder._grid_neighbor_pairs(floor_nodes)
+            elif neighbor_search == 'pairwise':
+                pairs = GraphBuilder._pairwise_neighbor_pairs(floor_nodes)
+            elif neighbor_search == 'numpy':
+                pairs = GraphBuilder._numpy_neighbor_pairs(floor_nodes)
+            else:
+                raise ValueError(f"Unknown neighbor search: {neighbor_search}")
+
+            for i, j, distance in pairs:
+                node1 = floor_nodes[i]
+                node2 = floor_nodes[j]
+                edge_key = tuple(sorted([
+                    str(node1['Id']),
+                    str(node2['Id'])
+                ]))
+
+                if edge_key not in edges_set:
+                    edges_set.add(edge_key)
+                    # Двусторонняя связь
+                    edges.append(GraphEdge(
+                        from_id=str(node1['Id']),
+                        to_id=str(node2['Id']),
+                        weight=distance
+                    ))
+                    edges.append(GraphEdge(
+                        from_id=str(node2['Id']),
+                        to_id=str(node1['Id']),
+                        weight=distance
+                    ))
 
         # Соединять лестницы и лифты между этажами
+        for i, j, weight in GraphBuilder._portal_pairs(nodes):
+            node1 = nodes[i]
+            node2 = nodes[j]
+            edge_key = tuple(sorted([
+                str(node1['Id']),
+                str(node2['Id'])
+            ]))
+
+            if edge_key not in edges_set:
+                edges_set.add(edge_key)
+                edges.append(GraphEdge(
+                    from_id=str(node1['Id']),
+                    to_id=str(node2['Id']),
+                    weight=weight
+                ))
+                edges.append(GraphEdge(
+                    from_id=str(node2['Id']),
+                    to_id=str(node1['Id']),
+                    weight=weight
+                ))
+
+        logger.info(f"Built {len(edges)} edges from {len(nodes)} nodes")
+        return edges
+
+    @staticmethod
+    def build_edge_arrays(nodes: List[dict], block_size: Optional[int] = None
+                          ) -> Tuple[List[str], 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Построить рёбра векторизованно в виде массивов NumPy
+
+        Тот же набор рёбер, что и build_edges_from_nodes, но без создания
+        объекта GraphEdge на каждое направление. Результат напрямую
+        передаётся в CompiledGraph.from_arrays. Веса могут отличаться
+        от calculate_distance в последнем бите (dx * dx вместо dx ** 2).
+
+        Args:
+            nodes: Список узлов с координатами
+            block_size: Максимум элементов в блоке расстояний
+
+        Returns:
+            Кортеж (ID узлов, индексы начал, индексы концов, веса)
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for vectorized edge construction")
+
+        ids = [str(node['Id']) for node in nodes]
+        node_ids = list(dict.fromkeys(ids))
+        index_of = {node_id: i for i, node_id in enumerate(node_ids)}
+        id_index = np.array([index_of[node_id] for node_id in ids], dtype=np.int64)
+        xs = np.array([node['X'] for node in nodes], dtype=np.float64)
+        ys = np.array([node['Y'] for node in nodes], dtype=np.float64)
+
+        # Группировать позиции узлов по этажам
+        positions_by_floor: Dict[int, List[int]] = {}
+        for position, node in enumerate(nodes):
+            positions_by_floor.setdefault(node.get('Floor', 1), []).append(position)
+
+        first_parts = []
+        second_parts = []
+        weight_parts = []
+        for positions in positions_by_floor.values():
+            positions = np.array(positions, dtype=np.int64)
+            i, j, distances = GraphBuilder._vectorized_floor_pairs(
+                xs[positions], ys[positions], block_size
+            )
+            first_parts.append(id_index[positions[i]])
+            second_parts.append(id_index[positions[j]])
+            weight_parts.append(distances)
+
+        first = np.concatenate(first_parts) if first_parts else np.empty(0, dtype=np.int64)
+        second = np.concatenate(second_parts) if second_parts else np.empty(0, dtype=np.int64)
+        weights = np.concatenate(weight_parts) if weight_parts else np.empty(0)
+
+        # Убрать дубликаты по паре ID (оставить первое вхождение)
+        node_count = len(node_ids)
+        codes = np.minimum(first, second) * node_count + np.maximum(first, second)
+        _, keep = np.unique(codes, return_index=True)
+        if len(keep) < len(codes):
+            keep.sort()
+            first, second, weights, codes = first[keep], second[keep], weights[keep], codes[keep]
+
+        # Лестницы и лифты между этажами - их немного, считаем в Python
+        seen = set()
+        portal_first = []
+        portal_second = []
+        portal_weights = []
+        portal_codes = []
+        for i, j, weight in GraphBuilder._portal_pairs(nodes):
+            a, b = int(id_index[i]), int(id_index[j])
+            code = min(a, b) * node_count + max(a, b)
+            if code not in seen:
+                seen.add(code)
+                portal_first.append(a)
+                portal_second.append(b)
+                portal_weights.append(weight)
+                portal_codes.append(code)
+        if portal_codes:
+            fresh = ~np.isin(np.array(portal_codes, dtype=np.int64), codes)
+            first = np.concatenate([first, np.array(portal_first, dtype=np.int64)[fresh]])
+            second = np.concatenate([second, np.array(portal_second, dtype=np.int64)[fresh]])
+            weights = np.concatenate([weights, np.array(portal_weights, dtype=np.float64)[fresh]])
+
+        sources = np.concatenate([first, second])
+        targets = np.concatenate([second, first])
+        all_weights = np.concatenate([weights, weights])
+        logger.info(f"Built {len(sources)} edge arrays from {len(nodes)} nodes")
+        return node_ids, sources, targets, all_weights
+
+    @staticmethod
+    def is_stair_node(node: dict) -> bool:
+        """Узел - лестница (по типу или названию, без учёта регистра)"""
+        return 'staircase' in node.get('Type', '').lower() or 'staircase' in node.get('Name', '').lower()
+
+    @staticmethod
+    def is_elevator_node(node: dict) -> bool:
+        """Узел - лифт (по типу или названию, без учёта регистра)"""
+        return 'elevator' in node.get('Type', '').lower() or 'лифт' in node.get('Name', '').lower()
+
+    @staticmethod
+    def _portal_pairs(nodes: List[dict]) -> Iterator[Tuple[int, int, float]]:
+        """
+        Найти пары лестниц и лифтов в одной зоне на разных этажах
+
+        Returns:
+            Пары (i, j, вес) позиций в nodes: сначала лестницы, затем лифты
+        """
         stairs_by_location = {}
         elevators_by_location = {}
 
-        for node in nodes:
-            node_type = node.get('Type', '').lower()
+        for position, node in enumerate(nodes):
             x, y = node['X'], node['Y']
             location_key = (round(x / 50) * 50, round(y / 50) * 50)  # Группировать по зонам
 
-            if 'staircase' in node_type or 'staircase' in node.get('Name', '').lower():
+            if GraphBuilder.is_stair_node(node):
                 if location_key not in stairs_by_location:
                     stairs_by_location[location_key] = []
-                stairs_by_location[location_key].append(node)
+                stairs_by_location[location_key].append(position)
 
-            if 'elevator' in node_type or 'лифт' in node.get('Name', '').lower():
+            if GraphBuilder.is_elevator_node(node):
                 if location_key not in elevators_by_location:
                     elevators_by_location[location_key] = []
-                elevators_by_location[location_key].append(node)
+                elevators_by_location[location_key].append(position)
 
-        # Соединять лестницы на разных этажах
+        # Соединять лестницы на разных этажах (штраф за смену этажа)
         for location, stairs_list in stairs_by_location.items():
-            for i, stair1 in enumerate(stairs_list):
-                for stair2 in stairs_list[i + 1:]:
-                    edge_key = tuple(sorted([
-                        str(stair1['Id']),
-                        str(stair2['Id'])
-                    ]))
-
-                    if edge_key not in edges_set:
-                        edges_set.add(edge_key)
-                        # Штраф за смену этажа
-                        floor_distance = abs(stair1['Floor'] - stair2['Floor']) * 50
-                        weight = floor_distance * GraphBuilder.FLOOR_CHANGE_PENALTY
-
-                        edges.append(GraphEdge(
-                            from_id=str(stair1['Id']),
-                            to_id=str(stair2['Id']),
-                            weight=weight
-                        ))
-                        edges.append(GraphEdge(
-                            from_id=str(stair2['Id']),
-                            to_id=str(stair1['Id']),
-                            weight=weight
-                        ))
+            for k, i in enumerate(stairs_list):
+                for j in stairs_list[k + 1:]:
+                    floor_distance = abs(nodes[i]['Floor'] - nodes[j]['Floor']) * 50
+                    yield i, j, floor_distance * GraphBuilder.FLOOR_CHANGE_PENALTY
 
         # Соединять лифты на разных этажах (аналогично лестницам)
         for location, elevators_list in elevators_by_location.items():
-            for i, elev1 in enumerate(elevators_list):
-                for elev2 in elevators_list[i + 1:]:
-                    edge_key = tuple(sorted([
-                        str(elev1['Id']),
-                        str(elev2['Id'])
-                    ]))
-
-                    if edge_key not in edges_set:
-                        edges_set.add(edge_key)
-                        floor_distance = abs(elev1['Floor'] - elev2['Floor']) * 30
-                        weight = floor_distance * GraphBuilder.FLOOR_CHANGE_PENALTY
-
-                        edges.append(GraphEdge(
-                            from_id=str(elev1['Id']),
-                            to_id=str(elev2['Id']),
-                            weight=weight
-                        ))
-                        edges.append(GraphEdge(
-                            from_id=str(elev2['Id']),
-                            to_id=str(elev1['Id']),
-                            weight=weight
-                        ))
+            for k, i in enumerate(elevators_list):
+                for j in elevators_list[k + 1:]:
+                    floor_distance = abs(nodes[i]['Floor'] - nodes[j]['Floor']) * 30
+                    yield i, j, floor_distance * GraphBuilder.FLOOR_CHANGE_PENALTY
 
-        logger.info(f"Built {len(edges)} edges from {len(nodes)} nodes")
-        return edges
+    @staticmethod
+    def _numpy_neighbor_pairs(floor_nodes: List[dict]) -> Iterator[Tuple[int, int, float]]:
+        """
+        Найти пары близких узлов векторизованно (NumPy)
+
+        Returns:
+            Пары (i, j, расстояние) с i < j в порядке полного перебора
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for vectorized edge construction")
+        xs = np.array([node['X'] for node in floor_nodes], dtype=np.float64)
+        ys = np.array([node['Y'] for node in floor_nodes], dtype=np.float64)
+        i, j, distances = GraphBuilder._vectorized_floor_pairs(xs, ys)
+        return zip(i.tolist(), j.tolist(), distances.tolist())
+
+    @staticmethod
+    def _vectorized_floor_pairs(xs: 'np.ndarray', ys: 'np.ndarray', block_size: Optional[int] = None
+                                ) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Найти пары узлов этажа в пределах DISTANCE_THRESHOLD блоками
+
+        Узлы сортируются по X, и для каждого блока строк считаются расстояния
+        только до узлов в полосе [x, x + порог]. Размер блока ограничен
+        block_size элементами, поэтому память не растёт как O(n²).
+
+        Args:
+            xs: Координаты X узлов этажа
+            ys: Координаты Y узлов этажа
+            block_size: Максимум элементов в блоке расстояний
+
+        Returns:
+            Массивы (i, j, расстояние) с i < j, отсортированные по (i, j)
+        """
+        block_size = block_size or GraphBuilder.VECTOR_BLOCK_SIZE
+        threshold = GraphBuilder.DISTANCE_THRESHOLD
+        count = len(xs)
+        order = np.argsort(xs, kind='stable')
+        sorted_x = xs[order]
+        sorted_y = ys[order]
+
+        row_step = max(1, min(count, GraphBuilder.VECTOR_ROW_STEP, block_size))
+        first_parts = []
+        second_parts = []
+        distance_parts = []
+        for row_start in range(0, count, row_step):
+            row_end = min(row_start + row_step, count)
+            band_end = int(np.searchsorted(sorted_x, sorted_x[row_end - 1] + threshold, side='right'))
+            column_step = max(1, block_size // (row_end - row_start))
+            rows = np.arange(row_start, row_end)
+
+            # Колонки начинаются с row_start: пары с меньшим индексом уже учтены
+            for column_start in range(row_start, band_end, column_step):
+                column_end = min(column_start + column_step, band_end)
+                columns = np.arange(column_start, column_end)
+                dx = sorted_x[columns][None, :] - sorted_x[rows][:, None]
+                dy = sorted_y[columns][None, :] - sorted_y[rows][:, None]
+                distances = np.sqrt(dx * dx + dy * dy)
+                mask = (distances <= threshold) & (columns[None, :] > rows[:, None])
+                row_hits, column_hits = np.nonzero(mask)
+                if len(row_hits):
+                    first_parts.append(order[rows[row_hits]])
+                    second_parts.append(order[columns[column_hits]])
+                    distance_parts.append(distances[row_hits, column_hits])
+
+        if not first_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+
+        first = np.concatenate(first_parts)
+        second = np.concatenate(second_parts)
+        distances = np.concatenate(distance_parts)
+        # Вернуть исходную нумерацию: i < j и порядок полного перебора
+        low = np.minimum(first, second)
+        high = np.maximum(first, second)
+        ordering = np.lexsort((high, low))
+        return low[ordering], high[ordering], distances[ordering]
+
+    @staticmethod
+    def _pairwise_neighbor_pairs(floor_nodes: List[dict]) -> Iterator[Tuple[int, int, float]]:
+        """
+        Найти пары близких узлов полным перебором, O(n²)
+
+        Returns:
+            Пары (i, j, расстояние) с i < j в порядке перебора
+        """
+        for i, node1 in enumerate(floor_nodes):
+            for j in range(i + 1, len(floor_nodes)):
+                node2 = floor_nodes[j]
+                distance = GraphBuilder.calculate_distance(
+                    node1['X'], node1['Y'],
+                    node2['X'], node2['Y']
+                )
+                if distance <= GraphBuilder.DISTANCE_THRESHOLD:
+                    yield i, j, distance
+
+    @staticmethod
+    def _grid_neighbor_pairs(floor_nodes: List[dict]) -> Iterator[Tuple[int, int, float]]:
+        """
+        Найти пары близких узлов через равномерную сетку
+
+        Размер ячейки равен DISTANCE_THRESHOLD, поэтому каждый узел
+        сравнивается только с узлами своей и восьми соседних ячеек.
+        Пары выдаются в том же порядке, что и при полном переборе.
+
+        Returns:
+            Пары (i, j, расстояние) с i < j
+        """
+        cell_size = GraphBuilder.DISTANCE_THRESHOLD or 1
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        node_cells = []
+        for index, node in enumerate(floor_nodes):
+            cell = (math.floor(node['X'] / cell_size), math.floor(node['Y'] / cell_size))
+            node_cells.append(cell)
+            cells.setdefault(cell, []).append(index)
+
+        for i, node1 in enumerate(floor_nodes):
+            cell_x, cell_y = node_cells[i]
+            candidates = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for j in cells.get((cell_x + dx, cell_y + dy), ()):
+                        if j > i:
+                            candidates.append(j)
+            candidates.sort()
+
+            for j in candidates:
+                node2 = floor_nodes[j]
+                distance = GraphBuilder.calculate_distance(
+                    node1['X'], node1['Y'],
+                    node2['X'], node2['Y']
+                )
+                if distance <= GraphBuilder.DISTANCE_THRESHOLD:
+                    yield i, j, distance
 
     @staticmethod
     def edges_to_adjacency_list(edges: List[GraphEdge]) -> Dict[str, List[Tuple[str, float]]]:
@@ -174,58 +406,35 @@ class GraphBuilder:
 
     @staticmethod
     def find_shortest_path(start_id: str, end_id: str, edges: List[GraphEdge], 
-                          nodes_dict: Dict[str, dict]) -> Optional[Tuple[List[str], float]]:
+                          nodes_dict: Dict[str, dict],
+                          closed_edges: Optional[Set[Tuple[str, str]]] = None,
+                          closed_nodes: Optional[Set[str]] = None) -> Optional[Tuple[List[str], float]]:
         """
         Найти кратчайший путь между двумя узлами используя алгоритм Dijkstra
+
+        Строит временный RoutingEngine на каждый вызов.
         
         Args:
             start_id: ID стартового узла
             end_id: ID конечного узла
             edges: Список рёбер графа
             nodes_dict: Словарь узлов {id: node_dict}
+            closed_edges: Закрытые рёбра из RouteClosureService.get_closed_edges()
+            closed_nodes: Закрытые узлы из RouteClosureService.get_closed_nodes()
             
         Returns:
             Кортеж (путь как список ID, общее расстояние) или None если пути нет
         """
         if start_id == end_id:
             return [start_id], 0.0
-        
-        adjacency = GraphBuilder.edges_to_adjacency_list(edges)
-        
-        # Инициализация расстояний
-        distances = {node_id: float('inf') for node_id in nodes_dict.keys()}
-        distances[start_id] = 0.0
-        previous = {node_id: None for node_id in nodes_dict.keys()}
-        unvisited = set(nodes_dict.keys())
-        
-        while unvisited:
-            # Найти непосещённый узел с минимальным расстоянием
-            current = min(unvisited, key=lambda x: distances[x], default=None)
-            
-            if current is None or distances[current] == float('inf'):
-                break  # Нет пути до конца
-            
-            if current == end_id:
-                # Восстановить путь
-                path = []
-                node = end_id
-                while node is not None:
-                    path.append(node)
-                    node = previous[node]
-                return list(reversed(path)), distances[end_id]
-            
-            unvisited.remove(current)
-            
-            # Обновить расстояния соседей
-            if current in adjacency:
-                for neighbor, weight in adjacency[current]:
-                    if neighbor in unvisited:
-                        new_distance = distances[current] + weight
-                        if new_distance < distances[neighbor]:
-                            distances[neighbor] = new_distance
-                            previous[neighbor] = current
-        
-        return None  # Нет пути
+
+        # Совместимая обёртка: для повторных запросов держите RoutingEngine у себя
+        from .routing_engine import RoutingEngine
+        engine = RoutingEngine.from_edges(edges, nodes_dict.keys())
+        closures = None
+        if closed_edges or closed_nodes:
+            closures = engine.closure_overlay(closed_edges or (), closed_nodes or ())
+        return engine.find_path(start_id, end_id, closures)
 
 
 # Статические данные из cds.csv для демонстрации
@@ -317,3 +526,44 @@ DEMO_NODES_CSV = [
     {'Id': 148, 'Name': 'Лестница', 'Floor': 2, 'Type': 'Staircase', 'X': 1453, 'Y': 686},
     {'Id': 149, 'Name': 'Лифт', 'Floor': 2, 'Type': 'Elevator', 'X': 1441, 'Y': 758},
 ]
+
+
+def make_grid_building_nodes(floors: int = 3, rows: int = 20, cols: int = 20,
+                             spacing: float = 100) -> List[dict]:
+    """
+    Сгенерировать синтетическое здание (для тестов и бенчмарков)
+
+    На каждом этаже решётка rows x cols с шагом spacing, лестницы в двух
+    противоположных углах и лифт в центре - в одних и тех же координатах
+    на всех этажах.
+
+    Args:
+        floors: Количество этажей
+        rows: Строк решётки на этаже
+        cols: Колонок решётки на этаже
+        spacing: Расстояние между соседними узлами
+
+    Returns:
+        Список узлов в формате DEMO_NODES_CSV
+    """
+    stairs = {(0, 0), (rows - 1, cols - 1)}
+    elevators = {(rows // 2, cols // 2)}
+    nodes = []
+    for floor in range(1, floors + 1):
+        for row in range(rows):
+            for col in range(cols):
+                if (row, col) in stairs:
+                    name, node_type = 'Лестница', 'Staircase'
+                elif (row, col) in elevators:
+                    name, node_type = 'Лифт', 'Elevator'
+                else:
+                    name, node_type = f'{floor}{row:02d}{col:02d}', 'Room'
+                nodes.append({
+                    'Id': (floor * rows + row) * cols + col,
+                    'Name': name,
+                    'Floor': floor,
+                    'Type': node_type,
+                    'X': col * spacing,
+                    'Y': row * spacing,
+                })
+    return nodes
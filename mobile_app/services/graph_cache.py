@@ -0,0 +1,290 @@
+"""
+Кэш скомпилированных графов зданий
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .cache_service import CacheService
+from .compiled_graph import CompiledGraph
+from .contraction_hierarchy import ContractionHierarchy
+from .distance_oracle import DistanceOracle
+from .landmarks import LandmarkTable
+from .routing_engine import RoutingEngine
+from .routing_profiles import PROFILES
+
+logger = logging.getLogger(__name__)
+
+
+class GraphCache:
+    """Кэш графов: одна сборка на версию набора узлов здания"""
+
+    def __init__(self, cache_service: Optional[CacheService] = None,
+                 max_age_seconds: int = 7 * 24 * 3600,
+                 sparsify_epsilon: Optional[float] = None,
+                 priority_queue: str = 'binary'):
+        """
+        Инициализация кэша графов
+
+        Args:
+            cache_service: Сервис для сохранения графов на диск (опционально)
+            max_age_seconds: Максимальный возраст сохранённого графа
+            sparsify_epsilon: Допуск прореживания рёбер при сборке
+                (см. sparsify_graph); None - не прореживать
+            priority_queue: Очередь Dijkstra для графов зданий
+                (см. CompiledGraph.use_priority_queue)
+        """
+        self.cache_service = cache_service
+        self.max_age_seconds = max_age_seconds
+        self.sparsify_epsilon = sparsify_epsilon
+        self.priority_queue = priority_queue
+        # building_id -> (отпечаток, граф, движок)
+        self._entries: Dict[str, Tuple[str, CompiledGraph, Optional[RoutingEngine]]] = {}
+        # building_id -> (поля узлов в исходном порядке, отпечаток)
+        self._fingerprints: Dict[str, Tuple[List[tuple], str]] = {}
+
+    @staticmethod
+    def fingerprint(nodes: List[dict]) -> str:
+        """
+        Рассчитать отпечаток набора узлов
+
+        Учитываются все поля, влияющие на рёбра графа.
+        """
+        return GraphCache._hash_fields(GraphCache._node_fields(nodes))
+
+    @staticmethod
+    def _node_fields(nodes: List[dict]) -> List[tuple]:
+        """Поля узлов, влияющие на рёбра графа (в исходном порядке)"""
+        return [
+            (str(node['Id']), node.get('Floor', 1), node['X'], node['Y'],
+             node.get('Type', ''), node.get('Name', ''))
+            for node in nodes
+        ]
+
+    @staticmethod
+    def _hash_fields(fields: List[tuple]) -> str:
+        """Хэш полей узлов, не зависящий от их порядка"""
+        payload = json.dumps(sorted(fields), ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _building_fingerprint(self, building_id: str, nodes: List[dict]) -> str:
+        """
+        Отпечаток узлов здания, пересчитывается только при изменении данных
+
+        Сравнение полей с прошлым вызовом в несколько раз дешевле
+        сортировки и хэширования, а список узлов вызывающий обычно
+        собирает заново на каждый запрос, поэтому id(nodes) не подходит.
+        """
+        fields = self._node_fields(nodes)
+        memo = self._fingerprints.get(building_id)
+        if memo is not None and memo[0] == fields:
+            return memo[1]
+        fingerprint = self._hash_fields(fields)
+        self._fingerprints[building_id] = (fields, fingerprint)
+        return fingerprint
+
+    @staticmethod
+    def _get_cache_key(building_id: str, fingerprint: str) -> str:
+        """Ключ графа в CacheService"""
+        return f"graph_{building_id}_{fingerprint[:16]}"
+
+    def get_graph(self, building_id: str, nodes: List[dict]) -> CompiledGraph:
+        """
+        Получить скомпилированный граф здания
+
+        Args:
+            building_id: ID здания
+            nodes: Список узлов с координатами
+
+        Returns:
+            CompiledGraph из памяти, с диска или построенный заново
+        """
+        fingerprint = self._building_fingerprint(building_id, nodes)
+        if self.sparsify_epsilon is not None:
+            # Прореженный граф - отдельная версия для графа, иерархии и таблицы
+            payload = f"{fingerprint}:sparsify={self.sparsify_epsilon}"
+            fingerprint = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        entry = self._entries.get(building_id)
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+
+        graph = self._load(building_id, fingerprint)
+        if graph is None:
+            graph = CompiledGraph.from_nodes(nodes, sparsify_epsilon=self.sparsify_epsilon)
+        if graph.landmarks is None or graph.stair_nodes is None:
+            # Ориентиры считаются один раз на версию набора узлов
+            if graph.stair_nodes is None:
+                graph.attach_nodes(nodes)  # Граф из кэша старого формата
+            if graph.landmarks is None:
+                graph.landmarks = LandmarkTable.build(graph)
+            self._save(building_id, fingerprint, graph)
+
+        # Выбор очереди не меняет граф, поэтому применяется и к графу с диска
+        graph.use_priority_queue(self.priority_queue)
+        # Веса профилей доступности считаются заранее, смена профиля бесплатна
+        for profile in PROFILES:
+            graph.profile_weights(profile)
+        # Компоненты связности - для мгновенного отказа на невозможных маршрутах
+        graph.component_index()
+
+        self._entries[building_id] = (fingerprint, graph, None)
+        return graph
+
+    def get_engine(self, building_id: str, nodes: List[dict]) -> RoutingEngine:
+        """
+        Получить движок маршрутизации поверх закэшированного графа
+
+        Args:
+            building_id: ID здания
+            nodes: Список узлов с координатами
+
+        Returns:
+            RoutingEngine
+        """
+        graph = self.get_graph(building_id, nodes)
+        fingerprint, _, engine = self._entries[building_id]
+        if engine is None:
+            engine = RoutingEngine(graph)
+            self._entries[building_id] = (fingerprint, graph, engine)
+        return engine
+
+    def attach_contraction_hierarchy(self, building_id: str, nodes: List[dict],
+                                     data: Optional[dict] = None) -> RoutingEngine:
+        """
+        Подключить Contraction Hierarchies к движку здания
+
+        Иерархия берётся из переданных данных (загружены с сервера), из
+        CacheService или строится на месте и сохраняется. Ключ содержит
+        отпечаток узлов, поэтому при изменении здания иерархия не
+        переиспользуется.
+
+        Args:
+            building_id: ID здания
+            nodes: Список узлов с координатами
+            data: Сериализованная иерархия (ContractionHierarchy.to_dict)
+
+        Returns:
+            RoutingEngine с подключённой иерархией
+        """
+        engine = self.get_engine(building_id, nodes)
+        fingerprint = self._entries[building_id][0]
+        key = f"ch_{building_id}_{fingerprint[:16]}"
+
+        from_cache = False
+        if data is None and self.cache_service is not None:
+            data = self.cache_service.get(key, max_age_seconds=self.max_age_seconds)
+            from_cache = data is not None
+        hierarchy = None
+        if data is not None:
+            try:
+                hierarchy = engine.attach_contraction_hierarchy(ContractionHierarchy.from_dict(data))
+            except Exception as e:
+                logger.error(f"Failed to load contraction hierarchy for building {building_id}: {e}")
+                from_cache = False
+        if hierarchy is None:
+            hierarchy = engine.attach_contraction_hierarchy()
+        if self.cache_service is not None and not from_cache:
+            self.cache_service.set(key, hierarchy.to_dict())
+        return engine
+
+    def attach_distance_oracle(self, building_id: str, nodes: List[dict],
+                               build: bool = True) -> Optional[RoutingEngine]:
+        """
+        Подключить таблицу расстояний всех пар к движку здания
+
+        Матрицы отображаются в память из каталога CacheService или
+        строятся и сохраняются туда. Имя файлов содержит отпечаток узлов.
+
+        Args:
+            building_id: ID здания
+            nodes: Список узлов с координатами
+            build: Строить таблицу, если готовых файлов нет (один Dijkstra
+                на узел); False - только отобразить уже сохранённые
+
+        Returns:
+            RoutingEngine с подключённой таблицей или None, если здание
+            больше DistanceOracle.MAX_NODES или таблицы нет и build=False
+        """
+        engine = self.get_engine(building_id, nodes)
+        if engine.graph.node_count > DistanceOracle.MAX_NODES:
+            return None
+        if engine.distance_oracle is not None:
+            return engine
+
+        oracle = None
+        path_prefix = None
+        if self.cache_service is not None:
+            fingerprint = self._entries[building_id][0]
+            path_prefix = os.path.join(self.cache_service.cache_dir, f"oracle_{building_id}_{fingerprint[:16]}")
+            oracle = DistanceOracle.load(path_prefix)
+            if oracle is not None and oracle.node_ids != engine.graph.node_ids:
+                oracle = None
+        if oracle is None:
+            if not build:
+                return None
+            oracle = DistanceOracle.build(engine.graph)
+            if path_prefix is not None:
+                oracle.save(path_prefix)
+        engine.attach_distance_oracle(oracle)
+        return engine
+
+    def invalidate(self, building_id: Optional[str] = None):
+        """
+        Сбросить графы из памяти
+
+        Args:
+            building_id: ID здания (None - все здания)
+        """
+        if building_id is None:
+            self._entries.clear()
+            self._fingerprints.clear()
+        else:
+            self._entries.pop(building_id, None)
+            self._fingerprints.pop(building_id, None)
+
+    def _load(self, building_id: str, fingerprint: str) -> Optional[CompiledGraph]:
+        """Загрузить граф из CacheService"""
+        if self.cache_service is None:
+            return None
+        data = self.cache_service.get(
+            self._get_cache_key(building_id, fingerprint),
+            max_age_seconds=self.max_age_seconds
+        )
+        if data is None:
+            return None
+        try:
+            graph = CompiledGraph.from_dict(data)
+            logger.info(f"Loaded graph for building {building_id} from cache")
+            return graph
+        except Exception as e:
+            logger.error(f"Failed to load cached graph for building {building_id}: {e}")
+            return None
+
+    def _save(self, building_id: str, fingerprint: str, graph: CompiledGraph):
+        """Сохранить граф в CacheService"""
+        if self.cache_service is None:
+            return
+        self.cache_service.set(self._get_cache_key(building_id, fingerprint), graph.to_dict())
+
+
+# Глобальный экземпляр кэша графов
+_graph_cache: Optional[GraphCache] = None
+
+
+def get_graph_cache() -> GraphCache:
+    """Получить или создать глобальный экземпляр кэша графов"""
+    global _graph_cache
+    if _graph_cache is None:
+        _graph_cache = GraphCache()
+    return _graph_cache
+
+
+def init_graph_cache(cache_service: Optional[CacheService] = None,
+                     sparsify_epsilon: Optional[float] = None,
+                     priority_queue: str = 'binary'):
+    """Инициализировать глобальный кэш графов"""
+    global _graph_cache
+    _graph_cache = GraphCache(cache_service=cache_service, sparsify_epsilon=sparsify_epsilon,
+                              priority_queue=priority_queue)
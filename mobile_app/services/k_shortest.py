@@ -0,0 +1,222 @@
+"""
+K кратчайших путей без циклов (алгоритм Йена) для альтернативных маршрутов
+"""
+import heapq
+from array import array
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+
+class KShortestPaths:
+    """
+    Алгоритм Йена с общей работой между поисками ответвлений
+
+    Один раз строится обратное дерево кратчайших путей до цели. Удаление
+    рёбер и узлов только увеличивает расстояния, поэтому d(v, цель) из
+    дерева - допустимая и согласованная эвристика для каждого поиска
+    ответвления (spur). A* останавливается на первом извлечённом узле,
+    чей путь по дереву не задевает запрещённых узлов: дальше путь
+    берётся из дерева без поиска. Ответвления кэшируются по (корень,
+    запрещённые следующие узлы) - в алгоритме Йена одинаковые задачи
+    повторяются для общих префиксов путей.
+
+    Объект привязан к цели, закрытиям и весам и годится для разных
+    стартов (кэш ответвлений включает корень пути).
+    """
+
+    def __init__(self, graph: CompiledGraph, end: int,
+                 closures: Optional[ClosureOverlay] = None,
+                 weights: Optional[array] = None):
+        """
+        Построить обратное дерево до цели
+
+        Args:
+            graph: Скомпилированный граф
+            end: Индекс цели
+            closures: Маска закрытий
+            weights: Веса рёбер (по умолчанию graph.weights)
+        """
+        self.graph = graph
+        self.end = end
+        self.weights = weights if weights is not None else graph.weights
+        self.edge_mask = closures.edge_mask if closures is not None else None
+        self.node_mask = closures.node_mask if closures is not None else None
+        self.settled = 0  # Узлов извлечено из кучи за всё время
+        self.pushed = 0
+        self.cache_hits = 0
+        self._spur_cache: Dict[Tuple[tuple, FrozenSet[int]], Optional[Tuple[List[int], float]]] = {}
+        self.to_end, self.following = self._reverse_tree()
+
+    def _reverse_tree(self) -> Tuple[array, array]:
+        """Полный обратный Dijkstra от цели: d(v, цель) и следующий узел"""
+        graph = self.graph
+        reverse_offsets, reverse_sources, reverse_positions = graph.reverse_csr()
+        weights, edge_mask, node_mask = self.weights, self.edge_mask, self.node_mask
+
+        to_end = array('d', [INF] * graph.node_count)
+        following = array('i', [-1] * graph.node_count)
+        to_end[self.end] = 0.0
+        heap = [(0.0, self.end)]
+        self.pushed += 1
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distance > to_end[current]:
+                continue  # Устаревшая запись
+            self.settled += 1
+            for slot in range(reverse_offsets[current], reverse_offsets[current + 1]):
+                position = reverse_positions[slot]
+                neighbor = reverse_sources[slot]
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < to_end[neighbor]:
+                    to_end[neighbor] = new_distance
+                    following[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    self.pushed += 1
+        return to_end, following
+
+    def paths(self, start: int, k: int) -> List[Tuple[List[int], float]]:
+        """
+        До k кратчайших путей без циклов от start до цели
+
+        Args:
+            start: Индекс стартового узла
+            k: Сколько путей нужно
+
+        Returns:
+            Список (путь как список индексов, расстояние) по возрастанию
+            расстояния; пустой, если пути нет
+        """
+        if k <= 0 or self.to_end[start] == INF:
+            return []
+        accepted = [(self._tree_path(start), self.to_end[start])]
+        seen = {tuple(accepted[0][0])}
+        candidates: List[Tuple[float, int, tuple]] = []
+
+        while len(accepted) < k:
+            last_path = accepted[-1][0]
+            root_distance = 0.0
+            for i in range(len(last_path) - 1):
+                root = tuple(last_path[:i + 1])
+                banned = frozenset(path[i + 1] for path, _ in accepted
+                                   if len(path) > i + 1 and tuple(path[:i + 1]) == root)
+                spur = self._spur(root, banned)
+                if spur is not None:
+                    spur_path, spur_distance = spur
+                    candidate = root[:-1] + tuple(spur_path)
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        heapq.heappush(candidates, (root_distance + spur_distance, len(candidate), candidate))
+                root_distance += self._edge_weight(last_path[i], last_path[i + 1])
+
+            if not candidates:
+                break  # Других путей без циклов нет
+            distance, _, candidate = heapq.heappop(candidates)
+            accepted.append((list(candidate), distance))
+        return accepted
+
+    def _tree_path(self, node: int) -> List[int]:
+        """Путь от node до цели по обратному дереву"""
+        path = [node]
+        while node != self.end:
+            node = self.following[node]
+            path.append(node)
+        return path
+
+    def _edge_weight(self, source: int, target: int) -> float:
+        """Вес самого лёгкого открытого ребра source -> target"""
+        graph, edge_mask = self.graph, self.edge_mask
+        best = INF
+        for position in range(graph.offsets[source], graph.offsets[source + 1]):
+            if graph.targets[position] == target and not (edge_mask is not None and edge_mask[position]):
+                best = min(best, self.weights[position])
+        return best
+
+    def _spur(self, root: tuple, banned: FrozenSet[int]) -> Optional[Tuple[List[int], float]]:
+        """Кратчайшее ответвление от root[-1] (из кэша, если уже искали)"""
+        key = (root, banned)
+        if key in self._spur_cache:
+            self.cache_hits += 1
+            return self._spur_cache[key]
+        result = self._spur_search(root[-1], set(root[:-1]), banned)
+        self._spur_cache[key] = result
+        return result
+
+    def _spur_search(self, spur: int, blocked: set, banned: FrozenSet[int]) -> Optional[Tuple[List[int], float]]:
+        """
+        A* от spur до цели без узлов blocked и без рёбер spur -> banned
+
+        Args:
+            spur: Узел ответвления
+            blocked: Узлы корня пути (кроме spur) - запрещены
+            banned: Следующие узлы принятых путей с тем же корнем
+        """
+        graph = self.graph
+        offsets, targets, weights = graph.offsets, graph.targets, self.weights
+        edge_mask, node_mask = self.edge_mask, self.node_mask
+        to_end, following, end = self.to_end, self.following, self.end
+        tree_clear: Dict[int, bool] = {end: True, spur: False}
+
+        def clear_to_end(node: int) -> bool:
+            """Путь по дереву от node не проходит через blocked и spur"""
+            chain = []
+            while node not in tree_clear and node not in blocked:
+                chain.append(node)
+                node = following[node]
+            clear = tree_clear.get(node, False)
+            for visited in chain:
+                tree_clear[visited] = clear
+            return clear
+
+        distances = {spur: 0.0}
+        previous = {spur: -1}
+        settled = set()
+        heap = [(to_end[spur], spur)]
+        self.pushed += 1
+        while heap:
+            _, current = heapq.heappop(heap)
+            if current in settled:
+                continue  # Устаревшая запись
+            settled.add(current)
+            self.settled += 1
+            distance = distances[current]
+
+            # Дальше - по дереву, если оно не задевает запретов
+            # (через spur повторно идти нельзя: его рёбра частично запрещены)
+            if current == spur:
+                clear = following[spur] not in banned and clear_to_end(following[spur])
+            else:
+                clear = clear_to_end(current)
+            if clear:
+                path = []
+                node = current
+                while node != -1:
+                    path.append(node)
+                    node = previous[node]
+                path.reverse()
+                return path + self._tree_path(current)[1:], distance + to_end[current]
+
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                if neighbor in settled or neighbor in blocked or to_end[neighbor] == INF:
+                    continue
+                if current == spur and neighbor in banned:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances.get(neighbor, INF):
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_distance + to_end[neighbor], neighbor))
+                    self.pushed += 1
+
+        return None  # Ответвления нет
@@ -0,0 +1,219 @@
+"""
+Ориентиры (landmarks) для эвристики ALT (A*, Landmarks, Triangle inequality)
+"""
+import heapq
+from array import array
+from typing import Callable, List, Optional
+import logging
+
+from .compiled_graph import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+
+
+def _full_dijkstra(graph: CompiledGraph, source: int, reverse: bool = False) -> array:
+    """Расстояния от source до всех узлов (reverse=True - до source)"""
+    if reverse:
+        offsets, neighbors, positions = graph.reverse_csr()
+    else:
+        offsets, neighbors, positions = graph.offsets, graph.targets, None
+    weights = graph.weights
+
+    distances = array('d', [INF] * graph.node_count)
+    distances[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        distance, current = heapq.heappop(heap)
+        if distance > distances[current]:
+            continue  # Устаревшая запись
+        for slot in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[slot]
+            new_distance = distance + weights[positions[slot] if positions is not None else slot]
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                heapq.heappush(heap, (new_distance, neighbor))
+    return distances
+
+
+class LandmarkTable:
+    """
+    Таблицы расстояний от/до ориентиров
+
+    Для ориентира L и цели t по неравенству треугольника
+    d(v, t) >= d(L, t) - d(L, v) и d(v, t) >= d(v, L) - d(t, L).
+    Максимум таких оценок - допустимая и согласованная эвристика A*,
+    которая учитывает обходы по коридорам (в отличие от прямой).
+    Закрытия только увеличивают расстояния, поэтому оценки остаются
+    допустимыми и при закрытых рёбрах.
+    """
+
+    LANDMARK_COUNT = 8
+    ACTIVE_LANDMARKS = 4  # Сколько лучших ориентиров использовать в одном запросе
+    MIN_COMPONENT_SIZE = 2  # Компонентам не больше этого размера ориентиры не нужны
+
+    def __init__(self, landmarks: List[int], from_landmark: List[array], to_landmark: List[array]):
+        """
+        Инициализация из готовых таблиц
+
+        Args:
+            landmarks: Индексы узлов-ориентиров
+            from_landmark: d(L, v) для каждого ориентира
+            to_landmark: d(v, L) для каждого ориентира
+        """
+        self.landmarks = landmarks
+        self.from_landmark = from_landmark
+        self.to_landmark = to_landmark
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, count: Optional[int] = None) -> 'LandmarkTable':
+        """
+        Выбрать ориентиры и посчитать таблицы
+
+        Ориентиры распределяются по компонентам связности пропорционально
+        их размеру (крупная компонента получает хотя бы один, компоненты
+        из одного-двух узлов - ни одного). Внутри компоненты следующий
+        ориентир - узел, максимально удалённый от уже выбранных.
+
+        Args:
+            graph: Скомпилированный граф
+            count: Число ориентиров (по умолчанию LANDMARK_COUNT)
+
+        Returns:
+            LandmarkTable
+        """
+        count = count or cls.LANDMARK_COUNT
+        components = sorted(
+            (component for component in cls._components(graph) if len(component) > cls.MIN_COMPONENT_SIZE),
+            key=len, reverse=True
+        )
+        total = sum(len(component) for component in components)
+
+        landmarks: List[int] = []
+        from_landmark: List[array] = []
+        to_landmark: List[array] = []
+        for component in components:
+            budget = count - len(landmarks)
+            if budget <= 0:
+                break
+            share = min(max(1, round(count * len(component) / total)), budget, len(component))
+
+            # Первый ориентир - самый удалённый от произвольного узла компоненты
+            candidate = cls._farthest(_full_dijkstra(graph, component[0]), component, set())
+            nearest = None
+            chosen = set()
+            for _ in range(share):
+                chosen.add(candidate)
+                landmarks.append(candidate)
+                from_landmark.append(_full_dijkstra(graph, candidate))
+                to_landmark.append(_full_dijkstra(graph, candidate, reverse=True))
+                latest = from_landmark[-1]
+                nearest = latest if nearest is None else array('d', map(min, nearest, latest))
+                candidate = cls._farthest(nearest, component, chosen)
+
+        logger.info(f"Landmarks: {len(landmarks)} for {graph.node_count} nodes, "
+                    f"{len(components)} components")
+        return cls(landmarks, from_landmark, to_landmark)
+
+    @staticmethod
+    def _components(graph: CompiledGraph) -> List[List[int]]:
+        """Компоненты связности без учёта направления рёбер"""
+        reverse_offsets, reverse_sources, _ = graph.reverse_csr()
+        component_of = [-1] * graph.node_count
+        components = []
+        for root in range(graph.node_count):
+            if component_of[root] != -1:
+                continue
+            component_of[root] = len(components)
+            component = [root]
+            stack = [root]
+            while stack:
+                current = stack.pop()
+                neighbors = [graph.targets[slot] for slot in range(graph.offsets[current], graph.offsets[current + 1])]
+                neighbors.extend(reverse_sources[slot] for slot in
+                                 range(reverse_offsets[current], reverse_offsets[current + 1]))
+                for neighbor in neighbors:
+                    if component_of[neighbor] == -1:
+                        component_of[neighbor] = len(components)
+                        component.append(neighbor)
+                        stack.append(neighbor)
+            components.append(component)
+        return components
+
+    @staticmethod
+    def _farthest(distances: array, component: List[int], exclude: set) -> int:
+        """Самый удалённый узел компоненты (недостижимые по направлению - первыми)"""
+        best_index, best_distance = component[0], -1.0
+        for index in component:
+            distance = distances[index]
+            if index not in exclude and distance > best_distance:
+                best_index, best_distance = index, distance
+        return best_index
+
+    def lower_bound(self, landmark: int, source: int, target: int) -> float:
+        """Нижняя оценка d(source, target) по одному ориентиру"""
+        bound = 0.0
+        from_l, to_l = self.from_landmark[landmark], self.to_landmark[landmark]
+        if from_l[target] != INF and from_l[source] != INF:
+            bound = max(bound, from_l[target] - from_l[source])
+        if to_l[source] != INF and to_l[target] != INF:
+            bound = max(bound, to_l[source] - to_l[target])
+        return bound
+
+    def heuristic(self, start: int, end: int) -> Callable[[int], float]:
+        """
+        Эвристика ALT к цели end
+
+        Для запроса берутся ACTIVE_LANDMARKS ориентиров с наибольшей
+        оценкой d(start, end).
+
+        Args:
+            start: Индекс стартового узла (для выбора ориентиров)
+            end: Индекс цели
+
+        Returns:
+            Функция h(v)
+        """
+        ranked = sorted(range(len(self.landmarks)),
+                        key=lambda i: self.lower_bound(i, start, end), reverse=True)
+        active = []
+        for i in ranked[:self.ACTIVE_LANDMARKS]:
+            from_l, to_l = self.from_landmark[i], self.to_landmark[i]
+            active.append((from_l, to_l, from_l[end], to_l[end]))
+
+        def heuristic(index: int) -> float:
+            bound = 0.0
+            for from_l, to_l, from_end, to_end in active:
+                from_v = from_l[index]
+                if from_end != INF and from_v != INF and from_end - from_v > bound:
+                    bound = from_end - from_v
+                to_v = to_l[index]
+                if to_v != INF and to_end != INF and to_v - to_end > bound:
+                    bound = to_v - to_end
+            return bound
+
+        return heuristic
+
+    def to_dict(self) -> dict:
+        """Сериализовать таблицы (бесконечность как None)"""
+        def encode(values: array) -> list:
+            return [None if value == INF else value for value in values]
+
+        return {
+            'landmarks': list(self.landmarks),
+            'from': [encode(values) for values in self.from_landmark],
+            'to': [encode(values) for values in self.to_landmark],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LandmarkTable':
+        """Восстановить таблицы из словаря"""
+        def decode(values: list) -> array:
+            return array('d', (INF if value is None else value for value in values))
+
+        return cls(
+            list(data['landmarks']),
+            [decode(values) for values in data['from']],
+            [decode(values) for values in data['to']],
+        )
@@ -0,0 +1,165 @@
+"""
+Многокритериальный поиск: расстояние, смены этажей, лестницы (множество Парето)
+"""
+import heapq
+from array import array
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+from .routing_profiles import is_stair_edge
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+DISTANCE_TOLERANCE = 1e-9  # Расстояния ближе этого считаются равными
+
+
+@dataclass
+class ParetoRoute:
+    """Маршрут из множества Парето"""
+    path: List  # Индексы узлов (в ParetoSearch) или ID (в RoutingEngine)
+    distance: float
+    floor_changes: int  # Рёбер между разными этажами
+    stairs: int  # Лестничных рёбер (см. routing_profiles.is_stair_edge)
+
+
+class ParetoSearch:
+    """
+    Поиск с метками (label-setting) по трём критериям
+
+    Метка - (расстояние, смены этажей, лестницы) для пути до узла. Метки
+    извлекаются из кучи в лексикографическом порядке, поэтому извлечённая
+    метка, не доминируемая метками своего узла, окончательна. Метка
+    отбрасывается, если её доминирует метка своего узла или (с нижними
+    границами остатка пути) метка цели. Первая метка каждого узла -
+    кратчайшая по расстоянию, а после исчерпания общего лимита меток
+    узлы получают только первую метку, поэтому кратчайший маршрут есть в
+    ответе всегда, а работа ограничена.
+    """
+
+    MAX_LABELS = 20000  # Окончательных меток, после которых - одна метка на узел
+    MAX_LABELS_PER_NODE = 8  # Окончательных меток на узел
+
+    def __init__(self, graph: CompiledGraph, closures: Optional[ClosureOverlay] = None,
+                 weights: Optional[array] = None,
+                 heuristic: Optional[Callable[[int], float]] = None,
+                 max_labels: int = MAX_LABELS,
+                 max_labels_per_node: int = MAX_LABELS_PER_NODE):
+        """
+        Инициализация поиска
+
+        Args:
+            graph: Скомпилированный граф
+            closures: Маска закрытий
+            weights: Веса рёбер (по умолчанию graph.weights)
+            heuristic: Допустимая нижняя граница расстояния до цели
+            max_labels: Меток, после которых узлы получают не больше одной
+            max_labels_per_node: Ограничение числа меток на узел
+        """
+        self.graph = graph
+        self.weights = weights if weights is not None else graph.weights
+        self.edge_mask = closures.edge_mask if closures is not None else None
+        self.node_mask = closures.node_mask if closures is not None else None
+        self.heuristic = heuristic or (lambda index: 0.0)
+        self.max_labels = max_labels
+        self.max_labels_per_node = max_labels_per_node
+        self.settled = 0  # Окончательных меток
+        self.pushed = 0
+        self.truncated = False  # Сработало одно из ограничений числа меток
+
+    def run(self, start: int, end: int) -> List[ParetoRoute]:
+        """
+        Найти недоминируемые маршруты start -> end
+
+        Args:
+            start: Индекс стартового узла
+            end: Индекс цели
+
+        Returns:
+            Список ParetoRoute по возрастанию расстояния (пустой, если пути нет)
+        """
+        graph = self.graph
+        offsets, targets, weights = graph.offsets, graph.targets, self.weights
+        edge_mask, node_mask = self.edge_mask, self.node_mask
+        floors = graph.floors
+        heuristic = self.heuristic
+        self.settled = self.pushed = 0
+        self.truncated = False
+        if node_mask is not None and (node_mask[start] or node_mask[end]):
+            return []
+
+        # Метка: (расстояние, смены этажей, лестницы, узел, родительская метка)
+        labels: List[Tuple[float, int, int, int, int]] = []
+        node_labels: List[List[Tuple[float, int, int]]] = [[] for _ in range(graph.node_count)]
+        heap = [(0.0, 0, 0, start, -1)]
+        self.pushed = 1
+        while heap:
+            distance, floor_changes, stairs, current, parent = heapq.heappop(heap)
+            if _dominated(node_labels[current], distance, floor_changes, stairs):
+                continue
+            # После общего ограничения поиск вырождается в Dijkstra: одна метка на узел
+            limit = self.max_labels_per_node if len(labels) < self.max_labels else 1
+            if len(node_labels[current]) >= limit:
+                self.truncated = True
+                continue
+            node_labels[current].append((distance, floor_changes, stairs))
+            labels.append((distance, floor_changes, stairs, current, parent))
+            self.settled += 1
+            if current == end:
+                continue  # Пути через цель дальше не нужны
+            label = len(labels) - 1
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                weight = weights[position]
+                if weight == INF:
+                    continue  # Ребро недоступно в профиле
+                new_distance = distance + weight
+                new_floor_changes = floor_changes
+                new_stairs = stairs
+                if floors is not None and floors[current] != floors[neighbor]:
+                    new_floor_changes += 1
+                    if is_stair_edge(graph, current, neighbor):
+                        new_stairs += 1
+                if _dominated(node_labels[neighbor], new_distance, new_floor_changes, new_stairs):
+                    continue
+                # Нижняя граница маршрута через эту метку против найденных маршрутов
+                floor_bound = int(floors is not None and floors[neighbor] != floors[end])
+                if _dominated(node_labels[end], new_distance + heuristic(neighbor),
+                              new_floor_changes + floor_bound, new_stairs):
+                    continue
+                heapq.heappush(heap, (new_distance, new_floor_changes, new_stairs, neighbor, label))
+                self.pushed += 1
+
+        if self.truncated:
+            logger.warning(f"Pareto search hit the label cap ({self.settled} labels), result may be incomplete")
+
+        routes = []
+        for index, (distance, floor_changes, stairs, node, _) in enumerate(labels):
+            if node == end:
+                routes.append(ParetoRoute(self._path(labels, index), distance, floor_changes, stairs))
+        return routes
+
+    @staticmethod
+    def _path(labels: List[Tuple[float, int, int, int, int]], index: int) -> List[int]:
+        """Восстановить путь по цепочке родительских меток"""
+        path = []
+        while index != -1:
+            path.append(labels[index][3])
+            index = labels[index][4]
+        path.reverse()
+        return path
+
+
+def _dominated(existing: List[Tuple[float, int, int]], distance: float,
+               floor_changes: int, stairs: int) -> bool:
+    """Есть метка не хуже по всем критериям (равная тоже доминирует)"""
+    for other_distance, other_floor_changes, other_stairs in existing:
+        if (other_distance <= distance + DISTANCE_TOLERANCE and other_floor_changes <= floor_changes
+                and other_stairs <= stairs):
+            return True
+    return False
@@ -2,7 +2,7 @@
 Сервис для управления закрытыми маршрутами и ремонтами
 """
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Set
+from typing import Callable, List, Optional, Tuple, Set
 from datetime import datetime, timedelta
 from enum import Enum
 import json
@@ -35,12 +35,16 @@ class RouteClosure:
     active: bool = True
     description: Optional[str] = None
 
-    def is_expired(self) -> bool:
-        """Проверить истёк ли срок закрытия"""
+    def is_expired(self, moment: Optional[datetime] = None) -> bool:
+        """Проверить истёк ли срок закрытия (к моменту moment, по умолчанию - сейчас)"""
         if self.scheduled_until:
-            return datetime.now() > self.scheduled_until
+            return (moment or datetime.now()) > self.scheduled_until
         return False
 
+    def is_active_at(self, moment: datetime) -> bool:
+        """Действует ли закрытие в момент moment (с created_at до scheduled_until)"""
+        return self.active and self.created_at <= moment and not self.is_expired(moment)
+
     def to_dict(self) -> dict:
         return {
             'closure_id': self.closure_id,
@@ -77,9 +81,29 @@ class RouteClosureService:
     def __init__(self, closure_dir: str = ".closures"):
         self.closure_dir = closure_dir
         self.closures: dict = {}
+        # Подписчики на изменение набора закрытий (например, активная навигация)
+        self._listeners: List[Callable[[], None]] = []
         os.makedirs(closure_dir, exist_ok=True)
         self._load_closures()
 
+    def add_listener(self, callback: Callable[[], None]):
+        """Подписаться на изменение набора закрытий"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]):
+        """Отписаться от изменений"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        """Сообщить подписчикам об изменении закрытий"""
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Closure listener failed: {e}")
+
     def _get_closure_file_path(self) -> str:
         """Получить путь к файлу с закрытиями"""
         return os.path.join(self.closure_dir, "closures.json")
@@ -154,6 +178,7 @@ class RouteClosureService:
         self.closures[closure_id] = closure
         self._save_closures()
         logger.info(f"Closed route: {from_id} -> {to_id}, reason: {reason}")
+        self._notify()
         
         return closure_id
 
@@ -197,6 +222,7 @@ class RouteClosureService:
         self.closures[closure_id] = closure
         self._save_closures()
         logger.info(f"Closed node: {node_id}, reason: {reason}")
+        self._notify()
         
         return closure_id
 
@@ -206,6 +232,7 @@ class RouteClosureService:
             self.closures[closure_id].active = False
             self._save_closures()
             logger.info(f"Opened closure: {closure_id}")
+            self._notify()
             return True
         return False
 
@@ -233,26 +260,29 @@ class RouteClosureService:
                 return closure.reason or closure.closure_type.value
         return None
 
-    def get_active_closures(self) -> List[RouteClosure]:
-        """Получить все активные закрытия"""
+    def get_active_closures(self, at: Optional[datetime] = None) -> List[RouteClosure]:
+        """Получить все активные закрытия (сейчас или в момент at)"""
         active = []
         for closure in self.closures.values():
-            if closure.active and not closure.is_expired():
+            if at is not None:
+                if closure.is_active_at(at):
+                    active.append(closure)
+            elif closure.active and not closure.is_expired():
                 active.append(closure)
         return active
 
-    def get_closed_edges(self) -> Set[Tuple[str, str]]:
-        """Получить множество закрытых маршрутов (рёбер)"""
+    def get_closed_edges(self, at: Optional[datetime] = None) -> Set[Tuple[str, str]]:
+        """Получить множество закрытых маршрутов (рёбер), сейчас или в момент at"""
         closed = set()
-        for closure in self.get_active_closures():
+        for closure in self.get_active_closures(at):
             if closure.to_id:  # Это ребро, а не узел
                 closed.add((closure.from_id, closure.to_id))
         return closed
 
-    def get_closed_nodes(self) -> Set[str]:
-        """Получить множество закрытых узлов"""
+    def get_closed_nodes(self, at: Optional[datetime] = None) -> Set[str]:
+        """Получить множество закрытых узлов, сейчас или в момент at"""
         closed = set()
-        for closure in self.get_active_closures():
+        for closure in self.get_active_closures(at):
             if closure.to_id is None:  # Это узел
                 closed.add(closure.from_id)
         return closed
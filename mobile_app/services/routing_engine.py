@@ -0,0 +1,1249 @@
+"""
+Движок маршрутизации поверх заранее построенного графа
+"""
+import heapq
+import math
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from .graph_builder import GraphEdge
+from .compiled_graph import CompiledGraph
+from .closure_overlay import ClosureOverlay
+from .floor_hierarchy import FloorHierarchy
+from .contraction_hierarchy import ContractionHierarchy
+from .landmarks import LandmarkTable
+from .distance_oracle import DistanceOracle
+from .k_shortest import KShortestPaths
+from .tour_planner import plan_tour
+from .components import ComponentIndex
+from .dynamic_route import DynamicRoute
+from .pareto_routes import ParetoRoute, ParetoSearch
+from .closure_timeline import ClosureTimeline
+from .bucket_queue import dial_search
+
+logger = logging.getLogger(__name__)
+
+WALKING_SPEED = 1.4  # Единиц расстояния в минуту (оценка времени маршрута)
+
+
+@dataclass
+class SearchStats:
+    """Счётчики последнего поиска"""
+    method: str = ''
+    settled: int = 0  # Узлов извлечено из кучи (окончательно)
+    pushed: int = 0  # Записей добавлено в кучу
+    reason: str = ''  # Почему пути нет (если это известно без поиска)
+
+
+@dataclass
+class ShortestPathTree:
+    """Полное дерево кратчайших путей от одного узла"""
+    start: int
+    closure_key: Optional[tuple]  # Версия закрытий, при которой построено дерево
+    distances: array  # Расстояния от start (inf - недостижим)
+    previous: array  # Предшественники (-1 - корень или недостижим)
+    profile: str = 'default'  # Профиль весов (см. routing_profiles)
+
+
+@dataclass
+class FacilityTable:
+    """Ближайший объект заданного типа для каждого узла"""
+    node_type: str
+    closure_key: Optional[tuple]  # Версия закрытий, при которой построена таблица
+    distances: array  # Расстояние до ближайшего объекта (inf - недостижим)
+    facility: array  # Индекс ближайшего объекта (-1 - нет)
+    following: array  # Следующий узел на пути к объекту (-1 - сам объект)
+
+
+class RoutingEngine:
+    """Движок поиска маршрутов, строится один раз на здание"""
+
+    METHODS = ('dijkstra', 'astar', 'bidirectional', 'bidirectional_astar', 'hierarchical', 'ch', 'alt', 'oracle', 'auto')
+    BIDIRECTIONAL_MIN_NODES = 2000  # С какого размера графа 'auto' выбирает двунаправленный поиск
+    ALT_MIN_NODES = 1000  # С какого размера графа 'auto' выбирает ALT (если ориентиры посчитаны)
+
+    def __init__(self, graph: CompiledGraph):
+        """
+        Инициализация движка
+
+        Args:
+            graph: Скомпилированный граф здания
+        """
+        self.graph = graph
+        self._overlay: Optional[ClosureOverlay] = None
+        self._heuristic_params: Optional[Tuple[float, float]] = None
+        self._hierarchy: Optional[Tuple[tuple, FloorHierarchy]] = None
+        self.contraction_hierarchy: Optional[ContractionHierarchy] = None
+        self.distance_oracle: Optional[DistanceOracle] = None
+        self._tree: Optional[ShortestPathTree] = None
+        self._facility_tables: Dict[str, FacilityTable] = {}
+        self._components: Dict[tuple, ComponentIndex] = {}  # (версия закрытий, профиль) -> компоненты
+        self._alternatives: Optional[Tuple[tuple, KShortestPaths]] = None  # (цель, закрытия, профиль)
+        self._timeline: Optional[Tuple[frozenset, ClosureTimeline]] = None  # (набор закрытий со сроками)
+        self._last_query: Optional[tuple] = None  # (старт, версия закрытий, профиль) прошлого запроса
+        self.last_stats = SearchStats()
+        logger.info(f"Routing engine ready: {graph.node_count} nodes, {graph.edge_count} edges")
+
+    @classmethod
+    def from_edges(cls, edges: List[GraphEdge],
+                   node_ids: Optional[Iterable[str]] = None) -> 'RoutingEngine':
+        """
+        Построить движок из списка рёбер
+
+        Args:
+            edges: Список рёбер графа
+            node_ids: ID узлов графа (по умолчанию - все концы рёбер)
+
+        Returns:
+            Готовый RoutingEngine
+        """
+        return cls(CompiledGraph.from_edges(edges, node_ids))
+
+    @classmethod
+    def from_nodes(cls, nodes: List[dict]) -> 'RoutingEngine':
+        """
+        Построить движок напрямую из списка узлов
+
+        Args:
+            nodes: Список узлов с координатами
+
+        Returns:
+            Готовый RoutingEngine
+        """
+        return cls(CompiledGraph.from_nodes(nodes))
+
+    def has_node(self, node_id: str) -> bool:
+        """Проверить есть ли узел в графе"""
+        return self.graph.has_node(node_id)
+
+    def closure_overlay(self, closed_edges: Iterable[Tuple[str, str]] = (),
+                        closed_nodes: Iterable[str] = ()) -> ClosureOverlay:
+        """
+        Получить маску закрытий для этого графа
+
+        Маска пересоздаётся только при изменении набора закрытий,
+        сам граф не перестраивается никогда.
+
+        Args:
+            closed_edges: Закрытые рёбра (from_id, to_id)
+            closed_nodes: ID закрытых узлов
+
+        Returns:
+            ClosureOverlay
+        """
+        closed_edges = frozenset((str(a), str(b)) for a, b in closed_edges)
+        closed_nodes = frozenset(str(node_id) for node_id in closed_nodes)
+        overlay = self._overlay
+        if overlay is None or overlay.key != (closed_edges, closed_nodes):
+            overlay = ClosureOverlay(self.graph, closed_edges, closed_nodes)
+            self._overlay = overlay
+        return overlay
+
+    def find_path(self, start_id: str, end_id: str,
+                  closures: Optional[ClosureOverlay] = None,
+                  method: str = 'dijkstra',
+                  reuse_tree: bool = False,
+                  profile: str = 'default') -> Optional[Tuple[List[str], float]]:
+        """
+        Найти кратчайший путь (Dijkstra или A* на бинарной куче)
+
+        Используется ленивое удаление: устаревшие записи кучи пропускаются,
+        поиск останавливается как только целевой узел извлечён из кучи.
+        Счётчики поиска сохраняются в last_stats.
+
+        С reuse_tree=True, если старт и закрытия совпадают с прошлым
+        запросом (пользователь перебирает цели), строится полное дерево
+        кратчайших путей, и следующие цели от того же старта отвечаются
+        восстановлением пути без поиска (см. shortest_path_tree).
+
+        Args:
+            start_id: ID стартового узла
+            end_id: ID конечного узла
+            closures: Маска закрытых рёбер и узлов (опционально)
+            method: 'dijkstra' (на корзинах Dial, если граф собран с
+                priority_queue='buckets'), 'astar' (A* с эвристикой по этажам),
+                'bidirectional', 'bidirectional_astar', 'hierarchical'
+                (этажи + порталы, см. FloorHierarchy), 'ch' (Contraction
+                Hierarchies, при закрытиях - обычный поиск), 'alt' (A* с
+                ориентирами, см. LandmarkTable), 'oracle' (таблица всех пар,
+                при закрытиях - обычный поиск) или 'auto'
+                (выбор по размеру графа, см. select_method)
+            reuse_tree: Переиспользовать дерево кратчайших путей от старта
+            profile: Профиль весов ('default', 'avoid_stairs',
+                'elevator_only'); предрасчёты 'ch', 'oracle' и
+                'hierarchical' сделаны для весов по умолчанию, при другом
+                профиле используется обычный поиск
+
+        Если старт и цель в разных компонентах связности (с учётом
+        закрытий и профиля, см. component_index), None возвращается без
+        поиска, а причина записывается в last_stats.reason.
+
+        Returns:
+            Кортеж (путь как список ID, общее расстояние) или None если пути нет
+        """
+        # Ранние отказы ниже не должны оставлять причину прошлого запроса
+        self.last_stats = SearchStats()
+        start = self.graph.to_index(start_id)
+        end = self.graph.to_index(end_id)
+        if start is None or end is None:
+            return None
+        if closures is not None and (closures.node_mask[start] or closures.node_mask[end]):
+            return None
+        if start == end:
+            return [start_id], 0.0
+        reason = self._unreachable_reason(start, end, closures, profile)
+        if reason is not None:
+            self.last_stats = SearchStats(method='components', reason=reason)
+            logger.info(f"No route from {start_id} to {end_id}: {reason}")
+            return None
+
+        weights = self.graph.profile_weights(profile)
+        if reuse_tree:
+            closure_key = self._closure_key(closures)
+            query = (start, closure_key, profile)
+            if self._last_query == query and (self._tree is None or self._tree_key() != query):
+                self._build_tree(start, closures, closure_key, profile)
+            self._last_query = query
+            if self._tree is not None and self._tree_key() == query:
+                self.last_stats = SearchStats(method='tree')
+                return self._path_from_tree(self._tree, end)
+
+        has_closures = closures is not None and not closures.is_empty()
+        if method in ('ch', 'oracle') and has_closures:
+            # Иерархия и таблица всех пар статичны и закрытий не учитывают
+            method = 'auto'
+        if method in ('ch', 'oracle', 'hierarchical') and profile != 'default':
+            method = 'auto'
+        if method == 'auto':
+            method = self.select_method(closures, profile)
+        # Веса профиля не меньше весов по умолчанию, поэтому эвристики,
+        # выведенные из графа, остаются допустимыми
+        if method == 'dijkstra' and self.graph.priority_queue == 'buckets':
+            result, settled, pushed = dial_search(self.graph, start, end, weights,
+                                                  self.graph.integer_weights(profile), closures)
+            self.last_stats = SearchStats(method=method, settled=settled, pushed=pushed)
+        elif method == 'dijkstra':
+            result = self._search(start, end, closures, None, method, weights)
+        elif method == 'astar':
+            result = self._search(start, end, closures, self._floor_aware_heuristic(end), method, weights)
+        elif method == 'alt':
+            result = self._search(start, end, closures, self._alt_heuristic(start, end), method, weights)
+        elif method == 'bidirectional':
+            result = self._bidirectional_search(start, end, closures, None, method, weights)
+        elif method == 'bidirectional_astar':
+            result = self._bidirectional_search(
+                start, end, closures, self._average_potential(start, end), method, weights
+            )
+        elif method == 'hierarchical':
+            hierarchy = self.floor_hierarchy(closures)
+            result = hierarchy.find_path(start, end)
+            self.last_stats = SearchStats(method=method, settled=hierarchy.last_settled)
+        elif method == 'oracle':
+            if self.distance_oracle is None:
+                raise ValueError("Distance oracle is not attached to the engine")
+            result = self.distance_oracle.find_path(start, end)
+            self.last_stats = SearchStats(method=method)
+        elif method == 'ch':
+            if self.contraction_hierarchy is None:
+                raise ValueError("Contraction hierarchy is not attached to the engine")
+            result = self.contraction_hierarchy.query(start, end)
+            self.last_stats = SearchStats(method=method, settled=self.contraction_hierarchy.last_settled)
+        else:
+            raise ValueError(f"Unknown routing method: {method}")
+
+        if result is None:
+            return None
+        path, distance = result
+        return [self.graph.to_id(index) for index in path], distance
+
+    def find_paths(self, start_id: str, end_ids: Iterable[str],
+                   closures: Optional[ClosureOverlay] = None,
+                   profile: str = 'default') -> Dict[str, Optional[Tuple[List[str], float]]]:
+        """
+        Найти пути от одного старта до нескольких целей одним поиском
+
+        Dijkstra останавливается, когда все достижимые цели извлечены из
+        кучи. Если сохранено дерево от того же старта и при тех же
+        закрытиях, поиск не выполняется.
+
+        Args:
+            start_id: ID стартового узла
+            end_ids: ID целевых узлов
+            closures: Маска закрытых рёбер и узлов (опционально)
+            profile: Профиль весов
+
+        Returns:
+            {ID цели: (путь как список ID, расстояние) или None}
+        """
+        end_ids = list(end_ids)
+        results: Dict[str, Optional[Tuple[List[str], float]]] = {end_id: None for end_id in end_ids}
+        graph = self.graph
+        start = graph.to_index(start_id)
+        if start is None or (closures is not None and closures.node_mask[start]):
+            return results
+
+        components = self.component_index(closures, profile)
+        targets = {}
+        for end_id in end_ids:
+            end = graph.to_index(end_id)
+            if end is not None and components.connected(start, end):
+                targets[end_id] = end
+        if not targets:
+            self.last_stats = SearchStats(method='components', reason='no target in the start component')
+            return results
+
+        if self._tree is not None and self._tree_key() == (start, self._closure_key(closures), profile):
+            self.last_stats = SearchStats(method='tree')
+            for end_id, end in targets.items():
+                results[end_id] = self._path_from_tree(self._tree, end)
+            return results
+
+        offsets, weights = graph.offsets, graph.profile_weights(profile)
+        graph_targets = graph.targets
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method='one_to_many', pushed=1)
+        self.last_stats = stats
+
+        distances = {start: 0.0}
+        previous = {start: -1}
+        settled = bytearray(graph.node_count)
+        remaining = set(targets.values())
+        heap = [(0.0, start)]
+        while heap and remaining:
+            distance, current = heapq.heappop(heap)
+            if settled[current]:
+                continue  # Устаревшая запись
+            settled[current] = 1
+            stats.settled += 1
+            remaining.discard(current)
+
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = graph_targets[position]
+                if settled[neighbor]:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    stats.pushed += 1
+
+        for end_id, end in targets.items():
+            if settled[end]:
+                path = self._reconstruct_path(previous, end)
+                results[end_id] = [graph.to_id(index) for index in path], distances[end]
+        return results
+
+    def reachable_within(self, start_id: str, max_distance: Optional[float] = None,
+                         max_minutes: Optional[float] = None,
+                         closures: Optional[ClosureOverlay] = None,
+                         profile: str = 'default') -> Dict[str, float]:
+        """
+        Все узлы, достижимые от старта в пределах бюджета (изохрона)
+
+        Dijkstra не добавляет в кучу узлы дальше бюджета, поэтому поиск
+        раскрывает только достижимую область. Бюджет по времени
+        переводится в расстояние по WALKING_SPEED (как оценка времени
+        маршрута).
+
+        Args:
+            start_id: ID стартового узла (например, входа)
+            max_distance: Бюджет по расстоянию
+            max_minutes: Бюджет по времени в минутах (вместо расстояния)
+            closures: Маска закрытий
+            profile: Профиль весов
+
+        Returns:
+            {ID узла: стоимость} - расстояние, а при max_minutes - минуты;
+            пустой, если старт недоступен
+        """
+        if (max_distance is None) == (max_minutes is None):
+            raise ValueError("Exactly one of max_distance and max_minutes must be given")
+        budget = max_distance if max_distance is not None else max_minutes * WALKING_SPEED
+        graph = self.graph
+        start = graph.to_index(start_id)
+        if start is None or budget < 0 or (closures is not None and closures.node_mask[start]):
+            return {}
+
+        offsets, targets, weights = graph.offsets, graph.targets, graph.profile_weights(profile)
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method='isochrone', pushed=1)
+        self.last_stats = stats
+
+        distances = {start: 0.0}
+        settled = bytearray(graph.node_count)
+        heap = [(0.0, start)]
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if settled[current]:
+                continue  # Устаревшая запись
+            settled[current] = 1
+            stats.settled += 1
+
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                if settled[neighbor]:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance <= budget and new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    stats.pushed += 1
+
+        scale = 1.0 if max_distance is not None else 1.0 / WALKING_SPEED
+        return {graph.to_id(index): distance * scale for index, distance in distances.items()}
+
+    def dynamic_route(self, start_id: str, end_id: str,
+                      closures: Optional[ClosureOverlay] = None,
+                      profile: str = 'default') -> Optional[DynamicRoute]:
+        """
+        Маршрут для активной навигации, который чинится при смене закрытий
+
+        Начальный путь ищется LPA* с эвристикой по этажам; затем
+        DynamicRoute.update(новая маска) пересчитывает только затронутую
+        часть (см. DynamicRoute). Счётчики начального поиска - в last_stats.
+
+        Args:
+            start_id: ID стартового узла
+            end_id: ID конечного узла
+            closures: Текущая маска закрытий
+            profile: Профиль весов
+
+        Returns:
+            DynamicRoute или None, если узла нет в графе
+        """
+        start = self.graph.to_index(start_id)
+        end = self.graph.to_index(end_id)
+        if start is None or end is None:
+            return None
+        route = DynamicRoute(self.graph, start, end, closures, self.graph.profile_weights(profile),
+                             self._floor_aware_heuristic(end))
+        self.last_stats = SearchStats(method='lpa', settled=route.last_expanded)
+        return route
+
+    def closure_timeline(self, closures: Iterable) -> ClosureTimeline:
+        """
+        Расписание закрытий по времени для этого графа (см. ClosureTimeline)
+
+        Строится один раз на набор закрытий с их сроками и
+        переиспользуется, пока набор не изменится.
+
+        Args:
+            closures: Закрытия (RouteClosure), например
+                RouteClosureService.closures.values()
+        """
+        closures = list(closures)
+        key = frozenset(
+            (closure.closure_id, closure.active, closure.from_id, closure.to_id,
+             closure.created_at, closure.scheduled_until)
+            for closure in closures
+        )
+        if self._timeline is None or self._timeline[0] != key:
+            self._timeline = (key, ClosureTimeline(self.graph, closures))
+        return self._timeline[1]
+
+    def find_path_at(self, start_id: str, end_id: str, departure: datetime,
+                     timeline: ClosureTimeline, profile: str = 'default',
+                     max_wait_minutes: Optional[float] = None) -> Optional[Tuple[List[str], float, datetime]]:
+        """
+        Найти маршрут при выходе в момент departure
+
+        Каждое ребро проверяется по расписанию закрытий в момент, когда
+        пешеход (WALKING_SPEED) до него дойдёт: закрытие, которое к этому
+        времени истечёт, не мешает, а начавшееся - мешает. Если быстрее
+        дождаться открытия, чем обойти, маршрут включает ожидание. Для
+        планирования на будущее не нужно подменять текущее время.
+        Счётчики - в last_stats.
+
+        Args:
+            start_id: ID стартового узла
+            end_id: ID конечного узла
+            departure: Момент выхода
+            timeline: Расписание закрытий (см. closure_timeline)
+            profile: Профиль весов
+            max_wait_minutes: Максимальное ожидание на одном узле
+                (None - без ограничения, 0 - не ждать)
+
+        Returns:
+            Кортеж (путь как список ID, расстояние, момент прибытия) или
+            None, если дойти нельзя
+        """
+        self.last_stats = SearchStats()
+        start = self.graph.to_index(start_id)
+        end = self.graph.to_index(end_id)
+        if start is None or end is None:
+            return None
+        if timeline.is_node_closed(start, departure.timestamp()):
+            return None
+        if start == end:
+            return [start_id], 0.0, departure
+        # Закрытия только убирают рёбра, поэтому разные компоненты без
+        # закрытий - отказ без поиска в любой момент
+        reason = self._unreachable_reason(start, end, None, profile)
+        if reason is not None:
+            self.last_stats = SearchStats(method='components', reason=reason)
+            return None
+
+        max_wait = math.inf if max_wait_minutes is None else max_wait_minutes * 60.0
+        result = timeline.search(start, end, departure.timestamp(), self.graph.profile_weights(profile),
+                                 60.0 / WALKING_SPEED, max_wait)
+        self.last_stats = SearchStats(method='time_dependent', settled=timeline.last_settled,
+                                      pushed=timeline.last_pushed)
+        if result is None:
+            return None
+        path, distance, arrival = result
+        return ([self.graph.to_id(index) for index in path], distance,
+                datetime.fromtimestamp(arrival, departure.tzinfo))
+
+    def find_alternatives(self, start_id: str, end_id: str, k: int = 3,
+                          closures: Optional[ClosureOverlay] = None,
+                          profile: str = 'default') -> List[Tuple[List[str], float]]:
+        """
+        Найти до k кратчайших путей без циклов (альтернативные маршруты)
+
+        Алгоритм Йена (см. KShortestPaths). Обратное дерево до цели и кэш
+        ответвлений сохраняются, пока не сменятся цель, закрытия или
+        профиль, поэтому повторный запрос (например, с новым стартом или
+        большим k) почти не требует поиска. Счётчики - в last_stats.
+
+        Args:
+            start_id: ID стартового узла
+            end_id: ID конечного узла
+            k: Сколько путей нужно
+            closures: Маска закрытий
+            profile: Профиль весов
+
+        Returns:
+            Список (путь как список ID, расстояние) по возрастанию
+            расстояния; первый - кратчайший путь. Пустой, если пути нет
+        """
+        self.last_stats = SearchStats()
+        start = self.graph.to_index(start_id)
+        end = self.graph.to_index(end_id)
+        if start is None or end is None:
+            return []
+        if closures is not None and (closures.node_mask[start] or closures.node_mask[end]):
+            return []
+        if start == end:
+            return [([start_id], 0.0)]
+        reason = self._unreachable_reason(start, end, closures, profile)
+        if reason is not None:
+            self.last_stats = SearchStats(method='components', reason=reason)
+            return []
+
+        key = (end, self._closure_key(closures), profile)
+        settled = pushed = 0
+        if self._alternatives is None or self._alternatives[0] != key:
+            search = KShortestPaths(self.graph, end, closures, self.graph.profile_weights(profile))
+            self._alternatives = (key, search)
+        else:
+            search = self._alternatives[1]
+            settled, pushed = search.settled, search.pushed
+        paths = search.paths(start, k)
+        self.last_stats = SearchStats(method='yen', settled=search.settled - settled,
+                                      pushed=search.pushed - pushed)
+        return [([self.graph.to_id(index) for index in path], distance) for path, distance in paths]
+
+    def find_pareto_routes(self, start_id: str, end_id: str,
+                           closures: Optional[ClosureOverlay] = None,
+                           profile: str = 'default',
+                           max_labels: int = ParetoSearch.MAX_LABELS) -> List[ParetoRoute]:
+        """
+        Найти маршруты, не доминирующие друг друга по расстоянию, сменам
+        этажей и лестницам
+
+        Один поиск даёт и кратчайший маршрут, и маршрут с наименьшим
+        числом лестниц (см. ParetoSearch). Число меток ограничено, поэтому
+        на больших зданиях множество может быть неполным; кратчайший
+        маршрут в нём есть всегда. Счётчики - в last_stats.
+
+        Args:
+            start_id: ID стартового узла
+            end_id: ID конечного узла
+            closures: Маска закрытий
+            profile: Профиль весов (расстояние считается в его весах)
+            max_labels: Ограничение числа меток поиска
+
+        Returns:
+            Список ParetoRoute (пути как списки ID) по возрастанию
+            расстояния. Пустой, если пути нет
+        """
+        self.last_stats = SearchStats()
+        start = self.graph.to_index(start_id)
+        end = self.graph.to_index(end_id)
+        if start is None or end is None:
+            return []
+        if start != end:
+            reason = self._unreachable_reason(start, end, closures, profile)
+            if reason is not None:
+                self.last_stats = SearchStats(method='components', reason=reason)
+                return []
+
+        search = ParetoSearch(self.graph, closures, self.graph.profile_weights(profile),
+                              self._floor_aware_heuristic(end), max_labels=max_labels)
+        routes = search.run(start, end)
+        self.last_stats = SearchStats(method='pareto', settled=search.settled, pushed=search.pushed)
+        for route in routes:
+            route.path = [self.graph.to_id(index) for index in route.path]
+        return routes
+
+    def find_tour(self, start_id: str, stop_ids: Iterable[str],
+                  closures: Optional[ClosureOverlay] = None,
+                  profile: str = 'default',
+                  return_to_start: bool = False) -> Optional[Tuple[List[str], float, List[str]]]:
+        """
+        Маршрут обхода нескольких точек (обход помещений персоналом)
+
+        Матрица расстояний между стартом и точками берётся из таблицы
+        всех пар (если подключена и применима) или строится поиском от
+        каждой точки до всех остальных (см. find_paths), порядок обхода -
+        ближайший сосед с улучшениями 2-opt/Or-opt (см. plan_tour). Пути
+        между соседними точками склеиваются в один. Точки, недостижимые
+        от старта, пропускаются.
+
+        Args:
+            start_id: ID стартового узла
+            stop_ids: ID точек обхода (повторы и старт игнорируются)
+            closures: Маска закрытий
+            profile: Профиль весов
+            return_to_start: Вернуться в старт в конце
+
+        Returns:
+            Кортеж (путь как список ID, общее расстояние, порядок точек)
+            или None, если старт недоступен или обход невозможен
+        """
+        if not self.graph.has_node(start_id) or (
+                closures is not None and closures.node_mask[self.graph.to_index(start_id)]):
+            return None
+        stops = [start_id]
+        for stop_id in dict.fromkeys(str(stop_id) for stop_id in stop_ids):
+            if stop_id != start_id:
+                stops.append(stop_id)
+
+        first_row = self.find_paths(start_id, stops[1:], closures, profile)
+        settled = self.last_stats.settled
+        skipped = [stop_id for stop_id in stops[1:] if first_row[stop_id] is None]
+        if skipped:
+            logger.warning(f"Tour stops unreachable from {start_id}: {skipped}")
+            stops = [stop_id for stop_id in stops if stop_id not in skipped]
+        first_row[start_id] = ([start_id], 0.0)
+
+        # Строки матрицы: таблица всех пар, если применима, иначе поиск
+        # от каждой точки до всех остальных
+        oracle = self.distance_oracle
+        if oracle is not None and self._closure_key(closures) is None and profile == 'default':
+            rows = None
+            matrix = [[oracle.distance(source_id, target_id) for target_id in stops] for source_id in stops]
+            matrix = [[float('inf') if value is None else value for value in row] for row in matrix]
+        else:
+            rows = [first_row]
+            for source_id in stops[1:]:
+                rows.append(self.find_paths(source_id, stops, closures, profile))
+                settled += self.last_stats.settled
+            matrix = [[result[1] if result is not None else float('inf')
+                       for result in (row[target_id] for target_id in stops)] for row in rows]
+
+        order, distance = plan_tour(matrix, return_to_start)
+        if distance == float('inf'):
+            self.last_stats = SearchStats(method='tour', settled=settled)
+            return None
+        if return_to_start:
+            order = order + [0]
+        path = [start_id]
+        for a, b in zip(order, order[1:]):
+            if rows is None:
+                leg = self.find_path(stops[a], stops[b], method='oracle')
+            else:
+                leg = rows[a][stops[b]]
+            path.extend(leg[0][1:])
+        self.last_stats = SearchStats(method='tour', settled=settled)
+        return path, distance, [stops[i] for i in order[1:] if i != 0]
+
+    def nearest_of_type(self, start_id: str, node_type: str,
+                        closures: Optional[ClosureOverlay] = None,
+                        exclude_start: bool = False) -> Optional[Tuple[List[str], float]]:
+        """
+        Найти путь до ближайшего узла заданного типа (лифт, лестница, выход)
+
+        Ответ берётся из таблицы ближайших объектов (см.
+        nearest_facility_table), поэтому после первого запроса при тех же
+        закрытиях поиск не выполняется.
+
+        Args:
+            start_id: ID стартового узла
+            node_type: Тип узла ('Elevator', 'Staircase', ...)
+            closures: Маска закрытых рёбер и узлов (опционально)
+            exclude_start: Не считать ответом сам старт, если он этого
+                типа (тогда ищется ближайший из остальных, см. find_paths)
+
+        Returns:
+            Кортеж (путь как список ID, расстояние) или None
+        """
+        start = self.graph.to_index(start_id)
+        if start is None or (closures is not None and closures.node_mask[start]):
+            return None
+        table = self.nearest_facility_table(node_type, closures)
+        if exclude_start and table.facility[start] == start:
+            others = [self.graph.to_id(index) for index, index_type in enumerate(self.graph.node_types)
+                      if index_type == node_type and index != start]
+            found = [result for result in self.find_paths(start_id, others, closures).values() if result]
+            return min(found, key=lambda result: result[1]) if found else None
+        distance = table.distances[start]
+        if distance == float('inf'):
+            return None
+
+        path = []
+        node = start
+        while node != -1:
+            path.append(self.graph.to_id(node))
+            node = table.following[node]
+        return path, distance
+
+    def nearest_facility_table(self, node_type: str,
+                               closures: Optional[ClosureOverlay] = None) -> FacilityTable:
+        """
+        Получить таблицу ближайших объектов типа node_type
+
+        Строится одним многоисточниковым Dijkstra по входящим рёбрам от
+        всех открытых узлов типа, хранится по типу и пересчитывается при
+        смене набора закрытий.
+
+        Args:
+            node_type: Тип узла
+            closures: Маска закрытий
+
+        Returns:
+            FacilityTable
+        """
+        graph = self.graph
+        if graph.node_types is None:
+            raise ValueError("Node types are unknown for this graph")
+        closure_key = self._closure_key(closures)
+        table = self._facility_tables.get(node_type)
+        if table is not None and table.closure_key == closure_key:
+            return table
+
+        offsets, sources, positions = graph.reverse_csr()
+        weights = graph.weights
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method='facility')
+
+        distances = array('d', [float('inf')] * graph.node_count)
+        facility = array('i', [-1] * graph.node_count)
+        following = array('i', [-1] * graph.node_count)
+        heap = []
+        for index, index_type in enumerate(graph.node_types):
+            if index_type == node_type and not (node_mask is not None and node_mask[index]):
+                distances[index] = 0.0
+                facility[index] = index
+                heap.append((0.0, index))
+        heapq.heapify(heap)
+        stats.pushed = len(heap)
+
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distance > distances[current]:
+                continue  # Устаревшая запись
+            stats.settled += 1
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = sources[slot]
+                position = positions[slot]
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    facility[neighbor] = facility[current]
+                    following[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    stats.pushed += 1
+
+        self.last_stats = stats
+        table = FacilityTable(node_type, closure_key, distances, facility, following)
+        self._facility_tables[node_type] = table
+        logger.info(f"Nearest-facility table for {node_type}: {stats.settled} nodes")
+        return table
+
+    def shortest_path_tree(self, start_id: str, closures: Optional[ClosureOverlay] = None,
+                           profile: str = 'default') -> Optional[ShortestPathTree]:
+        """
+        Получить полное дерево кратчайших путей от узла
+
+        Хранится одно последнее дерево; оно переиспользуется, пока не
+        сменятся старт, набор закрытий или профиль.
+
+        Args:
+            start_id: ID стартового узла
+            closures: Маска закрытий
+            profile: Профиль весов
+
+        Returns:
+            ShortestPathTree или None, если узла нет или он закрыт
+        """
+        start = self.graph.to_index(start_id)
+        if start is None or (closures is not None and closures.node_mask[start]):
+            return None
+        closure_key = self._closure_key(closures)
+        if self._tree is None or self._tree_key() != (start, closure_key, profile):
+            self._build_tree(start, closures, closure_key, profile)
+        return self._tree
+
+    def path_from_tree(self, tree: ShortestPathTree, end_id: str) -> Optional[Tuple[List[str], float]]:
+        """
+        Восстановить путь до end_id по дереву кратчайших путей
+
+        Returns:
+            Кортеж (путь как список ID, общее расстояние) или None
+        """
+        end = self.graph.to_index(end_id)
+        if end is None:
+            return None
+        return self._path_from_tree(tree, end)
+
+    def _path_from_tree(self, tree: ShortestPathTree, end: int) -> Optional[Tuple[List[str], float]]:
+        """Путь (ID) и расстояние до индекса end по дереву"""
+        distance = tree.distances[end]
+        if distance == float('inf'):
+            return None
+        path = self._reconstruct_path(tree.previous, end)
+        return [self.graph.to_id(index) for index in path], distance
+
+    def _tree_key(self) -> tuple:
+        """Ключ (старт, версия закрытий, профиль) сохранённого дерева"""
+        return self._tree.start, self._tree.closure_key, self._tree.profile
+
+    @staticmethod
+    def _closure_key(closures: Optional[ClosureOverlay]) -> Optional[tuple]:
+        """Версия закрытий (None - закрытий нет)"""
+        if closures is None or closures.is_empty():
+            return None
+        return closures.key
+
+    def _build_tree(self, start: int, closures: Optional[ClosureOverlay],
+                    closure_key: Optional[tuple], profile: str = 'default'):
+        """Полный Dijkstra от start без ранней остановки"""
+        graph = self.graph
+        offsets, targets, weights = graph.offsets, graph.targets, graph.profile_weights(profile)
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method='tree', pushed=1)
+
+        distances = array('d', [float('inf')] * graph.node_count)
+        previous = array('i', [-1] * graph.node_count)
+        distances[start] = 0.0
+        heap = [(0.0, start)]
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distance > distances[current]:
+                continue  # Устаревшая запись
+            stats.settled += 1
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    stats.pushed += 1
+
+        self.last_stats = stats
+        self._tree = ShortestPathTree(start, closure_key, distances, previous, profile)
+
+    def component_index(self, closures: Optional[ClosureOverlay] = None,
+                        profile: str = 'default') -> ComponentIndex:
+        """
+        Компоненты связности с учётом закрытий и профиля
+
+        Без закрытий и с профилем по умолчанию - индекс, посчитанный при
+        сборке графа. Иначе индекс строится заново (union-find) один раз на
+        версию закрытий; индексы прошлых версий отбрасываются.
+
+        Args:
+            closures: Маска закрытий
+            profile: Профиль весов (рёбра с бесконечным весом не связывают)
+
+        Returns:
+            ComponentIndex
+        """
+        closure_key = self._closure_key(closures)
+        if closure_key is None and profile == 'default':
+            return self.graph.component_index()
+        key = (closure_key, profile)
+        components = self._components.get(key)
+        if components is None:
+            self._components = {k: v for k, v in self._components.items() if k[0] == closure_key}
+            components = ComponentIndex.build(self.graph, closures if closure_key else None,
+                                              self.graph.profile_weights(profile) if profile != 'default' else None)
+            self._components[key] = components
+        return components
+
+    def _unreachable_reason(self, start: int, end: int, closures: Optional[ClosureOverlay],
+                            profile: str) -> Optional[str]:
+        """
+        Причина, по которой пути точно нет (None - узлы в одной компоненте)
+
+        Проверка O(1) по готовому индексу; причина уточняется только при отказе.
+        """
+        components = self.component_index(closures, profile)
+        if components.connected(start, end):
+            return None
+
+        if not self.graph.component_index().connected(start, end):
+            cause = 'the building graph has no connection between them'
+        elif profile != 'default' and self.component_index(closures).connected(start, end):
+            cause = f'profile {profile} excludes every connection'
+        else:
+            cause = 'active closures cut them apart'
+        start_size, end_size = components.component_size(start), components.component_size(end)
+        isolated = ' (end node is isolated)' if end_size == 1 else ''
+        return f"different components of {start_size} and {end_size} nodes{isolated}: {cause}"
+
+    def floor_hierarchy(self, closures: Optional[ClosureOverlay] = None) -> FloorHierarchy:
+        """
+        Получить иерархию этаж/портал (пересчитывается при смене закрытий)
+
+        Args:
+            closures: Маска закрытий
+
+        Returns:
+            FloorHierarchy
+        """
+        key = closures.key if closures is not None and not closures.is_empty() else None
+        if self._hierarchy is None or self._hierarchy[0] != key:
+            self._hierarchy = (key, FloorHierarchy(self.graph, closures if key else None))
+        return self._hierarchy[1]
+
+    def attach_contraction_hierarchy(self, hierarchy: Optional[ContractionHierarchy] = None
+                                     ) -> ContractionHierarchy:
+        """
+        Подключить Contraction Hierarchies (построить, если не передана)
+
+        Args:
+            hierarchy: Готовая иерархия (например, загруженная с сервера)
+
+        Returns:
+            ContractionHierarchy
+        """
+        if hierarchy is None:
+            hierarchy = ContractionHierarchy.build(self.graph)
+        elif hierarchy.node_ids != self.graph.node_ids:
+            raise ValueError("Contraction hierarchy was built for a different node set")
+        self.contraction_hierarchy = hierarchy
+        return hierarchy
+
+    def attach_distance_oracle(self, oracle: Optional[DistanceOracle] = None) -> DistanceOracle:
+        """
+        Подключить таблицу расстояний всех пар (построить, если не передана)
+
+        Args:
+            oracle: Готовая таблица (например, отображённая из кэша)
+
+        Returns:
+            DistanceOracle
+        """
+        if oracle is None:
+            oracle = DistanceOracle.build(self.graph)
+        elif oracle.node_ids != self.graph.node_ids:
+            raise ValueError("Distance oracle was built for a different node set")
+        self.distance_oracle = oracle
+        return oracle
+
+    def select_method(self, closures: Optional[ClosureOverlay] = None, profile: str = 'default') -> str:
+        """
+        Выбрать метод поиска по размеру графа
+
+        Подключённые таблица всех пар и иерархия CH используются, пока
+        нет закрытий и выбран профиль по умолчанию. Если граф собран с
+        очередью 'buckets', выбирается Dijkstra на корзинах Dial: очередь
+        задана явно при сборке (см. CompiledGraph.use_priority_queue). ALT
+        выбирается на больших графах с посчитанными ориентирами (на малых
+        выбор ориентиров для запроса не окупается).
+
+        На небольших графах накладные расходы двух фронтов не окупаются.
+        Если известны координаты, однонаправленный A* раскрывает меньше
+        узлов, чем двунаправленный с усреднёнными потенциалами (см.
+        benchmark_routing.py), поэтому двунаправленный Dijkstra выбирается
+        для больших графов без координат (например, загруженных из кэша).
+        """
+        no_closures = (closures is None or closures.is_empty()) and profile == 'default'
+        if self.distance_oracle is not None and no_closures:
+            return 'oracle'
+        if self.contraction_hierarchy is not None and no_closures:
+            return 'ch'
+        if self.graph.priority_queue == 'buckets':
+            return 'dijkstra'
+        if self.graph.landmarks is not None and self.graph.node_count >= self.ALT_MIN_NODES:
+            return 'alt'
+        if self.graph.has_coordinates:
+            return 'astar'
+        if self.graph.node_count >= self.BIDIRECTIONAL_MIN_NODES:
+            return 'bidirectional'
+        return 'dijkstra'
+
+    def _search(self, start: int, end: int, closures: Optional[ClosureOverlay] = None,
+                heuristic: Optional[Callable[[int], float]] = None,
+                method: str = 'dijkstra', weights: Optional[array] = None) -> Optional[Tuple[List[int], float]]:
+        """
+        Dijkstra/A* по индексам узлов
+
+        Эвристика должна быть согласованной (consistent), тогда узел,
+        извлечённый из кучи, окончательный и повторно не раскрывается.
+        """
+        graph = self.graph
+        offsets = graph.offsets
+        targets = graph.targets
+        weights = weights if weights is not None else graph.weights
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method=method, pushed=1)
+        self.last_stats = stats
+
+        distances = {start: 0.0}
+        previous = {start: -1}
+        settled = bytearray(graph.node_count)
+        heap = [(heuristic(start) if heuristic else 0.0, start)]
+
+        while heap:
+            _, current = heapq.heappop(heap)
+            if settled[current]:
+                continue  # Устаревшая запись
+            settled[current] = 1
+            stats.settled += 1
+            distance = distances[current]
+
+            if current == end:
+                return self._reconstruct_path(previous, end), distance
+
+            for position in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[position]
+                if settled[neighbor]:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    priority = new_distance + heuristic(neighbor) if heuristic else new_distance
+                    heapq.heappush(heap, (priority, neighbor))
+                    stats.pushed += 1
+
+        return None  # Нет пути
+
+    def _bidirectional_search(self, start: int, end: int,
+                              closures: Optional[ClosureOverlay] = None,
+                              potential: Optional[Callable[[int], float]] = None,
+                              method: str = 'bidirectional',
+                              weights: Optional[array] = None) -> Optional[Tuple[List[int], float]]:
+        """
+        Двунаправленный Dijkstra/A* по индексам узлов
+
+        Прямой фронт идёт по CSR, обратный - по обратному CSR. С потенциалом
+        p(v) ключи фронтов равны d_f(v) + p(v) и d_r(v) - p(v) (усреднённые
+        потенциалы, p = (h_t - h_s) / 2, согласованы в обе стороны). В обоих
+        случаях поиск корректно останавливается, когда сумма минимальных
+        ключей фронтов не меньше лучшего найденного пути.
+        """
+        graph = self.graph
+        offsets, targets = graph.offsets, graph.targets
+        weights = weights if weights is not None else graph.weights
+        reverse_offsets, reverse_sources, reverse_positions = graph.reverse_csr()
+        edge_mask = closures.edge_mask if closures is not None else None
+        node_mask = closures.node_mask if closures is not None else None
+        stats = SearchStats(method=method, pushed=2)
+        self.last_stats = stats
+
+        forward_distances = {start: 0.0}
+        backward_distances = {end: 0.0}
+        previous = {start: -1}  # Предшественник на пути от старта
+        following = {end: -1}  # Следующий узел на пути к цели
+        forward_settled = bytearray(graph.node_count)
+        backward_settled = bytearray(graph.node_count)
+        forward_heap = [(potential(start) if potential else 0.0, start)]
+        backward_heap = [(-potential(end) if potential else 0.0, end)]
+        best = float('inf')
+        meeting = -1
+
+        while forward_heap and backward_heap:
+            if forward_heap[0][0] + backward_heap[0][0] >= best:
+                break  # Лучший путь уже не улучшить
+
+            forward = forward_heap[0][0] <= backward_heap[0][0]
+            heap = forward_heap if forward else backward_heap
+            _, current = heapq.heappop(heap)
+            settled = forward_settled if forward else backward_settled
+            if settled[current]:
+                continue  # Устаревшая запись
+            settled[current] = 1
+            stats.settled += 1
+
+            if forward:
+                distances, other_distances, parents = forward_distances, backward_distances, previous
+                edge_range = range(offsets[current], offsets[current + 1])
+            else:
+                distances, other_distances, parents = backward_distances, forward_distances, following
+                edge_range = range(reverse_offsets[current], reverse_offsets[current + 1])
+            distance = distances[current]
+
+            for slot in edge_range:
+                if forward:
+                    position = slot
+                    neighbor = targets[slot]
+                else:
+                    position = reverse_positions[slot]
+                    neighbor = reverse_sources[slot]
+                if settled[neighbor]:
+                    continue
+                if edge_mask is not None and (edge_mask[position] or node_mask[neighbor]):
+                    continue  # Закрытое ребро или узел
+                new_distance = distance + weights[position]
+                if new_distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_distance
+                    parents[neighbor] = current
+                    if potential:
+                        key = new_distance + (potential(neighbor) if forward else -potential(neighbor))
+                    else:
+                        key = new_distance
+                    heapq.heappush(heap, (key, neighbor))
+                    stats.pushed += 1
+
+                    # Встреча фронтов
+                    if neighbor in other_distances:
+                        candidate = new_distance + other_distances[neighbor]
+                        if candidate < best:
+                            best = candidate
+                            meeting = neighbor
+
+            # Узел может сам оказаться уже достигнутым с другой стороны
+            if current in other_distances and distance + other_distances[current] < best:
+                best = distance + other_distances[current]
+                meeting = current
+
+        if meeting == -1:
+            return None  # Нет пути
+
+        path = self._reconstruct_path(previous, meeting)
+        node = following[meeting]
+        while node != -1:
+            path.append(node)
+            node = following[node]
+        return path, best
+
+    def landmark_table(self) -> LandmarkTable:
+        """Таблицы ориентиров графа (строятся при первом обращении)"""
+        if self.graph.landmarks is None:
+            self.graph.landmarks = LandmarkTable.build(self.graph)
+        return self.graph.landmarks
+
+    def _alt_heuristic(self, start: int, end: int) -> Callable[[int], float]:
+        """
+        Эвристика ALT, усиленная эвристикой по этажам
+
+        Максимум двух согласованных эвристик тоже согласован.
+        """
+        landmarks = self.landmark_table().heuristic(start, end)
+        floor_aware = self._floor_aware_heuristic(end)
+        if floor_aware is None:
+            return landmarks
+
+        def heuristic(index: int) -> float:
+            return max(landmarks(index), floor_aware(index))
+
+        return heuristic
+
+    def _average_potential(self, start: int, end: int) -> Optional[Callable[[int], float]]:
+        """Усреднённый потенциал (h_t - h_s) / 2 для двунаправленного A*"""
+        to_end = self._floor_aware_heuristic(end)
+        to_start = self._floor_aware_heuristic(start)
+        if to_end is None or to_start is None:
+            return None
+
+        def potential(index: int) -> float:
+            return (to_end(index) - to_start(index)) / 2
+
+        return potential
+
+    def _floor_aware_heuristic(self, end: int) -> Optional[Callable[[int], float]]:
+        """
+        Эвристика A*: планарное расстояние плюс нижняя граница смены этажей
+
+        h(v) = alpha * |v - t| + per_floor * |floor(v) - floor(t)|.
+        Параметры выводятся из межэтажных рёбер графа (см.
+        _get_heuristic_params), поэтому эвристика допустима и согласована.
+        Без координат узлов возвращает None (обычный Dijkstra).
+        """
+        graph = self.graph
+        if not graph.has_coordinates:
+            return None
+        alpha, per_floor = self._get_heuristic_params()
+        xs, ys, floors = graph.xs, graph.ys, graph.floors
+        target_x, target_y, target_floor = xs[end], ys[end], floors[end]
+
+        def heuristic(index: int) -> float:
+            planar = math.sqrt((xs[index] - target_x) ** 2 + (ys[index] - target_y) ** 2)
+            return alpha * planar + per_floor * abs(floors[index] - target_floor)
+
+        return heuristic
+
+    def _get_heuristic_params(self) -> Tuple[float, float]:
+        """
+        Рассчитать (alpha, per_floor) для эвристики A*
+
+        Рёбра в пределах этажа не короче планарного расстояния. Межэтажное
+        ребро стоит FLOOR_CHANGE_PENALTY * 50/30 за этаж, но его концы
+        могут быть смещены в плане (зона группировки 50 единиц). Для
+        согласованности каждое межэтажное ребро должно покрывать
+        alpha * смещение + per_floor * число этажей, отсюда alpha <= 1
+        и per_floor = min((вес - alpha * смещение) / этажи).
+        """
+        if self._heuristic_params is not None:
+            return self._heuristic_params
+
+        graph = self.graph
+        xs, ys, floors = graph.xs, graph.ys, graph.floors
+        floor_edges = []
+        for source in range(graph.node_count):
+            for position in range(graph.offsets[source], graph.offsets[source + 1]):
+                target = graph.targets[position]
+                floor_delta = abs(floors[source] - floors[target])
+                planar = math.sqrt((xs[source] - xs[target]) ** 2 + (ys[source] - ys[target]) ** 2)
+                if floor_delta:
+                    floor_edges.append((graph.weights[position], planar, floor_delta))
+                elif graph.weights[position] < planar:
+                    # Ребро короче прямой - сужаем планарную часть
+                    floor_edges.append((graph.weights[position], planar, 0))
+
+        alpha = 1.0
+        for weight, planar, _ in floor_edges:
+            if planar > 0:
+                alpha = min(alpha, weight / planar)
+        per_floor = min(
+            ((weight - alpha * planar) / floor_delta
+             for weight, planar, floor_delta in floor_edges if floor_delta),
+            default=0.0
+        )
+        self._heuristic_params = (max(alpha, 0.0), max(per_floor, 0.0))
+        logger.info(f"A* heuristic: alpha={alpha:.3f}, per_floor={per_floor:.1f}")
+        return self._heuristic_params
+
+    @staticmethod
+    def _reconstruct_path(previous: dict, end: int) -> List[int]:
+        """Восстановить путь по таблице предшественников"""
+        path = []
+        node = end
+        while node != -1:
+            path.append(node)
+            node = previous[node]
+        return list(reversed(path))
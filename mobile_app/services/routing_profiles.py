@@ -0,0 +1,62 @@
+"""
+Профили маршрутизации (доступность) как альтернативные веса рёбер
+"""
+from array import array
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = 'default'
+AVOID_STAIRS = 'avoid_stairs'
+ELEVATOR_ONLY = 'elevator_only'
+PROFILES = (DEFAULT_PROFILE, AVOID_STAIRS, ELEVATOR_ONLY)
+
+# Во сколько раз дороже лестничный пролёт в профиле avoid_stairs
+STAIRS_PENALTY_FACTOR = 10.0
+
+
+def is_stair_edge(graph, source: int, target: int) -> bool:
+    """Лестничное ребро: межэтажное, хотя бы один конец - лестница (см. GraphBuilder.is_stair_node)"""
+    if graph.floors is None or graph.stair_nodes is None:
+        return False
+    return graph.floors[source] != graph.floors[target] and bool(
+        graph.stair_nodes[source] or graph.stair_nodes[target])
+
+
+def build_profile_weights(graph, profile: str) -> array:
+    """
+    Построить веса рёбер для профиля поверх той же топологии CSR
+
+    Лестничное ребро - межэтажное ребро с концом-лестницей (см. is_stair_edge).
+    avoid_stairs: лестницы дороже в STAIRS_PENALTY_FACTOR раз (используются,
+    если лифта нет). elevator_only: лестницы недоступны (вес inf).
+    Веса профиля не меньше весов по умолчанию.
+
+    Args:
+        graph: CompiledGraph с этажами и типами узлов
+        profile: Имя профиля из PROFILES
+
+    Returns:
+        Массив весов той же длины, что graph.weights
+    """
+    if profile == DEFAULT_PROFILE:
+        return graph.weights
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown routing profile: {profile}")
+    if graph.floors is None or graph.stair_nodes is None:
+        raise ValueError("Routing profiles require node floors and types in the compiled graph")
+
+    weights = array('d', graph.weights)
+    stairs = 0
+    for source in range(graph.node_count):
+        for position in range(graph.offsets[source], graph.offsets[source + 1]):
+            if not is_stair_edge(graph, source, graph.targets[position]):
+                continue
+            stairs += 1
+            if profile == AVOID_STAIRS:
+                weights[position] *= STAIRS_PENALTY_FACTOR
+            else:
+                weights[position] = float('inf')
+
+    logger.info(f"Routing profile {profile}: {stairs} stair edges adjusted")
+    return weights
@@ -0,0 +1,114 @@
+"""
+Прореживание графа: удаление рёбер, которые не короче обходных путей
+"""
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import logging
+
+from .compiled_graph import CompiledGraph
+from .routing_profiles import is_stair_edge
+
+logger = logging.getLogger(__name__)
+
+FLOAT_TOLERANCE = 1e-9  # Относительный допуск сравнения весов
+
+
+@dataclass
+class SparsifyReport:
+    """Итог прореживания"""
+    edges_before: int
+    edges_after: int
+    epsilon: float
+    max_hops: int
+    removed_by_hops: Dict[int, int] = field(default_factory=dict)  # Длина обхода (рёбер) -> удалено
+
+    @property
+    def reduction(self) -> float:
+        """Доля удалённых рёбер"""
+        return 1.0 - self.edges_after / self.edges_before if self.edges_before else 0.0
+
+
+def sparsify_graph(graph: CompiledGraph, epsilon: float = 0.0,
+                   max_hops: int = 3) -> Tuple[CompiledGraph, SparsifyReport]:
+    """
+    Удалить рёбра, доминируемые обходными путями из 2..max_hops рёбер
+
+    Жадный (1 + epsilon)-остов: рёбра просматриваются по возрастанию
+    веса, ребро u -> v сохраняется, только если среди уже сохранённых нет
+    пути u -> v не длиннее w * (1 + epsilon) из не более чем max_hops
+    рёбер. Сохранённые рёбра не удаляются, поэтому для каждого удалённого
+    ребра обход остаётся, и любое кратчайшее расстояние растёт не более
+    чем в (1 + epsilon) раз (при epsilon = 0 - не меняется). Ограничение
+    числа рёбер обхода лишь оставляет больше рёбер.
+
+    Обычное ребро обходится только без лестничных рёбер, поэтому гарантия
+    сохраняется и для профилей доступности (лестницы в них дороже). При
+    закрытиях обход может оказаться закрыт, и путь удлинится сильнее.
+
+    Args:
+        graph: Скомпилированный граф
+        epsilon: Допустимое относительное удлинение расстояний
+        max_hops: Максимум рёбер в обходном пути
+
+    Returns:
+        Кортеж (прореженный граф с теми же узлами, отчёт)
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    edges = sorted(
+        (weights[position], source, targets[position], is_stair_edge(graph, source, targets[position]))
+        for source in range(graph.node_count)
+        for position in range(offsets[source], offsets[source + 1])
+    )
+
+    kept: List[List[Tuple[int, float, bool]]] = [[] for _ in range(graph.node_count)]
+    sources, kept_targets, kept_weights = [], [], []
+    removed_by_hops: Dict[int, int] = {}
+    for weight, source, target, stair in edges:
+        if source == target:
+            continue  # Петля не нужна для кратчайших путей
+        limit = weight * (1.0 + epsilon) + FLOAT_TOLERANCE * max(weight, 1.0)
+        hops = _detour_hops(kept, source, target, limit, max_hops, allow_stairs=stair)
+        if hops:
+            removed_by_hops[hops] = removed_by_hops.get(hops, 0) + 1
+            continue
+        kept[source].append((target, weight, stair))
+        sources.append(source)
+        kept_targets.append(target)
+        kept_weights.append(weight)
+
+    sparse = CompiledGraph.from_arrays(graph.node_ids, sources, kept_targets, kept_weights)
+    sparse.xs, sparse.ys, sparse.floors, sparse.node_types = graph.xs, graph.ys, graph.floors, graph.node_types
+    sparse.stair_nodes = graph.stair_nodes
+    report = SparsifyReport(graph.edge_count, sparse.edge_count, epsilon, max_hops, removed_by_hops)
+    logger.info(f"Sparsified graph: {report.edges_before} -> {report.edges_after} edges "
+                f"(-{report.reduction:.0%}, epsilon={epsilon})")
+    return sparse, report
+
+
+def _detour_hops(kept: List[List[Tuple[int, float, bool]]], source: int, target: int,
+                 limit: float, max_hops: int, allow_stairs: bool) -> int:
+    """
+    Число рёбер обхода source -> target не длиннее limit (0 - обхода нет)
+
+    Dijkstra по сохранённым рёбрам, ограниченный длиной limit и числом
+    рёбер max_hops. Найденный обход всегда настоящий; пропуск обхода с
+    большим числом рёбер лишь сохраняет ребро. Лестничные рёбра участвуют
+    только при allow_stairs.
+    """
+    distances = {source: 0.0}
+    heap = [(0.0, 0, source)]
+    while heap:
+        distance, hops, current = heapq.heappop(heap)
+        if current == target:
+            return hops
+        if distance > distances.get(current, float('inf')) or hops == max_hops:
+            continue
+        for neighbor, weight, stair in kept[current]:
+            if stair and not allow_stairs:
+                continue
+            new_distance = distance + weight
+            if new_distance <= limit and new_distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = new_distance
+                heapq.heappush(heap, (new_distance, hops + 1, neighbor))
+    return 0
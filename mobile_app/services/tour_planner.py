@@ -0,0 +1,135 @@
+"""
+Порядок обхода нескольких точек (маршрут обхода для персонала)
+"""
+from typing import List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+Matrix = Sequence[Sequence[float]]
+
+
+def plan_tour(matrix: Matrix, return_to_start: bool = False, max_passes: int = 50) -> Tuple[List[int], float]:
+    """
+    Порядок обхода точек по матрице расстояний
+
+    Начальный порядок - ближайший сосед, затем локальные улучшения
+    2-opt (разворот участка) и Or-opt (перенос участка из 1-3 точек) до
+    тех пор, пока они что-то дают. Матрица может быть несимметричной:
+    стоимость развёрнутого участка считается по обратным расстояниям.
+
+    Args:
+        matrix: matrix[i][j] - расстояние от точки i до точки j;
+            точка 0 - старт
+        return_to_start: Вернуться в старт в конце обхода
+        max_passes: Ограничение числа проходов улучшений
+
+    Returns:
+        Кортеж (порядок индексов, начиная с 0; длина обхода)
+    """
+    count = len(matrix)
+    if count == 0:
+        return [], 0.0
+    tour = _nearest_neighbour(matrix)
+    if return_to_start:
+        tour.append(0)  # Последняя точка закреплена, как и первая
+
+    # Позиции 1..last-1 можно переставлять
+    last = len(tour) - 1 if return_to_start else len(tour)
+    for _ in range(max_passes):
+        improved = _two_opt(tour, matrix, last)
+        improved = _or_opt(tour, matrix, last) or improved
+        if not improved:
+            break
+
+    cost = _tour_cost(tour, matrix)
+    if return_to_start:
+        tour.pop()
+    logger.debug(f"Tour of {count} points: {cost:.1f}")
+    return tour, cost
+
+
+def _tour_cost(tour: List[int], matrix: Matrix) -> float:
+    """Длина обхода по порядку tour"""
+    return sum(matrix[a][b] for a, b in zip(tour, tour[1:]))
+
+
+def _nearest_neighbour(matrix: Matrix) -> List[int]:
+    """Жадный порядок: каждый раз к ближайшей непосещённой точке"""
+    count = len(matrix)
+    tour = [0]
+    remaining = set(range(1, count))
+    while remaining:
+        row = matrix[tour[-1]]
+        following = min(remaining, key=lambda point: (row[point], point))
+        tour.append(following)
+        remaining.remove(following)
+    return tour
+
+
+def _edge(matrix: Matrix, tour: List[int], i: int, j: int) -> float:
+    """Расстояние между позициями i и j обхода (0, если позиции j нет)"""
+    return matrix[tour[i]][tour[j]] if j < len(tour) else 0.0
+
+
+def _two_opt(tour: List[int], matrix: Matrix, last: int) -> bool:
+    """
+    Один проход 2-opt: развернуть участок tour[i..j], если это короче
+
+    Первая точка (и последняя при возврате в старт) не двигаются.
+
+    Returns:
+        True, если обход улучшен
+    """
+    improved = False
+    for i in range(1, last - 1):
+        # Префиксные суммы внутренних расстояний участка в обе стороны
+        forward = backward = 0.0
+        for j in range(i + 1, last):
+            forward += matrix[tour[j - 1]][tour[j]]
+            backward += matrix[tour[j]][tour[j - 1]]
+            before = matrix[tour[i - 1]][tour[i]] + forward + _edge(matrix, tour, j, j + 1)
+            after = matrix[tour[i - 1]][tour[j]] + backward + _edge(matrix, tour, i, j + 1)
+            if after < before - 1e-9:
+                tour[i:j + 1] = reversed(tour[i:j + 1])
+                improved = True
+                break  # Участок изменился - префиксные суммы пересчитываются
+    return improved
+
+
+def _or_opt(tour: List[int], matrix: Matrix, last: int, max_segment: int = 3) -> bool:
+    """
+    Один проход Or-opt: перенести участок из 1-3 точек в лучшее место
+
+    Returns:
+        True, если обход улучшен
+    """
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length <= last:
+            first, end = tour[i], tour[i + length - 1]
+            segment = tour[i:i + length]
+            after_segment = tour[i + length] if i + length < len(tour) else None
+            removed = matrix[tour[i - 1]][first]
+            if after_segment is not None:
+                removed += matrix[end][after_segment] - matrix[tour[i - 1]][after_segment]
+
+            rest = tour[:i] + tour[i + length:]
+            rest_last = last - length
+            best_gain, best_position = 1e-9, None
+            for position in range(rest_last):
+                # Вставка между rest[position] и rest[position + 1]
+                previous_point = rest[position]
+                next_point = rest[position + 1] if position + 1 < len(rest) else None
+                added = matrix[previous_point][first]
+                if next_point is not None:
+                    added += matrix[end][next_point] - matrix[previous_point][next_point]
+                if removed - added > best_gain:
+                    best_gain, best_position = removed - added, position
+            if best_position is not None:
+                tour[:] = rest[:best_position + 1] + segment + rest[best_position + 1:]
+                improved = True
+            i += 1
+    return improved
+
@@ -154,6 +154,34 @@ class TestAPIClient:
             assert routes[0].distance == 15.0
             assert routes[1].distance == 25.0
 
+    def test_get_multiple_routes_local_fallback(self, api_client):
+        """Тест локального построения маршрутов при недоступном API"""
+        building = api_client._get_demo_buildings()[0]
+        with patch.object(api_client.session, 'post', side_effect=requests.ConnectionError()):
+            routes = api_client.get_multiple_routes(building.id, "19", ["20", "38", "22", "19"])
+        # Узел 22 в демо-графе недостижим из 19: None на его месте
+        assert len(routes) == 4 and routes[2] is None
+        assert [routes[i].path[-1].id for i in (0, 1, 3)] == ["20", "38", "19"]
+        assert all(routes[i].path[0].id == "19" for i in (0, 1, 3))
+        assert routes[3].distance == 0.0
+        assert routes[0].estimated_time == pytest.approx(routes[0].distance / 1.4)
+
+    def test_get_multiple_routes_unknown_building(self, api_client):
+        """Тест: без данных о здании ошибка API пробрасывается"""
+        with patch.object(api_client.session, 'post', side_effect=requests.ConnectionError()):
+            with pytest.raises(requests.ConnectionError):
+                api_client.get_multiple_routes("unknown", "19", ["20"])
+
+    def test_get_tour(self, api_client):
+        """Тест маршрута обхода по локальному графу"""
+        building = api_client._get_demo_buildings()[0]
+        route = api_client.get_tour(building.id, "19", ["38", "20", "22"], return_to_start=True)
+        # Узел 22 недостижим из 19 и пропускается
+        assert route.path[0].id == route.path[-1].id == "19"
+        assert {"38", "20"} <= {node.id for node in route.path}
+        assert route.estimated_time == pytest.approx(route.distance / 1.4)
+        assert api_client.get_tour("unknown", "19", ["20"]) is None
+
     def test_search_nodes_success(self, api_client):
         """Тест успешного поиска узлов"""
         with patch.object(api_client.session, 'get') as mock_get:
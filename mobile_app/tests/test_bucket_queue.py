@@ -0,0 +1,85 @@
+"""
+Unit тесты для очереди-корзин Dial (целочисленные веса)
+"""
+import random
+import pytest
+from services.graph_builder import DEMO_NODES_CSV, GraphEdge, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services import graph_cache
+from services.graph_cache import GraphCache, get_graph_cache, init_graph_cache
+from services.routing_engine import RoutingEngine
+from services.routing_profiles import AVOID_STAIRS, ELEVATOR_ONLY
+
+
+def _path_length(graph, path_ids, profile='default'):
+    """Длина пути по весам профиля (минимальное параллельное ребро)"""
+    weights = graph.profile_weights(profile)
+    total = 0.0
+    for a, b in zip(path_ids, path_ids[1:]):
+        source, target = graph.to_index(a), graph.to_index(b)
+        total += min(weights[position] for position in range(graph.offsets[source], graph.offsets[source + 1])
+                     if graph.targets[position] == target)
+    return total
+
+
+class TestBucketQueue:
+    """Тесты Dijkstra на корзинах против бинарной кучи"""
+
+    def test_integer_weights_exact(self):
+        """Тест: на целых весах (в том числе нулевых) ответ совпадает с кучей"""
+        rng = random.Random(7)
+        for _ in range(60):
+            edges = [GraphEdge(str(a), str(b), rng.randint(0, 9))
+                     for a, b in (rng.sample(range(12), 2) for _ in range(30))]
+            engine = RoutingEngine.from_edges(edges, [str(i) for i in range(12)])
+            closures = engine.closure_overlay(closed_nodes=[str(rng.randrange(12))])
+            queries = [tuple(rng.sample(engine.graph.node_ids, 2)) for _ in range(5)]
+            expected = [engine.find_path(a, b, closures) for a, b in queries]
+            engine.graph.use_priority_queue('buckets')
+            for (a, b), binary in zip(queries, expected):
+                result = engine.find_path(a, b, closures)
+                if binary is None:
+                    assert result is None
+                else:
+                    assert result[1] == pytest.approx(binary[1])
+                    assert result[0][0] == a and result[0][-1] == b
+                    assert _path_length(engine.graph, result[0]) == pytest.approx(result[1])
+
+    @pytest.mark.parametrize('profile', ['default', AVOID_STAIRS, ELEVATOR_ONLY])
+    def test_quantized_weights_within_bound(self, profile):
+        """Тест: на дробных весах расстояние - длина пути и в пределах ошибки округления"""
+        graph = CompiledGraph.from_nodes(make_grid_building_nodes(floors=3, rows=8, cols=8, spacing=37.3))
+        engine = RoutingEngine(graph)
+        rng = random.Random(3)
+        queries = [tuple(rng.sample(graph.node_ids, 2)) for _ in range(40)]
+        expected = [engine.find_path(a, b, profile=profile, method='dijkstra') for a, b in queries]
+        graph.use_priority_queue('buckets')
+        for (a, b), binary in zip(queries, expected):
+            result = engine.find_path(a, b, profile=profile, method='dijkstra')
+            assert (result is None) == (binary is None)
+            if result is None:
+                continue
+            assert _path_length(graph, result[0], profile) == pytest.approx(result[1])
+            bound = 0.5 / graph.weight_scale * (len(result[0]) + len(binary[0]) - 2)
+            assert binary[1] - 1e-9 <= result[1] <= binary[1] + bound
+
+    def test_selected_at_compile_time(self):
+        """Тест: очередь выбирается при сборке графа и в кэше графов"""
+        graph = CompiledGraph.from_nodes(DEMO_NODES_CSV, priority_queue='buckets')
+        assert graph.priority_queue == 'buckets'
+        assert len(graph.integer_weights()) == graph.edge_count
+        assert GraphCache(priority_queue='buckets').get_graph('b1', DEMO_NODES_CSV).priority_queue == 'buckets'
+        assert GraphCache().get_graph('b1', DEMO_NODES_CSV).priority_queue == 'binary'
+        with pytest.raises(ValueError):
+            graph.use_priority_queue('fibonacci')
+
+    def test_global_cache_and_auto(self, monkeypatch):
+        """Тест: очередь из init_graph_cache доходит до графа и выбирается в 'auto'"""
+        monkeypatch.setattr(graph_cache, '_graph_cache', None)
+        init_graph_cache(priority_queue='buckets')
+        cache = get_graph_cache()
+        assert cache.get_graph('b1', DEMO_NODES_CSV).priority_queue == 'buckets'
+        engine = cache.get_engine('grid', make_grid_building_nodes(floors=2, rows=6, cols=6))
+        assert engine.select_method() == 'dijkstra'
+        assert engine.find_path(engine.graph.node_ids[0], engine.graph.node_ids[-1], method='auto') is not None
+        assert engine.last_stats.method == 'dijkstra'
@@ -0,0 +1,169 @@
+"""
+Unit тесты для ClosureTimeline (маршруты с учётом сроков закрытий)
+"""
+from datetime import datetime, timedelta
+import random
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.route_closure_service import RouteClosure, RouteClosureService
+from services.routing_engine import RoutingEngine, WALKING_SPEED
+
+DEPARTURE = datetime(2026, 3, 2, 9, 0)
+
+
+def _closure(closure_id, from_id, to_id=None, start=0, minutes=None, active=True):
+    """Закрытие с началом и сроком в минутах от DEPARTURE (minutes=None - бессрочно)"""
+    return RouteClosure(
+        closure_id=closure_id,
+        from_id=from_id,
+        to_id=to_id,
+        created_at=DEPARTURE + timedelta(minutes=start),
+        scheduled_until=DEPARTURE + timedelta(minutes=minutes) if minutes is not None else None,
+        active=active
+    )
+
+
+def _brute_force_arrival(timeline, start, end, departure, max_wait, horizon=200):
+    """Самое раннее прибытие перебором состояний (узел, сколько ждём) по целым секундам"""
+    graph = timeline.graph
+    if timeline.is_node_closed(start, departure):
+        return None
+    arrivals = {0: {start}}
+    waiting = set()  # (узел, секунд ожидания) в текущий момент
+    for moment in range(horizon):
+        states = waiting | {(node, 0) for node in arrivals.pop(moment, set())}
+        if any(node == end for node, _ in states):
+            return departure + moment
+        waiting = {(node, waited + 1) for node, waited in states if waited < max_wait}
+        for node, _ in states:
+            for position in range(graph.offsets[node], graph.offsets[node + 1]):
+                target = graph.targets[position]
+                if timeline.next_open(position, target, departure + moment) == departure + moment:
+                    arrivals.setdefault(moment + int(graph.weights[position]), set()).add(target)
+    return None
+
+
+@pytest.fixture
+def line_engine():
+    """Fixture: короткий путь a-b-c (по 14 единиц = 10 минут) и обход a-d-c (по 28)"""
+    edges = []
+    for a, b, weight in [('a', 'b', 14), ('b', 'c', 14), ('a', 'd', 28), ('d', 'c', 28)]:
+        edges += [GraphEdge(a, b, weight), GraphEdge(b, a, weight)]
+    return RoutingEngine.from_edges(edges)
+
+
+class TestClosureTimeline:
+    """Тесты для ClosureTimeline и RoutingEngine.find_path_at"""
+
+    def test_closure_expired_before_arrival(self, line_engine):
+        """Тест: ребро, которое откроется раньше, чем до него дойдут, не мешает"""
+        timeline = line_engine.closure_timeline([_closure('1', 'b', 'c', start=-60, minutes=5)])
+        path, distance, arrival = line_engine.find_path_at('a', 'c', DEPARTURE, timeline)
+        assert path == ['a', 'b', 'c']
+        assert arrival == DEPARTURE + timedelta(minutes=28 / WALKING_SPEED)
+        assert line_engine.last_stats.method == 'time_dependent'
+
+        # Снимок на момент выхода считает ребро закрытым
+        assert line_engine.find_path('a', 'c', timeline.overlay_at(DEPARTURE))[0] == ['a', 'd', 'c']
+
+    def test_closure_started_before_arrival(self, line_engine):
+        """Тест: закрытие, начавшееся к моменту прохода, учитывается"""
+        timeline = line_engine.closure_timeline([_closure('1', 'b', 'c', start=5)])
+        path, distance, _ = line_engine.find_path_at('a', 'c', DEPARTURE, timeline)
+        assert path == ['a', 'd', 'c'] and distance == pytest.approx(56)
+
+        # Выход на день раньше: закрытия ещё нет
+        path, _, _ = line_engine.find_path_at('a', 'c', DEPARTURE - timedelta(days=1), timeline)
+        assert path == ['a', 'b', 'c']
+
+    def test_waiting_and_max_wait(self, line_engine):
+        """Тест: короткое закрытие быстрее переждать, чем обходить"""
+        timeline = line_engine.closure_timeline([_closure('1', 'c', start=-1, minutes=15)])
+        path, _, arrival = line_engine.find_path_at('a', 'c', DEPARTURE, timeline)
+        assert path == ['a', 'b', 'c']
+        assert arrival == DEPARTURE + timedelta(minutes=15 + 10)
+
+        # Без долгого ожидания - обход (цель закрыта ещё при проходе через d)
+        path, _, arrival = line_engine.find_path_at('a', 'c', DEPARTURE, timeline, max_wait_minutes=1)
+        assert path == ['a', 'd', 'c'] and arrival == DEPARTURE + timedelta(minutes=40)
+        assert line_engine.find_path_at('a', 'c', DEPARTURE + timedelta(minutes=20), timeline,
+                                        max_wait_minutes=0)[0] == ['a', 'b', 'c']
+
+    def test_matches_static_search_for_permanent_closures(self):
+        """Тест: бессрочные закрытия - тот же ответ, что у обычного поиска"""
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors=2, rows=8, cols=8))
+        ids = engine.graph.node_ids
+        closures = [_closure(str(i), ids[i], start=-10) for i in range(10, 60, 7)]
+        closures.append(_closure('inactive', ids[3], start=-10, active=False))
+        timeline = engine.closure_timeline(closures)
+        overlay = engine.closure_overlay(closed_nodes=[closure.from_id for closure in closures[:-1]])
+        for end_id in ids[-20:]:
+            expected = engine.find_path(ids[1], end_id, overlay)
+            result = engine.find_path_at(ids[1], end_id, DEPARTURE, timeline)
+            if expected is None:
+                assert result is None
+            else:
+                assert result[1] == pytest.approx(expected[1])
+        assert engine.closure_timeline(list(closures)) is timeline  # Набор не изменился
+
+    def test_service_queries_at_moment(self, tmp_path):
+        """Тест: закрытия сервиса на заданный момент без подмены текущего времени"""
+        service = RouteClosureService(closure_dir=str(tmp_path))
+        now = datetime.now()
+        service.close_route('a', 'b', scheduled_until=now + timedelta(hours=2))
+        service.close_node('c')
+        assert service.get_closed_edges() == {('a', 'b')}
+        tomorrow = now + timedelta(days=1)
+        assert service.get_closed_edges(at=tomorrow) == set()
+        assert service.get_closed_nodes(at=tomorrow) == {'c'}
+        assert service.get_closed_nodes(at=now - timedelta(days=1)) == set()
+
+    def test_max_wait_later_arrival(self):
+        """Тест: из позднего прибытия ожидание укладывается в предел, из раннего - нет"""
+        edges = [GraphEdge('s', 'a', 1), GraphEdge('s', 'b', 30), GraphEdge('b', 'a', 30), GraphEdge('a', 't', 1)]
+        engine = RoutingEngine.from_edges(edges)
+        seconds = 60.0 / WALKING_SPEED  # Секунд на единицу расстояния
+        closure = RouteClosure(closure_id='1', from_id='a', to_id='t', created_at=DEPARTURE,
+                               scheduled_until=DEPARTURE + timedelta(seconds=100 * seconds))
+        timeline = engine.closure_timeline([closure])
+        graph = engine.graph
+        # Прийти в a в момент 1 и ждать 99 нельзя, но можно прийти позже
+        # (через b или переждав в s) и уложиться в 50
+        path, distance, arrival = timeline.search(graph.to_index('s'), graph.to_index('t'), DEPARTURE.timestamp(),
+                                                  graph.weights, seconds, 50 * seconds)
+        assert [graph.to_id(index) for index in path][-2:] == ['a', 't']
+        assert arrival == pytest.approx(DEPARTURE.timestamp() + 101 * seconds)
+
+        for minutes in (50 * seconds / 60, 30 * seconds / 60, None):
+            _, _, arrival = engine.find_path_at('s', 't', DEPARTURE, timeline, max_wait_minutes=minutes)
+            assert arrival == DEPARTURE + timedelta(seconds=101 * seconds)
+        # Не ждать совсем: a -> t закрыто при любом приходе в a
+        assert engine.find_path_at('s', 't', DEPARTURE, timeline, max_wait_minutes=0) is None
+
+    def test_max_wait_matches_brute_force(self):
+        """Тест: с пределом ожидания ответ совпадает с перебором по целым моментам"""
+        rng = random.Random(5)
+        base = DEPARTURE.timestamp()
+        limited = 0
+        for _ in range(150):
+            edges = [GraphEdge(str(a), str(b), rng.randint(1, 4))
+                     for a, b in (rng.sample(range(6), 2) for _ in range(12))]
+            engine = RoutingEngine.from_edges(edges, [str(i) for i in range(6)])
+            closures = []
+            for number in range(8):
+                start = rng.randint(0, 12)
+                edge = rng.choice(edges)
+                closures.append(RouteClosure(
+                    closure_id=str(number), from_id=edge.from_id,
+                    to_id=edge.to_id if rng.random() < 0.7 else None,
+                    created_at=datetime.fromtimestamp(base + start),
+                    scheduled_until=datetime.fromtimestamp(base + start + rng.randint(1, 20))
+                ))
+            timeline = engine.closure_timeline(closures)
+            max_wait = rng.randint(0, 4)
+            result = timeline.search(0, 5, base, engine.graph.weights, 1.0, max_wait)
+            expected = _brute_force_arrival(timeline, 0, 5, base, max_wait)
+            assert (None if result is None else result[2]) == expected
+            unlimited = timeline.search(0, 5, base, engine.graph.weights, 1.0)
+            limited += (unlimited is None) != (result is None) or bool(result and result[2] != unlimited[2])
+        assert limited > 0  # Предел ожидания действительно влиял на ответ
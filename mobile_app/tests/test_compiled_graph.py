@@ -0,0 +1,68 @@
+"""
+Unit тесты для CompiledGraph
+"""
+import pytest
+from services.graph_builder import GraphBuilder, GraphEdge, DEMO_NODES_CSV
+from services.compiled_graph import CompiledGraph, np
+
+
+@pytest.fixture
+def demo_edges():
+    """Fixture с рёбрами демо-графа"""
+    return GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV)
+
+
+class TestCompiledGraph:
+    """Тесты для CompiledGraph"""
+
+    def test_index_mapping(self):
+        """Тест соответствия ID и индексов"""
+        graph = CompiledGraph.from_edges(
+            [GraphEdge("a", "b", 1.0), GraphEdge("b", "c", 2.0)],
+            ["a", "b", "c", "d"]
+        )
+        assert graph.node_count == 4
+        assert graph.edge_count == 2
+        for node_id in ["a", "b", "c", "d"]:
+            assert graph.to_id(graph.to_index(node_id)) == node_id
+        assert graph.to_index("missing") is None
+
+    def test_csr_layout(self):
+        """Тест раскладки рёбер по строкам CSR"""
+        graph = CompiledGraph.from_edges([
+            GraphEdge("b", "a", 3.0),
+            GraphEdge("a", "b", 1.0),
+            GraphEdge("a", "c", 2.0),
+        ], ["a", "b", "c"])
+        assert list(graph.offsets) == [0, 2, 3, 3]
+        assert sorted(graph.neighbors(graph.to_index("a"))) == [(1, 1.0), (2, 2.0)]
+        assert list(graph.neighbors(graph.to_index("c"))) == []
+
+    def test_edges_outside_node_set_skipped(self):
+        """Тест отбрасывания рёбер к неизвестным узлам"""
+        graph = CompiledGraph.from_edges([GraphEdge("a", "x", 1.0)], ["a"])
+        assert graph.edge_count == 0
+
+    def test_edge_index(self, demo_edges):
+        """Тест поиска индекса ребра"""
+        graph = CompiledGraph.from_edges(demo_edges)
+        edge = demo_edges[0]
+        position = graph.edge_index(edge.from_id, edge.to_id)
+        assert graph.targets[position] == graph.to_index(edge.to_id)
+        assert graph.weights[position] == edge.weight
+        assert graph.edge_index("15", "missing") is None
+
+    def test_round_trip_edges(self, demo_edges):
+        """Тест совпадения рёбер после компиляции"""
+        graph = CompiledGraph.from_edges(demo_edges)
+        original = sorted((e.from_id, e.to_id, e.weight) for e in demo_edges)
+        compiled = sorted((e.from_id, e.to_id, e.weight) for e in graph.iter_edges())
+        assert compiled == original
+
+    @pytest.mark.skipif(np is None, reason="NumPy не установлен")
+    def test_to_numpy(self, demo_edges):
+        """Тест представления буферов как массивов NumPy"""
+        graph = CompiledGraph.from_edges(demo_edges)
+        offsets, targets, weights = graph.to_numpy()
+        assert offsets[-1] == len(demo_edges)
+        assert len(targets) == len(weights) == len(demo_edges)
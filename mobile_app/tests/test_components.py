@@ -0,0 +1,108 @@
+"""
+Unit тесты для ComponentIndex (мгновенный отказ для невозможных маршрутов)
+"""
+import random
+import pytest
+from unittest.mock import patch
+from services.graph_builder import DEMO_NODES_CSV, GraphEdge, make_grid_building_nodes
+from services.components import ComponentIndex
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture
+def demo_engine():
+    """Fixture с движком на демо-данных (есть изолированные комнаты)"""
+    return RoutingEngine.from_nodes(DEMO_NODES_CSV)
+
+
+class TestComponentIndex:
+    """Тесты для ComponentIndex"""
+
+    def test_matches_reachability(self, demo_engine):
+        """Тест: одна компонента - ровно когда путь есть (граф неориентированный)"""
+        graph = demo_engine.graph
+        components = graph.component_index()
+        assert components.count > 1
+        assert sum(components.sizes) == graph.node_count
+        for start_id in graph.node_ids[:10]:
+            tree = demo_engine.shortest_path_tree(start_id)
+            start = graph.to_index(start_id)
+            for end in range(graph.node_count):
+                assert components.connected(start, end) == (tree.distances[end] != float('inf'))
+
+    def test_unreachable_fails_without_search(self, demo_engine):
+        """Тест: путь между компонентами - None без поиска, с причиной"""
+        graph = demo_engine.graph
+        components = graph.component_index()
+        start = graph.to_index('19')
+        end = next(i for i in range(graph.node_count) if not components.connected(start, i))
+        with patch.object(demo_engine, '_search', wraps=demo_engine._search) as search:
+            for method in ('dijkstra', 'astar', 'bidirectional', 'alt', 'auto'):
+                assert demo_engine.find_path('19', graph.to_id(end), method=method) is None
+            assert search.call_count == 0
+        assert demo_engine.last_stats.method == 'components'
+        assert 'no connection' in demo_engine.last_stats.reason
+        assert demo_engine.find_alternatives('19', graph.to_id(end)) == []
+
+    def test_rebuilt_per_closure_version(self):
+        """Тест: закрытия, разрезающие граф, дают отказ с причиной"""
+        edges = [GraphEdge(a, b, 1) for a, b in [('a', 'b'), ('b', 'a'), ('b', 'c'), ('c', 'b')]]
+        engine = RoutingEngine.from_edges(edges)
+        closures = engine.closure_overlay(closed_nodes=['b'])
+        assert engine.find_path('a', 'c', closures) is None
+        assert 'closures' in engine.last_stats.reason
+        index = engine.component_index(closures)
+        assert engine.component_index(closures) is index
+        assert engine.component_index(engine.closure_overlay(closed_edges=[('b', 'c')])) is not index
+        assert engine.find_path('a', 'c') == (['a', 'b', 'c'], 2.0)
+
+    def test_profile_cut(self):
+        """Тест: без лифтов профиль elevator_only разрезает этажи"""
+        nodes = [node for node in make_grid_building_nodes(floors=2, rows=4, cols=4) if node['Type'] != 'Elevator']
+        engine = RoutingEngine.from_nodes(nodes)
+        start_id, end_id = str(nodes[1]['Id']), str(nodes[-2]['Id'])
+        assert engine.find_path(start_id, end_id) is not None
+        assert engine.find_path(start_id, end_id, profile='elevator_only') is None
+        assert 'profile' in engine.last_stats.reason
+
+    def test_one_to_many_skips_other_components(self, demo_engine):
+        """Тест: цели из других компонент отсекаются до поиска"""
+        graph = demo_engine.graph
+        components = graph.component_index()
+        start = graph.to_index('19')
+        others = [graph.to_id(i) for i in range(graph.node_count) if not components.connected(start, i)]
+        results = demo_engine.find_paths('19', others[:5])
+        assert all(result is None for result in results.values())
+        assert demo_engine.last_stats.settled == 0
+
+    def test_directed_graph_is_conservative(self):
+        """Тест: для ориентированного графа одна компонента не гарантирует путь"""
+        engine = RoutingEngine.from_edges([GraphEdge('a', 'b', 1)])
+        assert ComponentIndex.build(engine.graph).connected(0, 1)
+        assert engine.find_path('b', 'a') is None
+        assert engine.last_stats.method == 'dijkstra'
+
+    def test_random_closures_agree_with_search(self):
+        """Тест: отказ по компонентам совпадает с результатом поиска"""
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors=2, rows=6, cols=6))
+        graph = engine.graph
+        rng = random.Random(11)
+        closures = engine.closure_overlay(closed_nodes=rng.sample(graph.node_ids, 25))
+        components = engine.component_index(closures)
+        for _ in range(100):
+            start, end = rng.randrange(graph.node_count), rng.randrange(graph.node_count)
+            if closures.node_mask[start] or closures.node_mask[end]:
+                continue
+            tree = engine.shortest_path_tree(graph.to_id(start), closures)
+            assert components.connected(start, end) == (tree.distances[end] != float('inf'))
+
+    def test_stale_reason_reset(self, demo_engine):
+        """Тест: отказ по закрытому концу не наследует причину прошлого запроса"""
+        assert demo_engine.find_path('19', '22') is None
+        assert demo_engine.last_stats.reason
+        closures = demo_engine.closure_overlay(closed_nodes=['20'])
+        assert demo_engine.find_path('19', '20', closures) is None
+        assert demo_engine.last_stats.reason == ''
+        assert demo_engine.find_path('19', '22') is None
+        assert demo_engine.find_path('19', 'missing') is None
+        assert demo_engine.last_stats.reason == ''
@@ -0,0 +1,97 @@
+"""
+Unit тесты для ContractionHierarchy
+"""
+import json
+import random
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.contraction_hierarchy import ContractionHierarchy
+from services.compiled_graph import CompiledGraph
+from services.graph_cache import GraphCache
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture(scope='module')
+def grid_engine():
+    """Fixture с синтетическим зданием и подключённой иерархией"""
+    engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=8, cols=8))
+    engine.attach_contraction_hierarchy()
+    return engine
+
+
+def _path_weight(graph, path):
+    """Суммарный вес пути по рёбрам графа"""
+    return sum(graph.weights[graph.edge_index(a, b)] for a, b in zip(path, path[1:]))
+
+
+class TestContractionHierarchy:
+    """Тесты для ContractionHierarchy"""
+
+    def test_matches_dijkstra(self, grid_engine):
+        """Тест совпадения расстояний с Dijkstra и корректности распаковки"""
+        graph = grid_engine.graph
+        rng = random.Random(10)
+        for _ in range(100):
+            start_id, end_id = rng.choice(graph.node_ids), rng.choice(graph.node_ids)
+            expected = grid_engine.find_path(start_id, end_id)
+            path, distance = grid_engine.find_path(start_id, end_id, method='ch')
+            assert distance == pytest.approx(expected[1])
+            assert path[0] == start_id and path[-1] == end_id
+            assert _path_weight(graph, path) == pytest.approx(distance)
+
+    def test_directed_and_unreachable(self):
+        """Тест направленных рёбер и недостижимых узлов"""
+        edges = [
+            GraphEdge('a', 'b', 1), GraphEdge('b', 'c', 1),
+            GraphEdge('c', 'a', 5), GraphEdge('d', 'e', 1),
+        ]
+        graph = CompiledGraph.from_edges(edges)
+        hierarchy = ContractionHierarchy.build(graph)
+        a, c, d = graph.to_index('a'), graph.to_index('c'), graph.to_index('d')
+
+        path, distance = hierarchy.query(a, c)
+        assert [graph.to_id(i) for i in path] == ['a', 'b', 'c']
+        assert distance == 2
+        assert hierarchy.query(c, a)[1] == 5
+        assert hierarchy.query(a, d) is None
+
+    def test_serialization(self, grid_engine):
+        """Тест сериализации иерархии через JSON"""
+        hierarchy = grid_engine.contraction_hierarchy
+        restored = ContractionHierarchy.from_dict(json.loads(json.dumps(hierarchy.to_dict())))
+        start, end = 0, grid_engine.graph.node_count - 1
+        assert restored.query(start, end) == hierarchy.query(start, end)
+        assert restored.shortcut_count == hierarchy.shortcut_count
+
+    def test_rejects_other_node_set(self, grid_engine):
+        """Тест: иерархия другого графа не подключается"""
+        other = RoutingEngine.from_edges([GraphEdge('a', 'b', 1)])
+        with pytest.raises(ValueError):
+            other.attach_contraction_hierarchy(grid_engine.contraction_hierarchy)
+
+    def test_closures_fall_back(self, grid_engine):
+        """Тест: при закрытиях используется обычный поиск"""
+        graph = grid_engine.graph
+        start_id, end_id = graph.node_ids[0], graph.node_ids[10]
+        closures = grid_engine.closure_overlay(closed_nodes=[graph.node_ids[9]])
+        expected = grid_engine.find_path(start_id, end_id, closures)
+        result = grid_engine.find_path(start_id, end_id, closures, method='ch')
+        assert result[1] == pytest.approx(expected[1])
+        assert graph.node_ids[9] not in result[0]
+        assert grid_engine.last_stats.method != 'ch'
+        assert grid_engine.select_method() == 'ch'
+
+    def test_requires_attached_hierarchy(self):
+        """Тест ошибки без подключённой иерархии"""
+        engine = RoutingEngine.from_edges([GraphEdge('a', 'b', 1)])
+        with pytest.raises(ValueError):
+            engine.find_path('a', 'b', method='ch')
+
+    def test_graph_cache_persists_hierarchy(self, cache_service):
+        """Тест сохранения иерархии в CacheService"""
+        nodes = make_grid_building_nodes(floors=2, rows=4, cols=4)
+        engine = GraphCache(cache_service).attach_contraction_hierarchy('b1', nodes)
+        assert engine.contraction_hierarchy is not None
+
+        restored = GraphCache(cache_service).attach_contraction_hierarchy('b1', nodes)
+        assert restored.contraction_hierarchy.to_dict() == engine.contraction_hierarchy.to_dict()
@@ -0,0 +1,85 @@
+"""
+Unit тесты для DistanceOracle
+"""
+import os
+import pytest
+from services.graph_builder import DEMO_NODES_CSV, GraphEdge, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.distance_oracle import DistanceOracle
+from services.graph_cache import GraphCache
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture
+def demo_engine():
+    """Fixture с движком на демо-данных"""
+    return RoutingEngine.from_nodes(DEMO_NODES_CSV)
+
+
+class TestDistanceOracle:
+    """Тесты для DistanceOracle"""
+
+    def test_matches_dijkstra(self, demo_engine):
+        """Тест совпадения расстояний и путей с Dijkstra"""
+        oracle = demo_engine.attach_distance_oracle()
+        graph = demo_engine.graph
+        for start_id in graph.node_ids[::7]:
+            for end_id in graph.node_ids[::5]:
+                expected = demo_engine.find_path(start_id, end_id)
+                result = demo_engine.find_path(start_id, end_id, method='oracle')
+                if expected is None:
+                    assert result is None
+                    assert oracle.distance(start_id, end_id) is None
+                    continue
+                path, distance = result
+                assert distance == pytest.approx(expected[1], rel=1e-6)
+                assert oracle.distance(start_id, end_id) == pytest.approx(expected[1], rel=1e-6)
+                assert path[0] == start_id and path[-1] == end_id
+                weight = sum(graph.weights[graph.edge_index(a, b)] for a, b in zip(path, path[1:]))
+                assert weight == pytest.approx(expected[1])
+
+    def test_parallel_build(self):
+        """Тест: параллельная сборка даёт те же матрицы"""
+        graph = CompiledGraph.from_nodes(make_grid_building_nodes(floors=2, rows=5, cols=5))
+        serial = DistanceOracle.build(graph)
+        parallel = DistanceOracle.build(graph, workers=2)
+        assert list(parallel.distances) == list(serial.distances)
+        assert list(parallel.next_hop) == list(serial.next_hop)
+
+    def test_save_and_mmap(self, tmp_path):
+        """Тест сохранения и отображения матриц в память"""
+        edges = [GraphEdge('a', 'b', 1.5), GraphEdge('b', 'c', 2.0)]
+        oracle = DistanceOracle.build(CompiledGraph.from_edges(edges))
+        prefix = str(tmp_path / "oracle")
+        oracle.save(prefix)
+        assert os.path.getsize(prefix + ".dist") == 9 * 4
+
+        loaded = DistanceOracle.load(prefix)
+        assert loaded.distance('a', 'c') == 3.5
+        assert loaded.distance('c', 'a') is None
+        assert loaded.find_path(0, 2) == ([0, 1, 2], 3.5)
+        assert DistanceOracle.load(str(tmp_path / "missing")) is None
+
+    def test_closures_fall_back(self, demo_engine):
+        """Тест: при закрытиях используется обычный поиск"""
+        demo_engine.attach_distance_oracle()
+        assert demo_engine.select_method() == 'oracle'
+        closures = demo_engine.closure_overlay(closed_nodes=["20"])
+        assert demo_engine.find_path("19", "20", closures, method='oracle') is None
+        assert demo_engine.select_method(closures) != 'oracle'
+
+    def test_graph_cache_reuses_files(self, cache_service):
+        """Тест: матрицы строятся один раз и отображаются из каталога кэша"""
+        nodes = [dict(node) for node in DEMO_NODES_CSV]
+        assert GraphCache(cache_service).attach_distance_oracle("b1", nodes, build=False) is None
+        engine = GraphCache(cache_service).attach_distance_oracle("b1", nodes)
+        assert engine.distance_oracle is not None
+        restored = GraphCache(cache_service).attach_distance_oracle("b1", nodes, build=False)
+        assert isinstance(restored.distance_oracle.distances, memoryview)
+        assert restored.find_path("19", "20") == engine.find_path("19", "20")
+
+    def test_too_large(self, monkeypatch):
+        """Тест отказа для больших графов"""
+        monkeypatch.setattr(DistanceOracle, 'MAX_NODES', 1)
+        with pytest.raises(ValueError):
+            DistanceOracle.build(CompiledGraph.from_edges([GraphEdge('a', 'b', 1)]))
@@ -0,0 +1,118 @@
+"""
+Unit тесты для DynamicRoute (инкрементальный пересчёт при смене закрытий)
+"""
+import random
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.dynamic_route import DynamicRoute
+from services.route_closure_service import RouteClosureService
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture
+def grid_engine():
+    """Fixture с трёхэтажным синтетическим зданием"""
+    return RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=15, cols=15))
+
+
+class TestDynamicRoute:
+    """Тесты для DynamicRoute"""
+
+    def test_repair_matches_full_search(self, grid_engine):
+        """Тест: после каждого переключения закрытий путь совпадает с поиском с нуля"""
+        graph = grid_engine.graph
+        node_ids = graph.node_ids
+        start_id, end_id = node_ids[1], node_ids[-2]
+        route = grid_engine.dynamic_route(start_id, end_id)
+        assert route.path()[1] == pytest.approx(grid_engine.find_path(start_id, end_id)[1])
+
+        rng = random.Random(12)
+        closed_edges, closed_nodes = set(), set()
+        for _ in range(40):
+            if rng.random() < 0.5:
+                closed_nodes ^= {rng.choice(node_ids[2:-2])}
+            else:
+                source = rng.randrange(graph.node_count)
+                target = graph.targets[rng.randrange(graph.offsets[source], graph.offsets[source + 1])]
+                closed_edges ^= {(node_ids[source], node_ids[target])}
+            closures = grid_engine.closure_overlay(closed_edges, closed_nodes)
+            result = route.update(closures)
+            expected = grid_engine.find_path(start_id, end_id, closures)
+            if expected is None:
+                assert result is None
+                continue
+            path, distance = result
+            assert distance == pytest.approx(expected[1])
+            assert graph.to_id(path[0]) == start_id and graph.to_id(path[-1]) == end_id
+            assert not any(closures.node_mask[index] for index in path)
+
+    def test_repair_touches_fewer_nodes(self, grid_engine):
+        """Тест: закрытие на пути чинится дешевле полного поиска"""
+        graph = grid_engine.graph
+        start_id, end_id = graph.node_ids[1], graph.node_ids[-2]
+        route = grid_engine.dynamic_route(start_id, end_id)
+        path, _ = route.path()
+        blocked = graph.to_id(path[len(path) // 2])
+
+        closures = grid_engine.closure_overlay(closed_nodes=[blocked])
+        new_path, _ = route.update(closures)
+        assert path[len(path) // 2] not in new_path
+        grid_engine.find_path(start_id, end_id, closures, method='astar')
+        assert 0 < route.last_expanded < grid_engine.last_stats.settled
+
+        # Закрытие вдали от пути не раскрывает узлов
+        far = grid_engine.closure_overlay(closed_nodes=[blocked, graph.node_ids[-30]])
+        route.update(far)
+        assert route.last_expanded == 0
+
+    def test_blocked_and_reopened(self, grid_engine):
+        """Тест: закрытая цель - пути нет, после открытия путь восстанавливается"""
+        start_id, end_id = grid_engine.graph.node_ids[1], grid_engine.graph.node_ids[-2]
+        route = grid_engine.dynamic_route(start_id, end_id)
+        initial = route.path()
+        assert route.update(grid_engine.closure_overlay(closed_nodes=[end_id])) is None
+        assert route.update(None) == initial
+        assert grid_engine.dynamic_route(start_id, 'missing') is None
+
+
+    def test_zero_weight_ties(self):
+        """Тест: рёбра нулевого веса с равными g не зацикливают восстановление пути"""
+        edges = [GraphEdge('a', 'b', 0), GraphEdge('b', 'a', 0), GraphEdge('s', 'b', 1), GraphEdge('a', 'e', 1)]
+        graph = CompiledGraph.from_edges(edges, ['a', 'b', 's', 'e'])
+        path, distance = DynamicRoute(graph, 2, 3).path()
+        assert [graph.to_id(index) for index in path] == ['s', 'b', 'a', 'e']
+        assert distance == 2.0
+
+        # Узлы в одной точке (ребро нулевого веса) в здании
+        nodes = make_grid_building_nodes(floors=2, rows=6, cols=6)
+        nodes += [dict(node, Id=f"{node['Id']}-copy") for node in nodes[::5]]
+        engine = RoutingEngine.from_nodes(nodes)
+        for end_id in engine.graph.node_ids[::7]:
+            route = engine.dynamic_route(engine.graph.node_ids[0], end_id)
+            expected = engine.find_path(engine.graph.node_ids[0], end_id)
+            assert route.path()[1] == pytest.approx(expected[1])
+            assert route.path()[0][-1] == engine.graph.to_index(end_id)
+
+class TestClosureListeners:
+    """Тесты подписки на изменения закрытий"""
+
+    def test_listeners_notified(self, tmp_path):
+        """Тест: подписчик вызывается при закрытии и открытии"""
+        service = RouteClosureService(closure_dir=str(tmp_path))
+        calls = []
+        service.add_listener(lambda: calls.append(len(service.get_active_closures())))
+        closure_id = service.close_route('a', 'b')
+        service.close_node('c')
+        service.open_route(closure_id)
+        assert calls == [1, 2, 1]
+
+    def test_failing_listener_ignored(self, tmp_path):
+        """Тест: ошибка подписчика не мешает закрытию"""
+        service = RouteClosureService(closure_dir=str(tmp_path))
+        callback = lambda: 1 / 0
+        service.add_listener(callback)
+        service.close_node('c')
+        assert service.is_node_closed('c')
+        service.remove_listener(callback)
+        assert service._listeners == []
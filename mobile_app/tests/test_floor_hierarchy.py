@@ -0,0 +1,76 @@
+"""
+Unit тесты для FloorHierarchy
+"""
+import random
+import pytest
+from services.graph_builder import make_grid_building_nodes
+from services.floor_hierarchy import FloorHierarchy
+from services.compiled_graph import CompiledGraph
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture
+def grid_engine():
+    """Fixture с четырёхэтажным синтетическим зданием"""
+    return RoutingEngine.from_nodes(make_grid_building_nodes(floors=4, rows=10, cols=10))
+
+
+def _path_weight(graph, path):
+    """Суммарный вес пути по рёбрам графа"""
+    return sum(graph.weights[graph.edge_index(a, b)] for a, b in zip(path, path[1:]))
+
+
+class TestFloorHierarchy:
+    """Тесты для FloorHierarchy"""
+
+    def test_portals(self, grid_engine):
+        """Тест: порталы - только лестницы и лифты"""
+        hierarchy = grid_engine.floor_hierarchy()
+        assert set(hierarchy.portals) == {1, 2, 3, 4}
+        for floor_portals in hierarchy.portals.values():
+            assert len(floor_portals) == 3  # Две лестницы и лифт
+
+    def test_matches_dijkstra(self, grid_engine):
+        """Тест совпадения расстояний с Dijkstra"""
+        graph = grid_engine.graph
+        rng = random.Random(5)
+        for _ in range(80):
+            start_id, end_id = rng.choice(graph.node_ids), rng.choice(graph.node_ids)
+            expected = grid_engine.find_path(start_id, end_id)
+            path, distance = grid_engine.find_path(start_id, end_id, method='hierarchical')
+            assert distance == pytest.approx(expected[1])
+            assert path[0] == start_id and path[-1] == end_id
+            assert _path_weight(graph, path) == pytest.approx(distance)
+
+    def test_touches_only_two_floors(self, grid_engine):
+        """Тест: межэтажный запрос не раскрывает промежуточные этажи"""
+        graph = grid_engine.graph
+        start_id = graph.node_ids[0]  # Этаж 1
+        end_id = graph.node_ids[-1]  # Этаж 4
+        grid_engine.find_path(start_id, end_id, method='hierarchical')
+        per_floor = 100
+        assert grid_engine.last_stats.settled <= 2 * per_floor + sum(
+            len(p) for p in grid_engine.floor_hierarchy().portals.values()
+        )
+
+    def test_closures_rebuild_hierarchy(self, grid_engine):
+        """Тест пересчёта иерархии при смене закрытий"""
+        graph = grid_engine.graph
+        base = grid_engine.floor_hierarchy()
+        elevator_id = str((2 * 10 + 5) * 10 + 5)  # Лифт второго этажа (центр решётки)
+        closures = grid_engine.closure_overlay(closed_nodes={elevator_id})
+        closed = grid_engine.floor_hierarchy(closures)
+        assert closed is not base
+        assert grid_engine.floor_hierarchy(closures) is closed
+
+        start_id, end_id = graph.node_ids[0], graph.node_ids[-1]
+        expected = grid_engine.find_path(start_id, end_id, closures)
+        path, distance = grid_engine.find_path(start_id, end_id, closures, method='hierarchical')
+        assert elevator_id not in path
+        assert distance == pytest.approx(expected[1])
+
+    def test_requires_floors(self):
+        """Тест: без этажей иерархия не строится"""
+        graph = CompiledGraph.from_edges([])
+        with pytest.raises(ValueError):
+            FloorHierarchy(graph)
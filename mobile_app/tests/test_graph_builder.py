@@ -0,0 +1,113 @@
+"""
+Unit тесты для GraphBuilder
+"""
+import random
+import pytest
+from services.graph_builder import GraphBuilder, DEMO_NODES_CSV, np
+from services.compiled_graph import CompiledGraph
+
+
+def _synthetic_nodes(count, floors=2, size=3000, seed=42):
+    """Случайные узлы на нескольких этажах (с отрицательными координатами)"""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        node_type = rng.choice(['Room', 'Room', 'Room', 'Staircase', 'Elevator'])
+        nodes.append({
+            'Id': i,
+            'Name': node_type,
+            'Floor': rng.randint(1, floors),
+            'Type': node_type,
+            'X': rng.uniform(-size / 2, size),
+            'Y': rng.uniform(-size / 2, size),
+        })
+    return nodes
+
+
+def _as_tuples(edges):
+    """Рёбра в виде кортежей для сравнения"""
+    return [(e.from_id, e.to_id, e.weight) for e in edges]
+
+
+def _assert_same_edges(actual, expected):
+    """Сравнить рёбра: пары точно, веса с точностью до последнего бита"""
+    assert [edge[:2] for edge in actual] == [edge[:2] for edge in expected]
+    assert [edge[2] for edge in actual] == pytest.approx([edge[2] for edge in expected], rel=1e-12)
+
+
+class TestGraphBuilder:
+    """Тесты для GraphBuilder"""
+
+    def test_grid_matches_pairwise_on_demo(self):
+        """Тест совпадения сетки с полным перебором на демо-данных"""
+        grid = GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV, neighbor_search='grid')
+        pairwise = GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV, neighbor_search='pairwise')
+        assert _as_tuples(grid) == _as_tuples(pairwise)
+
+    def test_grid_matches_pairwise_on_synthetic(self):
+        """Тест совпадения сетки с полным перебором на случайных этажах"""
+        nodes = _synthetic_nodes(1500)
+        grid = GraphBuilder.build_edges_from_nodes(nodes, neighbor_search='grid')
+        pairwise = GraphBuilder.build_edges_from_nodes(nodes, neighbor_search='pairwise')
+        assert len(grid) > 0
+        assert _as_tuples(grid) == _as_tuples(pairwise)
+
+    def test_threshold_boundary(self):
+        """Тест узлов ровно на пороге расстояния (соседние ячейки сетки)"""
+        threshold = GraphBuilder.DISTANCE_THRESHOLD
+        nodes = [
+            {'Id': 1, 'Name': 'a', 'Floor': 1, 'Type': 'Room', 'X': 0, 'Y': 0},
+            {'Id': 2, 'Name': 'b', 'Floor': 1, 'Type': 'Room', 'X': threshold, 'Y': 0},
+            {'Id': 3, 'Name': 'c', 'Floor': 1, 'Type': 'Room', 'X': 2 * threshold + 1, 'Y': 0},
+        ]
+        edges = GraphBuilder.build_edges_from_nodes(nodes)
+        assert _as_tuples(edges) == [('1', '2', float(threshold)), ('2', '1', float(threshold))]
+
+    def test_unknown_neighbor_search(self):
+        """Тест неизвестного метода поиска соседей"""
+        with pytest.raises(ValueError):
+            GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV, neighbor_search='magic')
+
+
+@pytest.mark.skipif(np is None, reason="NumPy не установлен")
+class TestVectorizedGraphBuilder:
+    """Тесты векторизованного построения рёбер"""
+
+    def test_numpy_matches_pairwise(self):
+        """Тест совпадения NumPy-бэкенда с полным перебором"""
+        nodes = _synthetic_nodes(1500)
+        vectorized = GraphBuilder.build_edges_from_nodes(nodes, neighbor_search='numpy')
+        pairwise = GraphBuilder.build_edges_from_nodes(nodes, neighbor_search='pairwise')
+        _assert_same_edges(_as_tuples(vectorized), _as_tuples(pairwise))
+
+    def test_small_blocks(self):
+        """Тест маленьких блоков (ограниченная память)"""
+        nodes = _synthetic_nodes(600, floors=1, size=1500)
+        xs = np.array([n['X'] for n in nodes])
+        ys = np.array([n['Y'] for n in nodes])
+        full = GraphBuilder._vectorized_floor_pairs(xs, ys)
+        blocked = GraphBuilder._vectorized_floor_pairs(xs, ys, block_size=97)
+        for a, b in zip(full, blocked):
+            assert np.array_equal(a, b)
+
+    def test_edge_arrays_match_edges(self):
+        """Тест совпадения массивов рёбер со списком GraphEdge"""
+        nodes = _synthetic_nodes(1500) + DEMO_NODES_CSV
+        node_ids, sources, targets, weights = GraphBuilder.build_edge_arrays(nodes)
+        from_arrays = sorted(
+            (node_ids[s], node_ids[t], w)
+            for s, t, w in zip(sources.tolist(), targets.tolist(), weights.tolist())
+        )
+        expected = sorted(_as_tuples(GraphBuilder.build_edges_from_nodes(nodes)))
+        _assert_same_edges(from_arrays, expected)
+
+    def test_compiled_graph_from_arrays(self):
+        """Тест компиляции графа напрямую из массивов"""
+        vectorized = CompiledGraph.from_nodes(DEMO_NODES_CSV, vectorized=True)
+        regular = CompiledGraph.from_nodes(DEMO_NODES_CSV)
+        assert vectorized.node_ids == regular.node_ids
+        assert list(vectorized.offsets) == list(regular.offsets)
+        _assert_same_edges(
+            sorted(_as_tuples(vectorized.iter_edges())),
+            sorted(_as_tuples(regular.iter_edges()))
+        )
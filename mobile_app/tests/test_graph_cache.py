@@ -0,0 +1,81 @@
+"""
+Unit тесты для GraphCache
+"""
+import pytest
+from unittest.mock import patch
+from services.graph_builder import DEMO_NODES_CSV
+from services.compiled_graph import CompiledGraph
+from services.graph_cache import GraphCache
+
+
+@pytest.fixture
+def demo_nodes():
+    """Fixture с копией демо-узлов"""
+    return [dict(node) for node in DEMO_NODES_CSV]
+
+
+class TestGraphCache:
+    """Тесты для GraphCache"""
+
+    def test_fingerprint_ignores_order(self, demo_nodes):
+        """Тест независимости отпечатка от порядка узлов"""
+        assert GraphCache.fingerprint(demo_nodes) == GraphCache.fingerprint(list(reversed(demo_nodes)))
+
+    def test_fingerprint_changes_with_nodes(self, demo_nodes):
+        """Тест изменения отпечатка при сдвиге узла"""
+        before = GraphCache.fingerprint(demo_nodes)
+        demo_nodes[0]['X'] += 1
+        assert GraphCache.fingerprint(demo_nodes) != before
+
+    def test_graph_built_once(self, demo_nodes):
+        """Тест однократной сборки графа на версию здания"""
+        cache = GraphCache()
+        with patch.object(CompiledGraph, 'from_nodes', wraps=CompiledGraph.from_nodes) as build:
+            first = cache.get_graph("b1", demo_nodes)
+            second = cache.get_graph("b1", demo_nodes)
+            assert first is second
+            assert build.call_count == 1
+
+            demo_nodes[0]['X'] += 1
+            third = cache.get_graph("b1", demo_nodes)
+            assert third is not first
+            assert build.call_count == 2
+
+    def test_fingerprint_memoized(self, demo_nodes):
+        """Тест: на повторных запросах отпечаток не пересчитывается"""
+        cache = GraphCache()
+        with patch.object(GraphCache, '_hash_fields', wraps=GraphCache._hash_fields) as hash_fields:
+            graph = cache.get_graph("b1", demo_nodes)
+            assert cache.get_engine("b1", [dict(node) for node in demo_nodes]).graph is graph
+            assert hash_fields.call_count == 1
+
+            demo_nodes[0]['Name'] = 'Другое имя'
+            assert cache.get_graph("b1", demo_nodes) is not graph
+            assert hash_fields.call_count == 2
+
+    def test_engine_reused(self, demo_nodes):
+        """Тест переиспользования движка маршрутизации"""
+        cache = GraphCache()
+        engine = cache.get_engine("b1", demo_nodes)
+        assert cache.get_engine("b1", demo_nodes) is engine
+        assert engine.graph is cache.get_graph("b1", demo_nodes)
+
+    def test_invalidate(self, demo_nodes):
+        """Тест сброса графа из памяти"""
+        cache = GraphCache()
+        first = cache.get_graph("b1", demo_nodes)
+        cache.invalidate("b1")
+        assert cache.get_graph("b1", demo_nodes) is not first
+
+    def test_persisted_through_cache_service(self, demo_nodes, cache_service):
+        """Тест сохранения графа через CacheService"""
+        built = GraphCache(cache_service=cache_service).get_graph("b1", demo_nodes)
+
+        with patch.object(CompiledGraph, 'from_nodes') as build:
+            loaded = GraphCache(cache_service=cache_service).get_graph("b1", demo_nodes)
+            build.assert_not_called()
+
+        assert loaded.node_ids == built.node_ids
+        assert list(loaded.offsets) == list(built.offsets)
+        assert list(loaded.targets) == list(built.targets)
+        assert list(loaded.weights) == list(built.weights)
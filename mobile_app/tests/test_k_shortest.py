@@ -0,0 +1,97 @@
+"""
+Unit тесты для KShortestPaths (альтернативные маршруты)
+"""
+import random
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.routing_engine import RoutingEngine
+
+
+def _all_simple_paths(engine, start, end):
+    """Полный перебор путей без циклов: {путь: длина}"""
+    graph = engine.graph
+    paths = {}
+
+    def visit(node, path, distance):
+        if node == end:
+            key = tuple(path)
+            paths[key] = min(paths.get(key, float('inf')), distance)
+            return
+        for position in range(graph.offsets[node], graph.offsets[node + 1]):
+            neighbor = graph.targets[position]
+            if neighbor not in path:
+                path.append(neighbor)
+                visit(neighbor, path, distance + graph.weights[position])
+                path.pop()
+
+    visit(start, [start], 0.0)
+    return paths
+
+
+@pytest.fixture
+def grid_engine():
+    """Fixture с двухэтажным синтетическим зданием"""
+    return RoutingEngine.from_nodes(make_grid_building_nodes(floors=2, rows=10, cols=10))
+
+
+class TestKShortestPaths:
+    """Тесты для KShortestPaths"""
+
+    def test_matches_brute_force(self):
+        """Тест совпадения с полным перебором на случайных графах"""
+        rng = random.Random(5)
+        for _ in range(60):
+            edges = []
+            for _ in range(18):
+                a, b = rng.sample(range(9), 2)
+                edges.append(GraphEdge(str(a), str(b), rng.randint(1, 5)))
+            engine = RoutingEngine.from_edges(edges, [str(i) for i in range(9)])
+            start_id, end_id = rng.sample(engine.graph.node_ids, 2)
+            result = engine.find_alternatives(start_id, end_id, k=5)
+
+            expected = _all_simple_paths(engine, engine.graph.to_index(start_id), engine.graph.to_index(end_id))
+            assert [distance for _, distance in result] == pytest.approx(sorted(expected.values())[:5])
+            for path, distance in result:
+                indices = tuple(engine.graph.to_index(node_id) for node_id in path)
+                assert len(set(indices)) == len(indices)  # Без циклов
+                assert expected[indices] == pytest.approx(distance)
+            assert len({tuple(path) for path, _ in result}) == len(result)
+
+    def test_first_is_shortest(self, grid_engine):
+        """Тест: первый путь совпадает с find_path"""
+        start_id, end_id = grid_engine.graph.node_ids[3], grid_engine.graph.node_ids[-5]
+        result = grid_engine.find_alternatives(start_id, end_id, k=3)
+        assert len(result) == 3
+        assert result[0][1] == pytest.approx(grid_engine.find_path(start_id, end_id)[1])
+        assert result[0][0][0] == start_id and result[0][0][-1] == end_id
+
+    def test_cheaper_than_independent_searches(self, grid_engine):
+        """Тест: k=3 дешевле трёх полных поисков, повтор - ещё дешевле"""
+        start_id, end_id = grid_engine.graph.node_ids[3], grid_engine.graph.node_ids[-5]
+        grid_engine.find_path(start_id, end_id)
+        single = grid_engine.last_stats.settled
+
+        grid_engine.find_alternatives(start_id, end_id, k=3)
+        assert grid_engine.last_stats.method == 'yen'
+        assert grid_engine.last_stats.settled < 3 * single
+
+        other_start = grid_engine.graph.node_ids[20]
+        grid_engine.find_alternatives(other_start, end_id, k=3)  # Обратное дерево до цели уже есть
+        assert grid_engine.last_stats.settled < single
+
+    def test_respects_closures(self, grid_engine):
+        """Тест: альтернативы не проходят через закрытые узлы"""
+        graph = grid_engine.graph
+        start_id, end_id = graph.node_ids[3], graph.node_ids[-5]
+        first = grid_engine.find_alternatives(start_id, end_id, k=1)[0][0]
+        closures = grid_engine.closure_overlay(closed_nodes=[first[len(first) // 2]])
+        for path, _ in grid_engine.find_alternatives(start_id, end_id, k=3, closures=closures):
+            assert first[len(first) // 2] not in path
+
+    def test_unreachable_and_trivial(self):
+        """Тест: нет пути - пустой список, старт равен цели - один путь"""
+        engine = RoutingEngine.from_edges([GraphEdge('a', 'b', 1)], ['a', 'b', 'c'])
+        assert engine.find_alternatives('a', 'c') == []
+        assert engine.find_alternatives('b', 'a') == []
+        assert engine.find_alternatives('a', 'a') == [(['a'], 0.0)]
+        assert engine.find_alternatives('a', 'b', k=3) == [(['a', 'b'], 1.0)]
@@ -0,0 +1,89 @@
+"""
+Unit тесты для LandmarkTable (эвристика ALT)
+"""
+import json
+import random
+import pytest
+from unittest.mock import patch
+from services.graph_builder import DEMO_NODES_CSV, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.graph_cache import GraphCache
+from services.landmarks import LandmarkTable
+from services.routing_engine import RoutingEngine
+
+
+@pytest.fixture
+def walled_engine():
+    """Fixture со зданием, где стена заставляет идти в обход"""
+    nodes = [
+        node for node in make_grid_building_nodes(floors=2, rows=12, cols=12)
+        if not (int(node['Id']) % 12 == 6 and 0 < int(node['Id']) // 12 % 12 < 11)
+    ]
+    return RoutingEngine.from_nodes(nodes)
+
+
+class TestLandmarkTable:
+    """Тесты для LandmarkTable"""
+
+    def test_lower_bounds_admissible(self, walled_engine):
+        """Тест: эвристика не превышает истинного расстояния"""
+        graph = walled_engine.graph
+        table = walled_engine.landmark_table()
+        rng = random.Random(3)
+        for _ in range(30):
+            start, end = rng.randrange(graph.node_count), rng.randrange(graph.node_count)
+            heuristic = table.heuristic(start, end)
+            distance = walled_engine.find_path(graph.to_id(start), graph.to_id(end))[1]
+            assert heuristic(start) <= distance + 1e-9
+            assert heuristic(end) == 0.0
+
+    def test_alt_matches_dijkstra(self, walled_engine):
+        """Тест совпадения расстояний ALT с Dijkstra (и с закрытиями)"""
+        graph = walled_engine.graph
+        rng = random.Random(4)
+        closures = walled_engine.closure_overlay(closed_nodes=rng.sample(graph.node_ids, 15))
+        for overlay in (None, closures):
+            for _ in range(40):
+                start_id, end_id = rng.choice(graph.node_ids), rng.choice(graph.node_ids)
+                expected = walled_engine.find_path(start_id, end_id, overlay)
+                result = walled_engine.find_path(start_id, end_id, overlay, method='alt')
+                if expected is None:
+                    assert result is None
+                else:
+                    assert result[1] == pytest.approx(expected[1])
+
+    def test_alt_settles_fewer_on_detours(self, walled_engine):
+        """Тест: при обходе стены ALT раскрывает меньше узлов, чем A*"""
+        start_id = str((1 * 12 + 5) * 12 + 4)  # Слева от стены, первый этаж
+        end_id = str((1 * 12 + 5) * 12 + 8)  # Справа от стены
+        assert walled_engine.has_node(start_id) and walled_engine.has_node(end_id)
+        walled_engine.find_path(start_id, end_id, method='astar')
+        astar_settled = walled_engine.last_stats.settled
+        walled_engine.find_path(start_id, end_id, method='alt')
+        assert walled_engine.last_stats.settled < astar_settled
+
+    def test_landmark_per_component(self):
+        """Тест: каждая компонента (этаж без лестниц) получает ориентир"""
+        graph = CompiledGraph.from_nodes(DEMO_NODES_CSV)
+        table = LandmarkTable.build(graph, count=2)
+        assert {graph.floors[i] for i in table.landmarks} == {1, 2}
+
+    def test_serialized_with_graph(self, walled_engine):
+        """Тест сохранения таблиц вместе с графом"""
+        graph = walled_engine.graph
+        walled_engine.landmark_table()
+        restored = CompiledGraph.from_dict(json.loads(json.dumps(graph.to_dict())))
+        assert restored.landmarks.landmarks == graph.landmarks.landmarks
+        assert list(restored.landmarks.from_landmark[0]) == list(graph.landmarks.from_landmark[0])
+
+    def test_recomputed_only_on_node_change(self, cache_service):
+        """Тест: ориентиры пересчитываются только при смене набора узлов"""
+        nodes = [dict(node) for node in DEMO_NODES_CSV]
+        with patch.object(LandmarkTable, 'build', wraps=LandmarkTable.build) as build:
+            GraphCache(cache_service).get_graph("b1", nodes)
+            GraphCache(cache_service).get_graph("b1", nodes)  # С диска
+            assert build.call_count == 1
+
+            nodes[0]['X'] += 1
+            GraphCache(cache_service).get_graph("b1", nodes)
+            assert build.call_count == 2
@@ -0,0 +1,111 @@
+"""
+Unit тесты для ParetoSearch (маршруты по расстоянию, этажам и лестницам)
+"""
+import random
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.pareto_routes import ParetoSearch
+from services.routing_engine import RoutingEngine
+from services.routing_profiles import is_stair_edge
+
+
+def _random_building(rng):
+    """Случайный граф из 10 узлов на трёх этажах, часть узлов - лестницы"""
+    edges = []
+    for _ in range(26):
+        a, b = rng.sample(range(10), 2)
+        edges.append(GraphEdge(str(a), str(b), rng.randint(1, 6)))
+    graph = CompiledGraph.from_edges(edges, [str(i) for i in range(10)])
+    graph.attach_nodes([
+        {'Id': str(i), 'X': 0, 'Y': 0, 'Floor': rng.randint(1, 3),
+         'Type': 'Staircase' if rng.random() < 0.4 else 'Room'}
+        for i in range(10)
+    ])
+    return graph
+
+
+def _brute_force_front(graph, start, end):
+    """Множество Парето по полному перебору путей без циклов"""
+    costs = set()
+
+    def visit(node, path, distance, floor_changes, stairs):
+        if node == end:
+            costs.add((distance, floor_changes, stairs))
+            return
+        for position in range(graph.offsets[node], graph.offsets[node + 1]):
+            neighbor = graph.targets[position]
+            if neighbor in path:
+                continue
+            changed = graph.floors[node] != graph.floors[neighbor]
+            path.add(neighbor)
+            visit(neighbor, path, distance + graph.weights[position], floor_changes + changed,
+                  stairs + is_stair_edge(graph, node, neighbor))
+            path.remove(neighbor)
+
+    visit(start, {start}, 0.0, 0, 0)
+    return {
+        cost for cost in costs
+        if not any(other != cost and all(o <= c for o, c in zip(other, cost)) for other in costs)
+    }
+
+
+@pytest.fixture
+def grid_engine():
+    """Fixture с трёхэтажным синтетическим зданием (лестницы по углам, лифт в центре)"""
+    return RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=10, cols=10))
+
+
+class TestParetoSearch:
+    """Тесты для ParetoSearch"""
+
+    def test_matches_brute_force(self):
+        """Тест совпадения с полным перебором на случайных графах"""
+        rng = random.Random(11)
+        fronts = 0
+        for _ in range(80):
+            graph = _random_building(rng)
+            start, end = rng.sample(range(10), 2)
+            routes = ParetoSearch(graph).run(start, end)
+            expected = _brute_force_front(graph, start, end)
+            assert {(route.distance, route.floor_changes, route.stairs) for route in routes} == expected
+            fronts += len(expected) > 1
+            for route in routes:
+                assert route.path[0] == start and route.path[-1] == end
+        assert fronts > 0
+
+    def test_shortest_and_fewest_stairs(self, grid_engine):
+        """Тест: один поиск даёт кратчайший маршрут и маршрут без лестниц"""
+        graph = grid_engine.graph
+        start_id, end_id = '101', '201'  # Рядом с лестницей, лифт в центре этажа
+        routes = grid_engine.find_pareto_routes(start_id, end_id)
+        assert grid_engine.last_stats.method == 'pareto'
+        assert len(routes) >= 2
+        assert routes[0].distance == pytest.approx(grid_engine.find_path(start_id, end_id)[1])
+        assert routes[0].stairs > 0
+        assert min(route.stairs for route in routes) == 0
+        for route in routes:
+            assert route.path[0] == start_id and route.path[-1] == end_id
+            floors = [graph.floors[graph.to_index(node_id)] for node_id in route.path]
+            assert route.floor_changes == sum(a != b for a, b in zip(floors, floors[1:]))
+
+    def test_label_cap_keeps_shortest(self, grid_engine):
+        """Тест: при ограничении меток кратчайший маршрут остаётся"""
+        graph = grid_engine.graph
+        start_id, end_id = graph.node_ids[1], graph.node_ids[-2]
+        grid_engine.find_pareto_routes(start_id, end_id)
+        uncapped = grid_engine.last_stats.settled
+        routes = grid_engine.find_pareto_routes(start_id, end_id, max_labels=50)
+        assert grid_engine.last_stats.settled <= 50 + graph.node_count
+        assert grid_engine.last_stats.settled < uncapped
+        assert routes[0].distance == pytest.approx(grid_engine.find_path(start_id, end_id)[1])
+
+    def test_closures_and_unreachable(self):
+        """Тест: закрытия учитываются, нет пути - пустой список"""
+        engine = RoutingEngine.from_edges([GraphEdge('a', 'b', 1), GraphEdge('b', 'c', 1),
+                                           GraphEdge('a', 'c', 5)], ['a', 'b', 'c', 'd'])
+        assert [route.path for route in engine.find_pareto_routes('a', 'c')] == [['a', 'b', 'c']]
+        closures = engine.closure_overlay(closed_nodes=['b'])
+        assert [route.path for route in engine.find_pareto_routes('a', 'c', closures)] == [['a', 'c']]
+        assert engine.find_pareto_routes('a', 'd') == []
+        assert engine.last_stats.method == 'components'
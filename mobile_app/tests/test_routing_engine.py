@@ -0,0 +1,417 @@
+"""
+Unit тесты для RoutingEngine
+"""
+import random
+import pytest
+from services.graph_builder import GraphBuilder, GraphEdge, DEMO_NODES_CSV, make_grid_building_nodes
+from services.routing_engine import RoutingEngine, SearchStats, WALKING_SPEED
+
+
+def _bidirectional(from_id, to_id, weight):
+    """Пара рёбер в обе стороны"""
+    return [GraphEdge(from_id, to_id, weight), GraphEdge(to_id, from_id, weight)]
+
+
+def _reference_distances(start_id, edges, node_ids):
+    """Эталонные расстояния (Bellman-Ford) для сверки"""
+    distances = {node_id: float('inf') for node_id in node_ids}
+    distances[start_id] = 0.0
+    for _ in range(len(node_ids)):
+        changed = False
+        for edge in edges:
+            if distances[edge.from_id] + edge.weight < distances[edge.to_id]:
+                distances[edge.to_id] = distances[edge.from_id] + edge.weight
+                changed = True
+        if not changed:
+            break
+    return distances
+
+
+@pytest.fixture
+def small_edges():
+    """Fixture с маленьким графом: прямой путь a-c дороже обхода через b"""
+    return (
+        _bidirectional("a", "b", 1.0)
+        + _bidirectional("b", "c", 2.0)
+        + _bidirectional("a", "c", 5.0)
+        + _bidirectional("c", "d", 1.0)
+    )
+
+
+@pytest.fixture
+def demo_engine():
+    """Fixture с движком на демо-данных"""
+    return RoutingEngine.from_nodes(DEMO_NODES_CSV)
+
+
+class TestRoutingEngine:
+    """Тесты для RoutingEngine"""
+
+    def test_shortest_path(self, small_edges):
+        """Тест выбора более короткого обходного пути"""
+        engine = RoutingEngine.from_edges(small_edges)
+        path, distance = engine.find_path("a", "d")
+        assert path == ["a", "b", "c", "d"]
+        assert distance == pytest.approx(4.0)
+
+    def test_same_node(self, small_edges):
+        """Тест пути к самому себе"""
+        engine = RoutingEngine.from_edges(small_edges)
+        assert engine.find_path("a", "a") == (["a"], 0.0)
+
+    def test_no_path(self, small_edges):
+        """Тест изолированного узла"""
+        engine = RoutingEngine.from_edges(small_edges, ["a", "b", "c", "d", "isolated"])
+        assert engine.find_path("a", "isolated") is None
+
+    def test_unknown_node(self, small_edges):
+        """Тест неизвестного узла"""
+        engine = RoutingEngine.from_edges(small_edges)
+        assert engine.find_path("a", "missing") is None
+
+    def test_distances_match_reference(self, demo_engine):
+        """Тест совпадения расстояний с эталоном на демо-данных"""
+        edges = GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV)
+        node_ids = [str(node['Id']) for node in DEMO_NODES_CSV]
+        reference = _reference_distances("29", edges, node_ids)
+        for end_id in node_ids:
+            result = demo_engine.find_path("29", end_id)
+            if reference[end_id] == float('inf'):
+                assert result is None
+            else:
+                assert result[1] == pytest.approx(reference[end_id])
+
+    def test_compatibility_wrapper(self):
+        """Тест обёртки GraphBuilder.find_shortest_path"""
+        edges = GraphBuilder.build_edges_from_nodes(DEMO_NODES_CSV)
+        nodes_dict = {str(node['Id']): node for node in DEMO_NODES_CSV}
+        engine = RoutingEngine.from_edges(edges, nodes_dict.keys())
+        assert GraphBuilder.find_shortest_path("29", "54", edges, nodes_dict) == \
+            engine.find_path("29", "54")
+        assert GraphBuilder.find_shortest_path("1", "1", edges, nodes_dict) == (["1"], 0.0)
+
+
+class TestClosureOverlay:
+    """Тесты маршрутизации с учётом закрытий"""
+
+    def test_closed_edge_forces_detour(self, small_edges):
+        """Тест обхода закрытого ребра (в обе стороны)"""
+        engine = RoutingEngine.from_edges(small_edges)
+        closures = engine.closure_overlay(closed_edges={("c", "b")})
+        path, distance = engine.find_path("a", "d", closures)
+        assert path == ["a", "c", "d"]
+        assert distance == pytest.approx(6.0)
+
+    def test_closed_node(self, small_edges):
+        """Тест обхода закрытого узла"""
+        engine = RoutingEngine.from_edges(small_edges)
+        closures = engine.closure_overlay(closed_nodes={"b"})
+        path, _ = engine.find_path("a", "d", closures)
+        assert "b" not in path
+        assert engine.find_path("a", "b", closures) is None
+
+    def test_toggle_does_not_rebuild_graph(self, small_edges):
+        """Тест переключения закрытий без перестройки графа"""
+        engine = RoutingEngine.from_edges(small_edges)
+        graph = engine.graph
+        closed = engine.closure_overlay(closed_edges={("a", "b")})
+        assert engine.closure_overlay(closed_edges={("a", "b")}) is closed
+        opened = engine.closure_overlay()
+        assert opened.is_empty()
+        assert engine.graph is graph
+        assert engine.find_path("a", "d", opened)[1] == pytest.approx(4.0)
+
+    def test_overlay_from_service(self, demo_engine, tmp_path):
+        """Тест маски из RouteClosureService"""
+        from services.route_closure_service import RouteClosureService
+        from services.closure_overlay import ClosureOverlay
+
+        path, _ = demo_engine.find_path("29", "54")
+        service = RouteClosureService(closure_dir=str(tmp_path))
+        service.close_route(path[1], path[2])
+        closures = ClosureOverlay.from_service(demo_engine.graph, service)
+
+        rerouted = demo_engine.find_path("29", "54", closures)
+        assert rerouted is not None
+        assert (path[1], path[2]) not in zip(rerouted[0], rerouted[0][1:])
+
+    def test_compatibility_wrapper_closures(self, small_edges):
+        """Тест закрытий в GraphBuilder.find_shortest_path"""
+        nodes_dict = {node_id: {} for node_id in "abcd"}
+        path, _ = GraphBuilder.find_shortest_path(
+            "a", "d", small_edges, nodes_dict, closed_edges={("a", "b")}
+        )
+        assert path == ["a", "c", "d"]
+
+
+class TestAStar:
+    """Тесты A* с эвристикой по этажам"""
+
+    @pytest.fixture
+    def grid_engine(self):
+        """Fixture с синтетическим трёхэтажным зданием"""
+        return RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=15, cols=15))
+
+    def test_same_distances_on_demo(self, demo_engine):
+        """Тест совпадения расстояний A* и Dijkstra на демо-данных"""
+        node_ids = demo_engine.graph.node_ids
+        for end_id in node_ids:
+            dijkstra = demo_engine.find_path("29", end_id)
+            astar = demo_engine.find_path("29", end_id, method='astar')
+            if dijkstra is None:
+                assert astar is None
+            else:
+                assert astar[1] == pytest.approx(dijkstra[1])
+
+    def test_settles_fewer_nodes(self, grid_engine):
+        """Тест: A* раскрывает меньше узлов, чем Dijkstra, с тем же результатом"""
+        rng = random.Random(7)
+        node_ids = grid_engine.graph.node_ids
+        dijkstra_settled = astar_settled = 0
+        for _ in range(30):
+            start_id, end_id = rng.choice(node_ids), rng.choice(node_ids)
+            dijkstra = grid_engine.find_path(start_id, end_id)
+            dijkstra_settled += grid_engine.last_stats.settled
+            astar = grid_engine.find_path(start_id, end_id, method='astar')
+            astar_settled += grid_engine.last_stats.settled
+            assert grid_engine.last_stats.method == 'astar'
+            assert astar[1] == pytest.approx(dijkstra[1])
+        assert astar_settled < dijkstra_settled / 2
+
+    def test_heuristic_admissible(self, grid_engine):
+        """Тест: эвристика не превышает реальное расстояние"""
+        graph = grid_engine.graph
+        end_id = graph.node_ids[0]
+        heuristic = grid_engine._floor_aware_heuristic(graph.to_index(end_id))
+        _, per_floor = grid_engine._get_heuristic_params()
+        assert per_floor == pytest.approx(30 * GraphBuilder.FLOOR_CHANGE_PENALTY)
+        for node_id in graph.node_ids[::17]:
+            _, distance = grid_engine.find_path(node_id, end_id)
+            assert heuristic(graph.to_index(node_id)) <= distance + 1e-9
+
+    def test_unknown_method(self, demo_engine):
+        """Тест неизвестного метода поиска"""
+        with pytest.raises(ValueError):
+            demo_engine.find_path("29", "54", method='magic')
+
+
+class TestBidirectional:
+    """Тесты двунаправленного поиска"""
+
+    @pytest.mark.parametrize("method", ['bidirectional', 'bidirectional_astar'])
+    def test_matches_dijkstra(self, method):
+        """Тест совпадения расстояний и корректности пути"""
+        engine = RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=12, cols=12))
+        graph = engine.graph
+        rng = random.Random(11)
+        for _ in range(60):
+            start_id, end_id = rng.choice(graph.node_ids), rng.choice(graph.node_ids)
+            expected = engine.find_path(start_id, end_id)
+            path, distance = engine.find_path(start_id, end_id, method=method)
+            assert distance == pytest.approx(expected[1])
+            assert path[0] == start_id and path[-1] == end_id
+            weight = sum(
+                graph.weights[graph.edge_index(a, b)] for a, b in zip(path, path[1:])
+            )
+            assert weight == pytest.approx(distance)
+
+    @pytest.mark.parametrize("method", ['bidirectional', 'bidirectional_astar'])
+    def test_closures_and_unreachable(self, small_edges, method):
+        """Тест закрытий и отсутствия пути"""
+        engine = RoutingEngine.from_edges(small_edges, ["a", "b", "c", "d", "isolated"])
+        closures = engine.closure_overlay(closed_edges={("b", "c")})
+        path, distance = engine.find_path("a", "d", closures, method=method)
+        assert path == ["a", "c", "d"]
+        assert distance == pytest.approx(6.0)
+        assert engine.find_path("a", "isolated", method=method) is None
+
+    def test_auto_method_by_graph_size(self, small_edges):
+        """Тест выбора метода по размеру графа"""
+        engine = RoutingEngine.from_edges(small_edges)
+        assert engine.select_method() == 'dijkstra'
+        engine.BIDIRECTIONAL_MIN_NODES = 2
+        assert engine.select_method() == 'bidirectional'
+        assert engine.find_path("a", "d", method='auto')[1] == pytest.approx(4.0)
+        assert engine.last_stats.method == 'bidirectional'
+
+
+class TestShortestPathTree:
+    """Тесты переиспользования дерева кратчайших путей"""
+
+    def test_tree_matches_reference(self, small_edges):
+        """Тест расстояний дерева против Bellman-Ford"""
+        engine = RoutingEngine.from_edges(small_edges, ["a", "b", "c", "d", "isolated"])
+        tree = engine.shortest_path_tree("a")
+        expected = _reference_distances("a", small_edges, engine.graph.node_ids)
+        for node_id, distance in expected.items():
+            assert tree.distances[engine.graph.to_index(node_id)] == distance
+        assert engine.path_from_tree(tree, "d") == (["a", "b", "c", "d"], 4.0)
+        assert engine.path_from_tree(tree, "isolated") is None
+
+    def test_repeated_start_reuses_tree(self, demo_engine):
+        """Тест: вторая цель от того же старта строит дерево, третья - без поиска"""
+        graph = demo_engine.graph
+        start_id = "19"
+        targets = [node_id for node_id in graph.node_ids
+                   if demo_engine.find_path(start_id, node_id) is not None][1:4]
+
+        demo_engine.find_path(start_id, targets[0], reuse_tree=True)
+        assert demo_engine.last_stats.method == 'dijkstra'
+        demo_engine.find_path(start_id, targets[1], reuse_tree=True)
+        result = demo_engine.find_path(start_id, targets[2], reuse_tree=True)
+        assert demo_engine.last_stats == SearchStats(method='tree')
+        assert result == demo_engine.find_path(start_id, targets[2])
+
+    def test_tree_invalidated_by_closures(self, small_edges):
+        """Тест: смена закрытий или старта не использует старое дерево"""
+        engine = RoutingEngine.from_edges(small_edges)
+        engine.find_path("a", "c", reuse_tree=True)
+        engine.find_path("a", "d", reuse_tree=True)
+        closures = engine.closure_overlay(closed_edges={("b", "c")})
+        path, distance = engine.find_path("a", "d", closures, reuse_tree=True)
+        assert path == ["a", "c", "d"] and distance == pytest.approx(6.0)
+        assert engine.last_stats.method != 'tree'
+
+        assert engine.find_path("b", "d", reuse_tree=True)[1] == pytest.approx(3.0)
+        assert engine.last_stats.method != 'tree'
+
+
+class TestOneToMany:
+    """Тесты поиска от одного старта до нескольких целей"""
+
+    def test_matches_single_queries(self, demo_engine):
+        """Тест совпадения с поштучными запросами"""
+        graph = demo_engine.graph
+        end_ids = graph.node_ids[:30]
+        results = demo_engine.find_paths("19", end_ids)
+        assert list(results) == end_ids
+        for end_id in end_ids:
+            expected = demo_engine.find_path("19", end_id)
+            if expected is None:
+                assert results[end_id] is None
+            else:
+                assert results[end_id][1] == pytest.approx(expected[1])
+                assert results[end_id][0][0] == "19" and results[end_id][0][-1] == end_id
+
+    def test_stops_when_targets_settled(self, small_edges):
+        """Тест ранней остановки и закрытий"""
+        engine = RoutingEngine.from_edges(small_edges, ["a", "b", "c", "d", "isolated"])
+        results = engine.find_paths("a", ["b"])
+        assert results["b"] == (["a", "b"], 1.0)
+        assert engine.last_stats.settled == 2
+
+        closures = engine.closure_overlay(closed_edges={("b", "c")})
+        results = engine.find_paths("a", ["d", "isolated", "missing"], closures)
+        assert results["d"] == (["a", "c", "d"], 6.0)
+        assert results["isolated"] is None and results["missing"] is None
+
+
+class TestNearestFacility:
+    """Тесты поиска ближайших объектов заданного типа"""
+
+    @pytest.fixture
+    def grid_engine(self):
+        """Fixture с трёхэтажным зданием (лестницы по углам, лифт в центре)"""
+        return RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=8, cols=8))
+
+    def test_table_matches_brute_force(self, grid_engine):
+        """Тест совпадения с перебором всех лифтов"""
+        graph = grid_engine.graph
+        elevators = [node_id for node_id, node_type in zip(graph.node_ids, graph.node_types)
+                     if node_type == 'Elevator']
+        rng = random.Random(8)
+        for start_id in rng.sample(graph.node_ids, 20):
+            path, distance = grid_engine.nearest_of_type(start_id, 'Elevator')
+            expected = min(grid_engine.find_path(start_id, elevator)[1] for elevator in elevators)
+            assert distance == pytest.approx(expected)
+            assert path[0] == start_id and path[-1] in elevators
+
+    def test_table_reused_and_invalidated(self, grid_engine):
+        """Тест: таблица строится один раз и пересчитывается при закрытиях"""
+        graph = grid_engine.graph
+        start_id = graph.node_ids[0]
+        assert grid_engine.nearest_of_type(start_id, 'Staircase') == ([start_id], 0.0)
+        table = grid_engine.nearest_facility_table('Staircase')
+        grid_engine.nearest_of_type(graph.node_ids[5], 'Staircase')
+        assert grid_engine.nearest_facility_table('Staircase') is table
+
+        # Закрываем лестницу в углу первого этажа
+        closures = grid_engine.closure_overlay(closed_nodes=[start_id])
+        assert grid_engine.nearest_of_type(start_id, 'Staircase', closures) is None
+        path, distance = grid_engine.nearest_of_type(graph.node_ids[2], 'Staircase', closures)
+        assert start_id not in path and distance > 200
+        assert grid_engine.nearest_facility_table('Staircase', closures) is not table
+
+    def test_exclude_start(self, grid_engine):
+        """Тест: со старта того же типа ищется ближайший другой объект"""
+        graph = grid_engine.graph
+        start_id = graph.node_ids[0]  # Лестница в углу первого этажа
+        path, distance = grid_engine.nearest_of_type(start_id, 'Staircase', exclude_start=True)
+        stairs = [node_id for node_id, node_type in zip(graph.node_ids, graph.node_types)
+                  if node_type == 'Staircase' and node_id != start_id]
+        assert path[0] == start_id and path[-1] != start_id and path[-1] in stairs
+        assert distance == pytest.approx(min(grid_engine.find_path(start_id, other)[1] for other in stairs))
+        # Старт другого типа - обычный ответ из таблицы
+        assert (grid_engine.nearest_of_type(start_id, 'Elevator', exclude_start=True)
+                == grid_engine.nearest_of_type(start_id, 'Elevator'))
+
+    def test_demo_types(self):
+        """Тест: в демо-здании есть лестницы и лифты, но нет типа Exit"""
+        engine = RoutingEngine.from_nodes(DEMO_NODES_CSV)
+        assert engine.nearest_of_type('24', 'Exit') is None
+        for node_type in ('Staircase', 'Elevator'):
+            assert engine.nearest_of_type('24', node_type) is not None
+            path, _ = engine.nearest_of_type('14', node_type, exclude_start=True)
+            assert path[-1] != '14'
+
+    def test_requires_node_types(self, small_edges):
+        """Тест ошибки для графа без типов узлов"""
+        engine = RoutingEngine.from_edges(small_edges)
+        with pytest.raises(ValueError):
+            engine.nearest_of_type("a", 'Elevator')
+
+
+class TestReachableWithin:
+    """Тесты поиска достижимых узлов в пределах бюджета (изохрона)"""
+
+    @pytest.fixture
+    def grid_engine(self):
+        """Fixture с двухэтажным синтетическим зданием"""
+        return RoutingEngine.from_nodes(make_grid_building_nodes(floors=2, rows=10, cols=10))
+
+    def test_matches_full_search(self, grid_engine):
+        """Тест: ровно узлы с расстоянием не больше бюджета"""
+        graph = grid_engine.graph
+        start_id = graph.node_ids[12]
+        tree = grid_engine.shortest_path_tree(start_id)
+        budget = 450.0
+        reachable = grid_engine.reachable_within(start_id, max_distance=budget)
+        expected = {graph.to_id(i): d for i, d in enumerate(tree.distances) if d <= budget}
+        assert reachable.keys() == expected.keys()
+        for node_id, distance in reachable.items():
+            assert distance == pytest.approx(expected[node_id])
+
+        # Раскрывается только достижимая область
+        assert grid_engine.last_stats.settled == len(reachable) < graph.node_count
+
+    def test_minutes_budget(self, grid_engine):
+        """Тест бюджета по времени через скорость ходьбы"""
+        start_id = grid_engine.graph.node_ids[0]
+        by_distance = grid_engine.reachable_within(start_id, max_distance=300 * WALKING_SPEED)
+        by_minutes = grid_engine.reachable_within(start_id, max_minutes=300)
+        assert by_minutes.keys() == by_distance.keys()
+        assert max(by_minutes.values()) <= 300
+        assert by_minutes[start_id] == 0.0
+
+    def test_closures_and_errors(self, grid_engine):
+        """Тест закрытий, закрытого старта и неверного бюджета"""
+        graph = grid_engine.graph
+        start_id, blocked_id = graph.node_ids[0], graph.node_ids[1]
+        closures = grid_engine.closure_overlay(closed_nodes=[blocked_id])
+        reachable = grid_engine.reachable_within(start_id, max_distance=1000, closures=closures)
+        assert blocked_id not in reachable and start_id in reachable
+        assert grid_engine.reachable_within(blocked_id, max_distance=1000, closures=closures) == {}
+        with pytest.raises(ValueError):
+            grid_engine.reachable_within(start_id)
+        with pytest.raises(ValueError):
+            grid_engine.reachable_within(start_id, max_distance=1, max_minutes=1)
@@ -0,0 +1,112 @@
+"""
+Unit тесты для профилей маршрутизации (доступность)
+"""
+import pytest
+from services.graph_builder import GraphEdge, make_grid_building_nodes
+from services.routing_engine import RoutingEngine
+from services.routing_profiles import STAIRS_PENALTY_FACTOR, is_stair_edge
+
+
+@pytest.fixture
+def grid_nodes():
+    """Fixture с двухэтажным зданием: лестницы по углам, лифт в центре"""
+    return make_grid_building_nodes(floors=2, rows=8, cols=8)
+
+
+def _uses_stairs(engine, path):
+    """Есть ли на пути межэтажный переход по лестнице"""
+    graph = engine.graph
+    for a, b in zip(path, path[1:]):
+        i, j = graph.to_index(a), graph.to_index(b)
+        if graph.floors[i] != graph.floors[j] and 'Staircase' in (graph.node_types[i], graph.node_types[j]):
+            return True
+    return False
+
+
+class TestRoutingProfiles:
+    """Тесты для профилей маршрутизации"""
+
+    def test_profile_weights(self, grid_nodes):
+        """Тест весов профилей на общей топологии"""
+        graph = RoutingEngine.from_nodes(grid_nodes).graph
+        default = graph.profile_weights()
+        avoid = graph.profile_weights('avoid_stairs')
+        elevator = graph.profile_weights('elevator_only')
+        assert default is graph.weights
+        assert graph.profile_weights('avoid_stairs') is avoid  # Строится один раз
+        assert len(avoid) == len(elevator) == len(default)
+        assert all(a >= d for a, d in zip(avoid, default))
+        assert sorted({a / d for a, d in zip(avoid, default) if a != d}) == [STAIRS_PENALTY_FACTOR]
+        assert float('inf') in elevator
+
+    @pytest.mark.parametrize("method", ['dijkstra', 'astar', 'alt', 'bidirectional', 'auto'])
+    def test_elevator_only_avoids_stairs(self, grid_nodes, method):
+        """Тест: от лестницы к лестнице этажом выше - через лифт"""
+        engine = RoutingEngine.from_nodes(grid_nodes)
+        start_id, end_id = '64', '128'  # Угловая лестница, этажи 1 и 2
+        path, distance = engine.find_path(start_id, end_id, method=method)
+        assert _uses_stairs(engine, path)
+
+        path, elevator_distance = engine.find_path(start_id, end_id, method=method, profile='elevator_only')
+        assert not _uses_stairs(engine, path)
+        assert elevator_distance > distance
+        expected = engine.find_path(start_id, end_id, profile='elevator_only')
+        assert elevator_distance == pytest.approx(expected[1])
+
+    def test_without_elevators(self, grid_nodes):
+        """Тест: без лифтов avoid_stairs идёт по лестнице, elevator_only - нет пути"""
+        nodes = [node for node in grid_nodes if node['Type'] != 'Elevator']
+        engine = RoutingEngine.from_nodes(nodes)
+        path, _ = engine.find_path('65', '129', profile='avoid_stairs')
+        assert _uses_stairs(engine, path)
+        assert engine.find_path('65', '129', profile='elevator_only') is None
+
+    def test_static_methods_fall_back(self, grid_nodes):
+        """Тест: таблица всех пар не используется для другого профиля"""
+        engine = RoutingEngine.from_nodes(grid_nodes)
+        engine.attach_distance_oracle()
+        assert engine.select_method() == 'oracle'
+        assert engine.select_method(profile='elevator_only') != 'oracle'
+        path, _ = engine.find_path('64', '128', method='oracle', profile='elevator_only')
+        assert not _uses_stairs(engine, path)
+
+    def test_tree_keyed_by_profile(self, grid_nodes):
+        """Тест: дерево кратчайших путей не переиспользуется между профилями"""
+        engine = RoutingEngine.from_nodes(grid_nodes)
+        default_tree = engine.shortest_path_tree('64')
+        elevator_tree = engine.shortest_path_tree('64', profile='elevator_only')
+        assert elevator_tree is not default_tree
+        index = engine.graph.to_index('128')
+        assert elevator_tree.distances[index] > default_tree.distances[index]
+
+    def test_stairs_detected_like_graph_builder(self, grid_nodes):
+        """Тест: лестницы в нижнем регистре и только по названию тоже лестницы"""
+        relabeled = [dict(node) for node in grid_nodes]
+        stairs = [node for node in relabeled if node['Type'] == 'Staircase']
+        for number, node in enumerate(stairs):
+            if number % 2:
+                node['Type'] = 'staircase'
+            else:
+                node['Type'], node['Name'] = 'Room', 'Staircase B'
+        graph = RoutingEngine.from_nodes(grid_nodes).graph
+        relabeled_engine = RoutingEngine.from_nodes(relabeled)
+        relabeled_graph = relabeled_engine.graph
+
+        def stair_edges(graph):
+            return sum(is_stair_edge(graph, source, graph.targets[position])
+                       for source in range(graph.node_count)
+                       for position in range(graph.offsets[source], graph.offsets[source + 1]))
+
+        assert stair_edges(relabeled_graph) == stair_edges(graph) > 0
+        path, _ = relabeled_engine.find_path('64', '128', profile='elevator_only')
+        assert not any(is_stair_edge(relabeled_graph, relabeled_graph.to_index(a), relabeled_graph.to_index(b))
+                       for a, b in zip(path, path[1:]))
+
+    def test_unknown_profile(self):
+        """Тест ошибок для неизвестного профиля и графа без типов"""
+        engine = RoutingEngine.from_edges([GraphEdge('a', 'b', 1)])
+        with pytest.raises(ValueError):
+            engine.find_path('a', 'b', profile='avoid_stairs')
+        grid = RoutingEngine.from_nodes(make_grid_building_nodes(floors=1, rows=2, cols=2))
+        with pytest.raises(ValueError):
+            grid.find_path('4', '5', profile='teleport')
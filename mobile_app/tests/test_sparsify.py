@@ -0,0 +1,92 @@
+"""
+Unit тесты для sparsify_graph (прореживание рёбер)
+"""
+import random
+import pytest
+from services.graph_builder import DEMO_NODES_CSV, GraphEdge, make_grid_building_nodes
+from services.compiled_graph import CompiledGraph
+from services.graph_cache import GraphCache
+from services.routing_engine import RoutingEngine
+from services.routing_profiles import AVOID_STAIRS, ELEVATOR_ONLY
+from services.sparsify import sparsify_graph
+
+INF = float('inf')
+
+
+def _assert_stretch(graph, sparse, epsilon, profile='default', sources=None):
+    """Расстояния прореженного графа не меньше исходных и не больше (1 + epsilon) раз"""
+    full, reduced = RoutingEngine(graph), RoutingEngine(sparse)
+    for start_id in sources or graph.node_ids:
+        expected = full.shortest_path_tree(start_id, profile=profile).distances
+        actual = reduced.shortest_path_tree(start_id, profile=profile).distances
+        for before, after in zip(expected, actual):
+            if before == INF:
+                assert after == INF
+            else:
+                assert before - 1e-6 <= after <= before * (1 + epsilon) + 1e-6
+
+
+class TestSparsify:
+    """Тесты для sparsify_graph"""
+
+    def test_exact_on_random_graphs(self):
+        """Тест: при epsilon = 0 удаляются только доминируемые рёбра, расстояния те же"""
+        rng = random.Random(3)
+        removed = 0
+        for _ in range(30):
+            edges = [GraphEdge(str(a), str(b), rng.randint(1, 6))
+                     for a, b in (rng.sample(range(10), 2) for _ in range(30))]
+            graph = CompiledGraph.from_edges(edges, [str(i) for i in range(10)])
+            sparse, report = sparsify_graph(graph, epsilon=0.0)
+            _assert_stretch(graph, sparse, 0.0)
+            removed += report.edges_before - report.edges_after
+        assert removed > 0
+
+    @pytest.mark.parametrize('epsilon', [0.05, 0.2])
+    def test_demo_reduced_within_epsilon(self, epsilon):
+        """Тест: демо-граф теряет рёбра, расстояния в пределах epsilon"""
+        graph = CompiledGraph.from_nodes(DEMO_NODES_CSV)
+        sparse, report = sparsify_graph(graph, epsilon)
+        assert report.edges_before == graph.edge_count
+        assert report.edges_after == sparse.edge_count < graph.edge_count
+        assert report.reduction > 0.1
+        assert sparse.node_ids == graph.node_ids
+        _assert_stretch(graph, sparse, epsilon)
+
+    def test_profiles_preserved(self):
+        """Тест: гарантия держится и для профилей доступности"""
+        graph = CompiledGraph.from_nodes(make_grid_building_nodes(3, 6, 6, spacing=40))
+        sparse, report = sparsify_graph(graph, 0.05)
+        assert report.reduction > 0.3
+        sources = graph.node_ids[::7]
+        for profile in ('default', AVOID_STAIRS, ELEVATOR_ONLY):
+            _assert_stretch(graph, sparse, 0.05, profile, sources)
+
+    def test_no_detour_through_stairs(self):
+        """Тест: обычное ребро не заменяется обходом по лестнице"""
+        edges = [GraphEdge('a', 'c', 10), GraphEdge('a', 's', 5), GraphEdge('s', 'c', 5)]
+        graph = CompiledGraph.from_edges(edges, ['a', 'c', 's'])
+        graph.attach_nodes([
+            {'Id': 'a', 'X': 0, 'Y': 0, 'Floor': 1, 'Type': 'Room'},
+            {'Id': 'c', 'X': 10, 'Y': 0, 'Floor': 1, 'Type': 'Room'},
+            {'Id': 's', 'X': 5, 'Y': 0, 'Floor': 2, 'Type': 'Staircase'},
+        ])
+        sparse, report = sparsify_graph(graph, 0.0)
+        assert report.edges_after == report.edges_before
+        _assert_stretch(graph, sparse, 0.0, AVOID_STAIRS)
+
+        graph.floors[2] = 1  # Та же точка без смены этажа - обход разрешён
+        _, report = sparsify_graph(graph, 0.0)
+        assert report.edges_after < report.edges_before
+
+    def test_compile_time_option(self):
+        """Тест: прореживание при сборке через from_nodes и GraphCache"""
+        graph = CompiledGraph.from_nodes(DEMO_NODES_CSV, sparsify_epsilon=0.05)
+        assert graph.edge_count < CompiledGraph.from_nodes(DEMO_NODES_CSV).edge_count
+        assert graph.node_types is not None and graph.has_coordinates
+
+        plain = GraphCache().get_graph('b1', DEMO_NODES_CSV)
+        cache = GraphCache(sparsify_epsilon=0.05)
+        assert cache.get_graph('b1', DEMO_NODES_CSV).edge_count == graph.edge_count
+        assert cache._entries['b1'][0] != GraphCache.fingerprint(DEMO_NODES_CSV)
+        assert plain.edge_count > graph.edge_count
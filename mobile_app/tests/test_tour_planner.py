@@ -0,0 +1,98 @@
+"""
+Unit тесты для маршрута обхода нескольких точек
+"""
+import itertools
+import random
+import pytest
+from services.graph_builder import make_grid_building_nodes
+from services.routing_engine import RoutingEngine
+from services.tour_planner import plan_tour
+
+
+def _random_matrix(rng, count, symmetric=True):
+    """Матрица расстояний между случайными точками (с искажением, если несимметричная)"""
+    points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(count)]
+    return [[0.0 if i == j else
+             ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 * (1.0 if symmetric else rng.uniform(1.0, 1.5))
+             for j, b in enumerate(points)] for i, a in enumerate(points)]
+
+
+def _best_tour(matrix, return_to_start):
+    """Оптимальный обход полным перебором"""
+    best = float('inf')
+    for order in itertools.permutations(range(1, len(matrix))):
+        tour = (0,) + order + ((0,) if return_to_start else ())
+        best = min(best, sum(matrix[a][b] for a, b in zip(tour, tour[1:])))
+    return best
+
+
+@pytest.fixture
+def grid_engine():
+    """Fixture с трёхэтажным синтетическим зданием"""
+    return RoutingEngine.from_nodes(make_grid_building_nodes(floors=3, rows=12, cols=12))
+
+
+class TestPlanTour:
+    """Тесты для plan_tour"""
+
+    @pytest.mark.parametrize("return_to_start", [False, True])
+    @pytest.mark.parametrize("symmetric", [True, False])
+    def test_valid_and_near_optimal(self, return_to_start, symmetric):
+        """Тест: порядок - перестановка с фиксированным стартом, длина близка к оптимальной"""
+        rng = random.Random(7)
+        for _ in range(10):
+            matrix = _random_matrix(rng, 7, symmetric)
+            order, cost = plan_tour(matrix, return_to_start)
+            assert order[0] == 0 and sorted(order) == list(range(7))
+            tour = order + [0] if return_to_start else order
+            assert cost == pytest.approx(sum(matrix[a][b] for a, b in zip(tour, tour[1:])))
+            assert cost <= _best_tour(matrix, return_to_start) * 1.1
+
+    def test_improves_nearest_neighbour(self):
+        """Тест: 2-opt/Or-opt улучшают жадный порядок на 50 точках"""
+        matrix = _random_matrix(random.Random(8), 51)
+        greedy = plan_tour(matrix, max_passes=0)[1]
+        assert plan_tour(matrix)[1] < greedy
+
+    def test_trivial(self):
+        """Тест обхода из одной и двух точек"""
+        assert plan_tour([]) == ([], 0.0)
+        assert plan_tour([[0.0]]) == ([0], 0.0)
+        assert plan_tour([[0.0, 3.0], [4.0, 0.0]], return_to_start=True) == ([0, 1], 7.0)
+
+
+class TestFindTour:
+    """Тесты для RoutingEngine.find_tour"""
+
+    def test_stitched_path(self, grid_engine):
+        """Тест: склеенный путь проходит все точки и его длина совпадает с суммой участков"""
+        stops = random.Random(9).sample(grid_engine.graph.node_ids, 15)
+        path, distance, order = grid_engine.find_tour(stops[0], stops[1:] + [stops[3], stops[0]])
+        assert path[0] == stops[0]
+        assert sorted(order) == sorted(stops[1:])
+        assert path[-1] == order[-1]
+        positions = [path.index(stop_id) for stop_id in order]
+        assert positions == sorted(positions)
+
+        legs = zip([stops[0]] + order, order)
+        assert distance == pytest.approx(sum(grid_engine.find_path(a, b)[1] for a, b in legs))
+
+    def test_return_to_start_and_oracle(self, grid_engine):
+        """Тест возврата в старт; с таблицей всех пар результат тот же"""
+        stops = random.Random(10).sample(grid_engine.graph.node_ids, 10)
+        path, distance, order = grid_engine.find_tour(stops[0], stops[1:], return_to_start=True)
+        assert path[0] == path[-1] == stops[0]
+        assert len(order) == 9
+
+        grid_engine.attach_distance_oracle()
+        oracle_result = grid_engine.find_tour(stops[0], stops[1:], return_to_start=True)
+        assert oracle_result[1] == pytest.approx(distance, rel=1e-6)
+        assert oracle_result[0][0] == oracle_result[0][-1] == stops[0]
+
+    def test_unreachable_stops_skipped(self, grid_engine):
+        """Тест: закрытые и неизвестные точки пропускаются, закрытый старт - None"""
+        node_ids = grid_engine.graph.node_ids
+        closures = grid_engine.closure_overlay(closed_nodes=[node_ids[5]])
+        _, _, order = grid_engine.find_tour(node_ids[0], [node_ids[5], node_ids[9], 'missing'], closures)
+        assert order == [node_ids[9]]
+        assert grid_engine.find_tour(node_ids[5], [node_ids[9]], closures) is None
@@ -5,7 +5,7 @@ from kivy.uix.widget import Widget
 from kivy.graphics import Color, Ellipse, Line, Rectangle
 from kivy.core.window import Window
 from kivy.metrics import dp
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from services.api_client import Node, Route
 import logging
 
@@ -20,6 +20,9 @@ class MapWidget(Widget):
         self.nodes: List[Node] = []
         self.edges: List[Tuple[str, str]] = []
         self.route: Optional[Route] = None
+        self.alternative_routes: List[Route] = []
+        self.reachable_nodes: Dict[str, float] = {}  # ID узла -> стоимость (изохрона)
+        self.reachable_budget = 0.0
         self.selected_node: Optional[Node] = None
         self.start_node: Optional[Node] = None
         self.end_node: Optional[Node] = None
@@ -44,6 +47,12 @@ class MapWidget(Widget):
             'Elevator': (1.0, 0.2, 0.2, 1.0),  # Красный
         }
 
+        # Цвета альтернативных маршрутов (по порядку)
+        self.alternative_colors = [
+            (0.6, 0.4, 0.9, 0.5),  # Фиолетовый
+            (0.9, 0.7, 0.2, 0.5),  # Жёлтый
+        ]
+
         # Привязка событий
         self.bind(size=self._update_canvas)
 
@@ -77,6 +86,28 @@ class MapWidget(Widget):
         self.route = route
         self._update_canvas()
 
+    def set_alternative_routes(self, routes: List[Route]):
+        """
+        Установить альтернативные маршруты (рисуются под основным)
+
+        Args:
+            routes: Список объектов Route (может быть пустым)
+        """
+        self.alternative_routes = routes
+        self._update_canvas()
+
+    def set_reachable_nodes(self, costs: Dict[str, float], budget: float):
+        """
+        Подсветить достижимые узлы (чем ближе, тем насыщеннее)
+
+        Args:
+            costs: {ID узла: стоимость} (пустой словарь - убрать подсветку)
+            budget: Бюджет, в тех же единицах, что и стоимости
+        """
+        self.reachable_nodes = costs
+        self.reachable_budget = budget
+        self._update_canvas()
+
     def set_start_node(self, node: Optional[Node]):
         """Установить стартовый узел"""
         self.start_node = node
@@ -198,6 +229,8 @@ class MapWidget(Widget):
         self.start_node = None
         self.end_node = None
         self.route = None
+        self.alternative_routes = []
+        self.reachable_nodes = {}
         self._update_canvas()
 
     def _update_canvas(self, *args):
@@ -238,6 +271,17 @@ class MapWidget(Widget):
                     screen_x2, screen_y2 = self._world_to_screen(to_node.x, to_node.y)
                     Line(points=[screen_x1, screen_y1, screen_x2, screen_y2], width=dp(4))
 
+            # Альтернативные маршруты - тоньше и бледнее основного
+            for index, route in enumerate(self.alternative_routes):
+                Color(*self.alternative_colors[index % len(self.alternative_colors)])
+                route_points = []
+                for node in route.path:
+                    screen_x, screen_y = self._world_to_screen(node.x, node.y)
+                    route_points.extend([screen_x, screen_y])
+
+                if route_points:
+                    Line(points=route_points, width=dp(3))
+
             # Отрисовка маршрута если есть
             if self.route:
                 Color(0.2, 0.8, 0.2, 0.7)
@@ -249,6 +293,17 @@ class MapWidget(Widget):
                 if route_points:
                     Line(points=route_points, width=dp(4))
 
+            # Подсветка достижимой области под узлами
+            for node in self.nodes:
+                cost = self.reachable_nodes.get(str(node.id))
+                if cost is None:
+                    continue
+                share = cost / self.reachable_budget if self.reachable_budget else 0.0
+                Color(0.2, 0.8, 0.4, 0.15 + 0.45 * (1.0 - min(share, 1.0)))
+                screen_x, screen_y = self._world_to_screen(node.x, node.y)
+                halo = self.node_radius * 2
+                Ellipse(pos=(screen_x - halo, screen_y - halo), size=(halo * 2, halo * 2))
+
             # Отрисовка узлов
             for node in self.nodes:
                 screen_x, screen_y = self._world_to_screen(node.x, node.y)
@@ -284,5 +339,7 @@ class MapWidget(Widget):
         self.nodes = []
         self.edges = []
         self.route = None
+        self.alternative_routes = []
+        self.reachable_nodes = {}
         self.selected_node = None
         self._update_canvas()